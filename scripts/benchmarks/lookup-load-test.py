@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Load Test for the RitterFinder Dedup Lookup Service
+Sends batches of /lookup queries to a running dedup-lookup-service.py from
+several keep-alive connections at once and reports request and per-lead
+latency percentiles (p50/p99) and throughput.
+
+Queries mix near-duplicates of leads from the index corpus (name typos,
+dropped phone or website, so the fuzzy path is exercised) with fresh
+synthetic leads.
+
+Usage:
+  python3 benchmarks/lookup-load-test.py --corpus output/index/leads.csv --requests 2000 --batch-size 20
+"""
+
+import argparse
+import csv
+import http.client
+import json
+import math
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List
+from urllib.parse import urlsplit
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCHMARK_DIR))
+
+from synthetic_leads import SyntheticLeadGenerator
+
+
+def percentile(values: List[float], share: float) -> float:
+    """Nearest-rank percentile of already sorted values"""
+    if not values:
+        return 0.0
+    return values[min(len(values), max(1, math.ceil(share * len(values)))) - 1]
+
+
+def build_queries(corpus_file: Path, count: int, duplicate_share: float, seed: int) -> List[Dict[str, str]]:
+    generator = SyntheticLeadGenerator(seed, typo_rate=0.5)
+    rng = generator.random
+
+    corpus = []
+    if corpus_file and corpus_file.exists():
+        with open(corpus_file, 'r', newline='', encoding='utf-8') as f:
+            corpus = [row for _, row in zip(range(200000), csv.DictReader(f))]
+
+    queries = []
+    fresh = generator.businesses(count, prefix='Nuevo')
+    for _ in range(count):
+        if corpus and rng.random() < duplicate_share:
+            lead = dict(rng.choice(corpus))
+            lead['company_name'] = generator.typo(lead.get('company_name', ''))
+            if rng.random() < 0.5:
+                lead['phone'] = ''
+                lead['company_website'] = ''
+            queries.append(lead)
+        else:
+            queries.append(generator.lead_row(next(fresh), 'Carga'))
+    return queries
+
+
+def run_client(url: str, batches: List[List[Dict[str, str]]], latencies: List[float],
+               duplicates: List[int], errors: List[str]) -> None:
+    """Send batches over one keep-alive connection, recording each request's latency"""
+    parts = urlsplit(url)
+    connection = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+    headers = {'Content-Type': 'application/json'}
+    try:
+        for batch in batches:
+            # Bytes, so http.client sends headers and body in one segment
+            body = json.dumps({'leads': batch}).encode('utf-8')
+            started = time.perf_counter()
+            connection.request('POST', '/lookup', body, headers)
+            response = connection.getresponse()
+            payload = response.read()
+            elapsed = time.perf_counter() - started
+
+            if response.status != 200:
+                errors.append(f"HTTP {response.status}: {payload[:200]!r}")
+                continue
+            latencies.append(elapsed)
+            duplicates.append(sum(result['duplicate'] for result in json.loads(payload)['results']))
+    except (OSError, http.client.HTTPException) as e:
+        errors.append(f"{type(e).__name__}: {e}")
+    finally:
+        connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load-test a running dedup lookup service')
+    parser.add_argument('--url', default='http://127.0.0.1:8765', help='Service URL (default: http://127.0.0.1:8765)')
+    parser.add_argument('--corpus', help="Index corpus CSV (INDEX_DIR/leads.csv) to draw near-duplicates from")
+    parser.add_argument('--requests', type=int, default=2000, help='Lookup requests to send (default: 2000)')
+    parser.add_argument('--batch-size', type=int, default=20, help='Leads per request (default: 20)')
+    parser.add_argument('--concurrency', type=int, default=4, help='Parallel connections (default: 4)')
+    parser.add_argument('--duplicate-share', type=float, default=0.5,
+                        help='Share of queries that are near-duplicates of corpus leads (default: 0.5)')
+    parser.add_argument('--seed', type=int, default=7, help='Random seed')
+
+    args = parser.parse_args()
+    if args.requests < 1 or args.batch_size < 1 or args.concurrency < 1:
+        parser.error('--requests, --batch-size and --concurrency must be at least 1')
+
+    queries = build_queries(Path(args.corpus) if args.corpus else None,
+                            args.requests * args.batch_size, args.duplicate_share, args.seed)
+    batches = [queries[start:start + args.batch_size] for start in range(0, len(queries), args.batch_size)]
+
+    latencies: List[float] = []
+    duplicates: List[int] = []
+    errors: List[str] = []
+    threads = [threading.Thread(target=run_client,
+                                args=(args.url, batches[worker::args.concurrency], latencies, duplicates, errors))
+               for worker in range(args.concurrency)]
+
+    print(f"🚀 Sending {len(batches)} requests of {args.batch_size} leads over {args.concurrency} connections...")
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    leads = len(latencies) * args.batch_size
+    print(f"\n📊 Load test results")
+    print(f"   Requests: {len(latencies)} ok, {len(errors)} failed in {elapsed:.2f}s "
+          f"({len(latencies) / elapsed:,.0f} requests/sec, {leads / elapsed:,.0f} leads/sec)")
+    print(f"   Request latency: p50 {percentile(latencies, 0.50) * 1000:.2f} ms, "
+          f"p99 {percentile(latencies, 0.99) * 1000:.2f} ms, max {latencies[-1] * 1000 if latencies else 0:.2f} ms")
+    print(f"   Per-lead latency: p50 {percentile(latencies, 0.50) * 1000 / args.batch_size:.3f} ms, "
+          f"p99 {percentile(latencies, 0.99) * 1000 / args.batch_size:.3f} ms")
+    print(f"   Duplicates found: {sum(duplicates)} of {leads} leads")
+    for error in errors[:5]:
+        print(f"   ❌ {error}")
+    if errors:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
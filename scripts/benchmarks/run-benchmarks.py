@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Benchmark Suite for RitterFinder Lead Scripts
+Runs LeadConverter.convert_all and LeadDeduplicator on synthetic data of
+increasing size, records rows/sec, pairs compared and peak RSS, and
+compares them against a JSON baseline. Exits with status 1 when rows/sec
+or peak RSS regresses past the tolerance, or when there is no baseline to
+compare against (benchmarks/baseline.json covers the CI sizes 1000,10000). Pairs compared is only
+reported: blocking that restores recall rightly compares more pairs.
+
+Each benchmark runs in a fresh child process so its peak RSS is measured
+in isolation (os.wait4 reports the resource usage of that child only).
+
+Usage:
+  python3 benchmarks/run-benchmarks.py --sizes 1000,10000 --update-baseline
+  python3 benchmarks/run-benchmarks.py --sizes 1000,10000
+"""
+
+import argparse
+import csv
+import importlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+SCRIPTS_DIR = BENCHMARK_DIR.parent
+sys.path.insert(0, str(SCRIPTS_DIR))
+sys.path.insert(0, str(BENCHMARK_DIR))
+
+from synthetic_leads import SyntheticLeadGenerator
+
+DEFAULT_SIZES = [1000, 10000, 100000, 1000000]
+DEFAULT_BASELINE = BENCHMARK_DIR / 'baseline.json'
+
+# Metric name -> True when higher is better
+METRICS = {
+    'rows_per_sec': True,
+    'peak_rss_mb': False
+}
+# Shown next to the baseline but never a regression
+REPORTED_METRICS = ['pairs_compared']
+
+
+def run_child(stage: str, input_path: str, work_dir: str, result_file: str) -> None:
+    """Run one stage in this (child) process and write its measurements as JSON"""
+    with open(os.devnull, 'w') as devnull:
+        sys.stdout = devnull
+        start = time.perf_counter()
+
+        if stage == 'convert':
+            converter = importlib.import_module('convert-json-to-csv').LeadConverter(input_path, work_dir)
+            converter.convert_all()
+            elapsed = time.perf_counter() - start
+            with open(Path(work_dir) / 'leads_combined.csv', 'r', newline='', encoding='utf-8') as f:
+                rows = sum(1 for _ in csv.reader(f)) - 1
+            result = {'rows': rows, 'seconds': elapsed, 'pairs_compared': 0}
+        else:
+            dedup = importlib.import_module('deduplicate-leads').LeadDeduplicator(
+                input_path,
+                str(Path(work_dir) / 'deduplicated.csv'),
+                str(Path(work_dir) / 'report.txt')
+            )
+            dedup.deduplicate()
+            elapsed = time.perf_counter() - start
+            result = {
+                'rows': dedup.stats['total_leads'],
+                'seconds': elapsed,
+                'pairs_compared': dedup.stats['pairs_compared'],
+                'duplicates_removed': dedup.stats['duplicates_removed']
+            }
+
+        sys.stdout = sys.__stdout__
+
+    with open(result_file, 'w', encoding='utf-8') as f:
+        json.dump(result, f)
+
+
+def measure(stage: str, input_path: Path, work_dir: Path) -> Dict[str, float]:
+    """Run a stage in a child process and return its metrics"""
+    work_dir.mkdir(parents=True, exist_ok=True)
+    result_file = work_dir / f'{stage}_result.json'
+
+    process = subprocess.Popen([
+        sys.executable, __file__, '--child', stage,
+        '--child-input', str(input_path), '--child-work-dir', str(work_dir),
+        '--child-result', str(result_file)
+    ])
+    _, status, usage = os.wait4(process.pid, 0)
+    process.returncode = os.waitstatus_to_exitcode(status)
+    if process.returncode != 0:
+        raise RuntimeError(f"{stage} benchmark failed with exit code {process.returncode}")
+
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak_rss = usage.ru_maxrss * (1 if sys.platform == 'darwin' else 1024)
+
+    with open(result_file, 'r', encoding='utf-8') as f:
+        result = json.load(f)
+
+    metrics = {
+        'rows': result['rows'],
+        'seconds': round(result['seconds'], 3),
+        'rows_per_sec': round(result['rows'] / result['seconds'], 1) if result['seconds'] else 0.0,
+        'peak_rss_mb': round(peak_rss / (1024 * 1024), 1),
+        'pairs_compared': result['pairs_compared']
+    }
+    if 'duplicates_removed' in result:
+        metrics['duplicates_removed'] = result['duplicates_removed']
+    return metrics
+
+
+def prepare_inputs(data_dir: Path, size: int, seed: int) -> Dict[str, Path]:
+    """Generate (or reuse) the JSON scrape directory and lead CSV for one size"""
+    json_dir = data_dir / f'json_{size}_{seed}'
+    csv_file = data_dir / f'leads_{size}_{seed}.csv'
+
+    if not (json_dir / '.complete').exists():
+        print(f"🧪 Generating {size} scrape records...")
+        SyntheticLeadGenerator(seed).write_scrape_files(json_dir, size)
+        (json_dir / '.complete').touch()
+    if not csv_file.exists():
+        print(f"🧪 Generating {size} lead rows...")
+        partial = csv_file.with_suffix('.partial')
+        SyntheticLeadGenerator(seed).write_lead_csv(partial, size)
+        partial.rename(csv_file)
+
+    return {'convert': json_dir, 'dedup': csv_file}
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], tolerance: float) -> List[str]:
+    """Return a message for every metric that regressed past the tolerance"""
+    regressions = []
+    for name, metrics in results.items():
+        expected = baseline.get(name)
+        if not expected:
+            continue
+        for metric, higher_is_better in METRICS.items():
+            if metric not in expected or not expected[metric]:
+                continue
+            old, new = expected[metric], metrics[metric]
+            if higher_is_better and new < old * (1 - tolerance):
+                regressions.append(f"{name} {metric}: {new} < {old} (-{(1 - new / old):.0%})")
+            elif not higher_is_better and new > old * (1 + tolerance):
+                regressions.append(f"{name} {metric}: {new} > {old} (+{(new / old - 1):.0%})")
+    return regressions
+
+
+def report_changes(results: Dict[str, Dict], baseline: Dict[str, Dict]) -> None:
+    """Print how the reported-only metrics moved against the baseline"""
+    for name, metrics in results.items():
+        expected = baseline.get(name) or {}
+        for metric in REPORTED_METRICS:
+            old, new = expected.get(metric), metrics[metric]
+            if old is not None and new != old:
+                print(f"ℹ️  {name} {metric}: {old} -> {new}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the lead converter and deduplicator')
+    parser.add_argument('--sizes', default=','.join(str(size) for size in DEFAULT_SIZES),
+                        help='Comma-separated row counts (default: 1000,10000,100000,1000000)')
+    parser.add_argument('--stages', default='convert,dedup', help='Comma-separated stages to run')
+    parser.add_argument('--seed', type=int, default=42, help='Synthetic data seed')
+    parser.add_argument('--data-dir', help='Where generated inputs are cached (default: a temp directory)')
+    parser.add_argument('--baseline', default=str(DEFAULT_BASELINE), help='Baseline JSON file')
+    parser.add_argument('--update-baseline', action='store_true', help='Write the results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed relative regression (default: 0.25)')
+    parser.add_argument('--output', help='Also write the results JSON to this file')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    parser.add_argument('--child-input', help=argparse.SUPPRESS)
+    parser.add_argument('--child-work-dir', help=argparse.SUPPRESS)
+    parser.add_argument('--child-result', help=argparse.SUPPRESS)
+
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.child_input, args.child_work_dir, args.child_result)
+        return
+
+    sizes = [int(size) for size in args.sizes.split(',') if size.strip()]
+    stages = [stage.strip() for stage in args.stages.split(',') if stage.strip()]
+    for stage in stages:
+        if stage not in ('convert', 'dedup'):
+            parser.error(f"unknown stage: {stage}")
+
+    data_dir = Path(args.data_dir) if args.data_dir else Path(tempfile.gettempdir()) / 'ritterfinder_benchmarks'
+    data_dir.mkdir(parents=True, exist_ok=True)
+
+    print("🚀 Running lead benchmarks...")
+    results = {}
+    for size in sizes:
+        inputs = prepare_inputs(data_dir, size, args.seed)
+        for stage in stages:
+            with tempfile.TemporaryDirectory(prefix=f'bench_{stage}_') as work_dir:
+                metrics = measure(stage, inputs[stage], Path(work_dir))
+            name = f"{stage}:{size}"
+            results[name] = metrics
+            print(f"⏱️  {name}: {metrics['rows_per_sec']:,.0f} rows/sec, "
+                  f"{metrics['pairs_compared']} pairs, peak RSS {metrics['peak_rss_mb']} MB "
+                  f"({metrics['seconds']}s)")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    baseline_file = Path(args.baseline)
+    if args.update_baseline:
+        baseline = {}
+        if baseline_file.exists():
+            with open(baseline_file, 'r', encoding='utf-8') as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        with open(baseline_file, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"📄 Baseline updated: {baseline_file}")
+        return
+
+    if not baseline_file.exists():
+        print(f"❌ No baseline at {baseline_file}; run with --update-baseline to create one")
+        sys.exit(1)
+
+    with open(baseline_file, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+
+    report_changes(results, baseline)
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"❌ {len(regressions)} regressions past {args.tolerance:.0%} tolerance:")
+        for message in regressions:
+            print(f"   • {message}")
+        sys.exit(1)
+
+    print(f"✅ No regressions past {args.tolerance:.0%} tolerance")
+
+
+if __name__ == '__main__':
+    main()
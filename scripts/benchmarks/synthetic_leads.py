@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Synthetic Lead Generator for RitterFinder Benchmarks
+Produces realistic Axesor and Páginas Amarillas scrape JSON files and lead
+CSVs with a controlled size, duplicate rate, typo noise and mix of missing
+phones/websites. Output is fully determined by the seed.
+"""
+
+import argparse
+import csv
+import json
+import random
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+LEAD_HEADERS = [
+    'company_name', 'email', 'verified_email', 'phone', 'verified_phone',
+    'company_website', 'verified_website', 'address', 'state', 'country',
+    'activity', 'description', 'category', 'data_quality_score', 'created_at'
+]
+
+# (postal prefix, city) pairs weighted towards the big provinces
+CITIES = [
+    ('28', 'Madrid'), ('28', 'Madrid'), ('28', 'Alcalá de Henares'), ('08', 'Barcelona'),
+    ('08', 'Badalona'), ('46', 'Valencia'), ('41', 'Sevilla'), ('29', 'Málaga'),
+    ('48', 'Bilbao'), ('50', 'Zaragoza'), ('03', 'Alicante'), ('30', 'Murcia'),
+    ('36', 'Vigo'), ('15', 'A Coruña'), ('33', 'Oviedo'), ('18', 'Granada')
+]
+STREET_TYPES = ['Calle', 'Avenida', 'Plaza', 'Paseo', 'Camino', 'Ronda']
+STREET_ABBREVIATIONS = {'Calle': 'C/', 'Avenida': 'Avda.', 'Plaza': 'Pza.', 'Paseo': 'Pº'}
+STREET_NAMES = [
+    'Mayor', 'Alcalá', 'Gran Vía', 'de la Constitución', 'Real', 'del Sol', 'San Juan',
+    'de España', 'Nueva', 'del Carmen', 'de Goya', 'Serrano', 'Colón', 'de la Paz',
+    'Santa María', 'del Mar', 'Cervantes', 'de Andalucía', 'Castilla', 'del Pilar'
+]
+NAME_WORDS = [
+    'García', 'López', 'Martínez', 'Sánchez', 'Pérez', 'Gómez', 'Ruiz', 'Hernández',
+    'Díaz', 'Moreno', 'Álvarez', 'Romero', 'Navarro', 'Torres', 'Domínguez', 'Vázquez',
+    'Central', 'Norte', 'Sur', 'Plaza', 'Sol', 'Luna', 'Mar', 'Imperial', 'Real',
+    'Nueva', 'Moderna', 'Europa', 'Atlántico', 'Mediterráneo', 'Castilla', 'Ibérica'
+]
+# Brand names are built from these so large runs do not collapse onto a few names
+SYLLABLES = [
+    'al', 'ba', 'be', 'bo', 'ca', 'ce', 'co', 'da', 'de', 'do', 'fa', 'fe', 'ga', 'go', 'la',
+    'le', 'lo', 'lu', 'ma', 'me', 'mi', 'mo', 'na', 'ne', 'no', 'pa', 'pe', 'ra', 're', 'ri',
+    'ro', 'sa', 'se', 'so', 'ta', 'te', 'to', 'va', 've', 'za', 'ria', 'nza', 'rco', 'lla'
+]
+PA_CATEGORIES = {
+    'farmacias': ('Farmacia', 'Farmacias'),
+    'restaurantes': ('Restaurante', 'Restaurantes'),
+    'bares': ('Bar', 'Bares'),
+    'dentistas': ('Clínica Dental', 'Dentistas'),
+    'peluquerias': ('Peluquería', 'Peluquerías'),
+    'talleres': ('Talleres', 'Talleres de automóviles'),
+    'gestorias': ('Gestoría', 'Gestorías'),
+    'veterinarios': ('Clínica Veterinaria', 'Veterinarios')
+}
+LEGAL_SUFFIXES = ['', '', '', ' SL', ' S.L.', ' SA', ' S.A.', ' SLU']
+CNAE_CODES = [
+    '4711 - Comercio al por menor', '5610 - Restaurantes', '6920 - Actividades de contabilidad',
+    '4520 - Mantenimiento de vehículos', '8623 - Actividades odontológicas', '4773 - Farmacias'
+]
+
+
+class SyntheticLeadGenerator:
+    """Generates scrape records and lead rows with injected near-duplicates"""
+
+    def __init__(self, seed: int = 42, duplicate_rate: float = 0.2, typo_rate: float = 0.3,
+                 missing_phone_rate: float = 0.4, missing_website_rate: float = 0.6):
+        self.random = random.Random(seed)
+        self.duplicate_rate = duplicate_rate
+        self.typo_rate = typo_rate
+        self.missing_phone_rate = missing_phone_rate
+        self.missing_website_rate = missing_website_rate
+
+    def typo(self, text: str) -> str:
+        """Apply one realistic typo (substitution, deletion, transposition or case change)"""
+        if len(text) < 4 or self.random.random() >= self.typo_rate:
+            return text
+
+        position = self.random.randrange(1, len(text) - 1)
+        kind = self.random.randrange(4)
+        if kind == 0:
+            return text[:position] + self.random.choice('aeiourstln') + text[position + 1:]
+        if kind == 1:
+            return text[:position] + text[position + 1:]
+        if kind == 2:
+            return text[:position - 1] + text[position] + text[position - 1] + text[position + 1:]
+        return text.upper() if self.random.random() < 0.5 else text.title()
+
+    def business(self, prefix: str) -> Dict[str, Any]:
+        """A fresh business with a name, address and contact details"""
+        rng = self.random
+        postal_prefix, city = rng.choice(CITIES)
+        street_type = rng.choice(STREET_TYPES)
+        words = ' '.join(rng.choice(NAME_WORDS) for _ in range(rng.randint(0, 2)))
+        brand = ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3))).title()
+        name = ' '.join(part for part in (prefix, brand, words) if part) + rng.choice(LEGAL_SUFFIXES)
+
+        phone = None
+        if rng.random() >= self.missing_phone_rate:
+            phone = f"{rng.choice('69')}{rng.randint(10000000, 99999999)}"
+
+        website = None
+        if rng.random() >= self.missing_website_rate:
+            slug = ''.join(ch for ch in f"{brand}{words}".lower() if ch.isalnum())[:16]
+            website = f"www.{slug}{rng.randint(1, 9999)}.{rng.choice(['es', 'com'])}"
+
+        return {
+            'name': name,
+            'street_type': street_type,
+            'street': rng.choice(STREET_NAMES),
+            'number': rng.randint(1, 250),
+            'postal_code': f"{postal_prefix}{rng.randint(0, 999):03d}",
+            'city': city,
+            'phone': phone,
+            'website': website
+        }
+
+    def variant(self, business: Dict[str, Any]) -> Dict[str, Any]:
+        """A near-duplicate listing of the same business"""
+        rng = self.random
+        copy = dict(business)
+        copy['name'] = self.typo(copy['name'])
+        if rng.random() < 0.5:
+            copy['street_type'] = STREET_ABBREVIATIONS.get(copy['street_type'], copy['street_type'])
+        if rng.random() < 0.3:
+            copy['street'] = self.typo(copy['street'])
+        if copy['phone'] and rng.random() < 0.2:
+            copy['phone'] = None
+        if copy['website'] and rng.random() < 0.3:
+            copy['website'] = f"https://{copy['website']}/"
+        return copy
+
+    def businesses(self, count: int, prefix: str = '') -> Iterator[Dict[str, Any]]:
+        """Yield count listings, duplicate_rate of which repeat an earlier one"""
+        seen: List[Dict[str, Any]] = []
+        for _ in range(count):
+            if seen and self.random.random() < self.duplicate_rate:
+                yield self.variant(self.random.choice(seen))
+                continue
+
+            business = self.business(prefix)
+            # Keep a bounded pool so memory stays flat for large counts
+            if len(seen) < 100000:
+                seen.append(business)
+            else:
+                seen[self.random.randrange(len(seen))] = business
+            yield business
+
+    @staticmethod
+    def address(business: Dict[str, Any]) -> str:
+        return (f"{business['street_type']} {business['street']}, {business['number']}, "
+                f"{business['postal_code']} {business['city']}")
+
+    def paginas_amarillas_record(self, business: Dict[str, Any], activity: str) -> Dict[str, Any]:
+        return {
+            'nombre': f"{business['name']}\n{business['city']}",
+            'telefono': f"+34 {business['phone']}" if business['phone'] else 'N/A',
+            'website': business['website'] or 'N/A',
+            'direccion': self.address(business),
+            'actividades': activity,
+            'descripcion': self.random.choice(['', f"{activity} en {business['city']}"])
+        }
+
+    def axesor_record(self, business: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            'nombre': business['name'],
+            'cif': f"B{self.random.randint(10000000, 99999999)}",
+            'cnae': self.random.choice(CNAE_CODES),
+            'direccion': f"{self.address(business)} Ver mapa si la empresa tiene delegaciones",
+            'objeto_social': self.random.choice(['', 'Comercio al por menor', 'Prestación de servicios'])
+        }
+
+    def lead_row(self, business: Dict[str, Any], category: str) -> Dict[str, str]:
+        """A row as written by convert-json-to-csv.py"""
+        phone = f"+34{business['phone']}" if business['phone'] else ''
+        website = business['website'] or ''
+        if website and not website.startswith('http'):
+            website = f"https://{website}"
+        description = self.random.choice(['', f"{category} en {business['city']}"])
+        score = 1 + bool(phone) + bool(website) + bool(description)
+
+        return {
+            'company_name': business['name'],
+            'email': '',
+            'verified_email': 'False',
+            'phone': phone,
+            'verified_phone': str(bool(phone)),
+            'company_website': website,
+            'verified_website': str(bool(website)),
+            'address': self.address(business),
+            'state': '',
+            'country': 'España',
+            'activity': category,
+            'description': description,
+            'category': category,
+            'data_quality_score': str(score),
+            'created_at': '2024-01-01T00:00:00'
+        }
+
+    def write_lead_csv(self, output_file: Path, rows: int) -> None:
+        """Write a lead CSV with rows leads across the PA categories"""
+        categories = [label for _, label in PA_CATEGORIES.values()]
+        with open(output_file, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=LEAD_HEADERS)
+            writer.writeheader()
+            for business in self.businesses(rows):
+                writer.writerow(self.lead_row(business, self.random.choice(categories)))
+
+    def write_scrape_files(self, output_dir: Path, rows: int, axesor_share: float = 0.2) -> None:
+        """Write PA category files and Axesor files totalling rows records"""
+        output_dir.mkdir(parents=True, exist_ok=True)
+        axesor_rows = int(rows * axesor_share)
+        per_category = (rows - axesor_rows) // len(PA_CATEGORIES)
+
+        for code, (prefix, activity) in PA_CATEGORIES.items():
+            records = (self.paginas_amarillas_record(business, activity)
+                       for business in self.businesses(per_category, prefix))
+            write_json_array(output_dir / f"pa_{code}_20240101.json", records)
+
+        records = (self.axesor_record(business) for business in self.businesses(axesor_rows))
+        write_json_array(output_dir / "axesor_empresas_20240101.json", records)
+
+
+def write_json_array(output_file: Path, records: Iterator[Dict[str, Any]]) -> None:
+    """Write a JSON array one element at a time"""
+    with open(output_file, 'w', encoding='utf-8') as f:
+        f.write('[\n')
+        for i, record in enumerate(records):
+            if i:
+                f.write(',\n')
+            f.write(json.dumps(record, ensure_ascii=False))
+        f.write('\n]\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate synthetic RitterFinder scrape files and lead CSVs')
+    parser.add_argument('--rows', type=int, default=10000, help='Number of leads/records to generate')
+    parser.add_argument('--csv', help='Write a lead CSV to this file')
+    parser.add_argument('--json-dir', help='Write Axesor/Páginas Amarillas JSON files to this directory')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed')
+    parser.add_argument('--duplicate-rate', type=float, default=0.2, help='Share of rows repeating an earlier business')
+    parser.add_argument('--typo-rate', type=float, default=0.3, help='Chance a duplicate gets a typo per field')
+    parser.add_argument('--missing-phone-rate', type=float, default=0.4, help='Share of businesses without phone')
+    parser.add_argument('--missing-website-rate', type=float, default=0.6, help='Share of businesses without website')
+
+    args = parser.parse_args()
+    if not args.csv and not args.json_dir:
+        parser.error('give --csv and/or --json-dir')
+
+    def generator() -> SyntheticLeadGenerator:
+        return SyntheticLeadGenerator(args.seed, args.duplicate_rate, args.typo_rate,
+                                      args.missing_phone_rate, args.missing_website_rate)
+
+    if args.csv:
+        generator().write_lead_csv(Path(args.csv), args.rows)
+        print(f"✅ Wrote {args.rows} leads to {args.csv}")
+    if args.json_dir:
+        generator().write_scrape_files(Path(args.json_dir), args.rows)
+        print(f"✅ Wrote scrape files for {args.rows} records to {args.json_dir}")
+
+
+if __name__ == '__main__':
+    main()
@@ -2,18 +2,30 @@
 """
 JSON to CSV Converter for RitterFinder Leads
 Converts JSON files from Axesor and Páginas Amarillas to CSV format
-matching the leads table structure.
+matching the leads table structure. Scrape files may be JSON arrays or
+JSON Lines (.jsonl/.ndjson) and are read one record at a time.
 """
 
-import json
 import csv
+import io
 import os
 import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from itertools import islice
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List, Any, Optional
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 import argparse
 
+from lead_csv_writers import CsvWriterPool, concatenate_csv
+from lead_json_stream import JSON_SUFFIXES, iter_json_records
+from lead_manifest import CACHE_DIR_NAME, ConversionManifest
+from lead_metrics import RunMetrics
+from lead_normalizer import clean_phone, clean_website
+from lead_provinces import resolve_province
+
 class LeadConverter:
     def __init__(self, input_dir: str, output_dir: str):
         self.input_dir = Path(input_dir)
@@ -39,6 +51,18 @@ class LeadConverter:
             'created_at'
         ]
         
+        # Worker processes converting whole files (1 converts in-process)
+        self.workers = 1
+        
+        # Cache CSVs kept open at once while streaming leads to them
+        self.max_open_files = 64
+        
+        # Reconvert every file instead of reusing unchanged ones (--full)
+        self.full_rebuild = False
+        
+        # Stage timings and counters (--metrics, --profile)
+        self.metrics = RunMetrics()
+        
     def identify_format(self, data: Dict[str, Any]) -> str:
         """Identify if data is from Axesor or Páginas Amarillas format"""
         if 'cif' in data and 'cnae' in data:
@@ -50,60 +74,17 @@ class LeadConverter:
     
     def clean_phone(self, phone: str) -> Optional[str]:
         """Clean and format phone number"""
-        if not phone or phone.upper() == 'N/A':
-            return None
-        
-        # Remove common prefixes and clean
-        phone = re.sub(r'^\+34', '', phone.strip())
-        phone = re.sub(r'[^\d]', '', phone)
-        
-        # Spanish phone validation (9 digits)
-        if len(phone) == 9 and phone[0] in '6789':
-            return f"+34{phone}"
-        
-        return phone if phone else None
+        self.metrics.count('normalizations')
+        return clean_phone(phone)
     
     def clean_website(self, website: str) -> Optional[str]:
         """Clean and validate website URL"""
-        if not website or website.upper() == 'N/A':
-            return None
-            
-        website = website.strip()
-        if not website.startswith(('http://', 'https://')):
-            website = f"https://{website}"
-            
-        # Remove UTM parameters
-        website = re.sub(r'\?utm_.*$', '', website)
-        
-        return website
+        self.metrics.count('normalizations')
+        return clean_website(website)
     
     def extract_location_info(self, address: str) -> tuple:
-        """Extract state and country from address"""
-        if not address:
-            return None, 'España'
-        
-        # Common Spanish provinces/regions
-        provinces = [
-            'MADRID', 'BARCELONA', 'VALENCIA', 'SEVILLA', 'BILBAO', 
-            'ZARAGOZA', 'ALICANTE', 'MÁLAGA', 'MURCIA', 'CÓRDOBA',
-            'VALLADOLID', 'VIGO', 'GIJÓN', 'HOSPITALET', 'VITORIA',
-            'LA CORUÑA', 'GRANADA', 'ELCHE', 'OVIEDO', 'BADALONA'
-        ]
-        
-        address_upper = address.upper()
-        for province in provinces:
-            if province in address_upper:
-                return province.title(), 'España'
-        
-        # Try to extract from postal code pattern
-        postal_match = re.search(r'(\d{5})', address)
-        if postal_match:
-            postal_code = postal_match.group(1)
-            # Madrid postal codes start with 28
-            if postal_code.startswith('28'):
-                return 'Madrid', 'España'
-        
-        return None, 'España'
+        """Extract state (the province, by postal code or place name) and country from address"""
+        return resolve_province(address), 'España'
     
     def calculate_quality_score(self, lead: Dict[str, Any]) -> int:
         """Calculate data quality score (1-5)"""
@@ -199,7 +180,7 @@ class LeadConverter:
     def extract_category_from_filename(self, filename: str) -> str:
         """Extract category from filename"""
         # Remove extension and timestamp
-        name_parts = filename.replace('.json', '').split('_')
+        name_parts = Path(filename).stem.split('_')
         
         if filename.startswith('axesor'):
             return 'Empresas Axesor'
@@ -248,47 +229,120 @@ class LeadConverter:
         
         return 'General'
     
-    def process_json_file(self, file_path: Path) -> List[Dict[str, Any]]:
-        """Process a single JSON file and return list of leads"""
+    def process_json_file(self, file_path: Path) -> Iterator[Dict[str, Any]]:
+        """Convert a single JSON or JSON Lines file, yielding leads as records are read"""
+        self.metrics.count('files')
+        category = self.extract_category_from_filename(file_path.name)
+        
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            # Handle both single objects and arrays
-            if isinstance(data, dict):
-                data = [data]
-            elif not isinstance(data, list):
-                print(f"⚠️  Warning: Unexpected data format in {file_path}")
-                return []
-            
-            leads = []
-            category = self.extract_category_from_filename(file_path.name)
-            
-            for item in data:
-                if not isinstance(item, dict):
-                    continue
+            # Records are decoded one at a time, so parsing and conversion share one stage
+            with self.metrics.stage('convert'):
+                for item in iter_json_records(file_path):
+                    self.metrics.count('records')
+                    if not isinstance(item, dict):
+                        continue
+                        
+                    format_type = self.identify_format(item)
                     
-                format_type = self.identify_format(item)
-                
-                if format_type == 'axesor':
-                    lead = self.convert_axesor_lead(item, category)
-                elif format_type == 'paginas_amarillas':
-                    lead = self.convert_paginas_amarillas_lead(item, category)
-                else:
-                    print(f"⚠️  Unknown format in {file_path}: {item}")
-                    continue
-                
-                # Skip if no company name
-                if not lead.get('company_name'):
-                    continue
+                    if format_type == 'axesor':
+                        lead = self.convert_axesor_lead(item, category)
+                    elif format_type == 'paginas_amarillas':
+                        lead = self.convert_paginas_amarillas_lead(item, category)
+                    else:
+                        print(f"⚠️  Unknown format in {file_path}: {item}")
+                        self.metrics.count('unknown_records')
+                        continue
                     
-                leads.append(lead)
-            
-            return leads
+                    # Skip if no company name
+                    if not lead.get('company_name'):
+                        self.metrics.count('skipped_records')
+                        continue
+                    
+                    self.metrics.count('leads')
+                    yield lead
             
         except Exception as e:
+            # Leads read before the error have already been yielded
             print(f"❌ Error processing {file_path}: {str(e)}")
-            return []
+            self.metrics.count('failed_files')
+    
+    def safe_category_name(self, category: str) -> str:
+        """Create a safe, lowercase filename fragment for a category"""
+        safe_category = re.sub(r'[^\w\s-]', '', category)
+        safe_category = re.sub(r'[-\s]+', '_', safe_category)
+        return safe_category.lower()
+    
+    def category_file(self, category: str) -> Path:
+        return self.output_dir / f"leads_{self.safe_category_name(category)}.csv"
+    
+    def find_json_files(self) -> List[Path]:
+        """List the scrape files to convert (JSON arrays and JSON Lines)"""
+        json_files = []
+        for suffix in JSON_SUFFIXES:
+            json_files.extend(self.input_dir.glob(f'*{suffix}'))
+        return json_files
+    
+    def write_cache_file(self, json_file: Path, cache_file: Path, writers: CsvWriterPool) -> int:
+        """Convert a file straight into its cache CSV and return the leads written"""
+        for lead in self.process_json_file(json_file):
+            writers.writerow(cache_file, [lead.get(header, '') for header in self.csv_headers])
+        return writers.rows.get(cache_file, 0)
+    
+    def convert_files(self, json_files: List[Path], manifest: ConversionManifest,
+                      writers: CsvWriterPool) -> Iterator[Tuple[Path, int, bool]]:
+        """Convert each file into its cache CSV, in file order; yield it with its lead count and whether it failed
+        
+        Workers write the cache CSVs of whole files themselves and send back
+        only counts and messages, at most two files per worker ahead of the
+        file being reported.
+        """
+        if self.workers <= 1:
+            for json_file in json_files:
+                print(f"📄 Processing {json_file.name}...")
+                failed_before = self.metrics.counters.get('failed_files', 0)
+                leads = self.write_cache_file(json_file, manifest.cache_file(json_file.name), writers)
+                yield json_file, leads, self.metrics.counters.get('failed_files', 0) > failed_before
+            return
+        
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                 initargs=(str(self.input_dir), str(self.output_dir))) as pool:
+            def submit(json_file: Path):
+                return json_file, pool.submit(_convert_file, json_file, manifest.cache_file(json_file.name))
+            
+            files = iter(json_files)
+            pending = deque(submit(json_file) for json_file in islice(files, 2 * self.workers))
+            
+            while pending:
+                json_file, future = pending.popleft()
+                for next_file in islice(files, 1):
+                    pending.append(submit(next_file))
+                
+                try:
+                    leads, output, counters = future.result()
+                except Exception as e:
+                    # e.g. a worker process died; reported like any other failed file
+                    leads, output, counters = 0, f"❌ Error processing {json_file}: {str(e)}\n", {'failed_files': 1}
+                
+                # Worker messages are replayed in file order
+                print(f"📄 Processing {json_file.name}...")
+                print(output, end='')
+                for name, value in counters.items():
+                    self.metrics.count(name, value)
+                yield json_file, leads, bool(counters.get('failed_files'))
+    
+    def iter_leads(self) -> Iterator[Dict[str, Any]]:
+        """Yield converted leads file by file, without writing any CSV"""
+        for json_file in self.find_json_files():
+            print(f"📄 Processing {json_file.name}...")
+            yield from self.process_json_file(json_file)
+    
+    def to_csv_row(self, lead: Dict[str, Any]) -> Dict[str, str]:
+        """Render a lead exactly as it reads back from the written CSV"""
+        row = {}
+        for header in self.csv_headers:
+            value = lead.get(header, '')
+            row[header] = '' if value is None else str(value)
+        return row
     
     def write_csv(self, leads: List[Dict[str, Any]], output_file: Path):
         """Write leads to CSV file"""
@@ -297,7 +351,7 @@ class LeadConverter:
             return
             
         try:
-            with open(output_file, 'w', newline='', encoding='utf-8') as f:
+            with self.metrics.stage('write_csv'), open(output_file, 'w', newline='', encoding='utf-8') as f:
                 writer = csv.DictWriter(f, fieldnames=self.csv_headers)
                 writer.writeheader()
                 
@@ -316,7 +370,7 @@ class LeadConverter:
         print("🚀 Starting JSON to CSV conversion...")
         
         # Find all JSON files
-        json_files = list(self.input_dir.glob('*.json'))
+        json_files = self.find_json_files()
         
         if not json_files:
             print(f"❌ No JSON files found in {self.input_dir}")
@@ -324,57 +378,113 @@ class LeadConverter:
         
         print(f"📁 Found {len(json_files)} JSON files")
         
-        # Group leads by category
-        leads_by_category = {}
+        # Only files that changed since the last run are parsed again
+        manifest = ConversionManifest(self.output_dir / CACHE_DIR_NAME, self.csv_headers)
+        if self.full_rebuild:
+            manifest.clear()
         
+        lead_counts = {}
+        fingerprints = {}
         for json_file in json_files:
-            print(f"📄 Processing {json_file.name}...")
-            
-            leads = self.process_json_file(json_file)
+            unchanged, fingerprints[json_file.name] = manifest.check(json_file)
+            if unchanged:
+                lead_counts[json_file.name] = manifest.leads(json_file.name)
+                print(f"♻️  Unchanged {json_file.name}, reusing {lead_counts[json_file.name]} cached leads")
+                self.metrics.count('unchanged_files')
+        
+        changed_files = [json_file for json_file in json_files if json_file.name not in lead_counts]
+        affected = {entry['category'] for entry in manifest.forget_missing([f.name for f in json_files])}
+        for json_file in changed_files:
+            manifest.forget(json_file.name)
+        
+        # Converted leads go straight to a per-file cache CSV; only row counts stay in memory
+        with CsvWriterPool(self.csv_headers, self.max_open_files) as writers, self.metrics.profile():
+            for json_file, leads, failed in self.convert_files(changed_files, manifest, writers):
+                category = self.extract_category_from_filename(json_file.name)
+                affected.add(category)
+                lead_counts[json_file.name] = leads
+                # A file that failed part-way is converted again next run
+                if not failed:
+                    manifest.record(json_file.name, fingerprints[json_file.name], category, leads)
+        
+        # Each file feeds exactly one category; categories keep first-seen order
+        category_sources = {}
+        for json_file in json_files:
+            if lead_counts.get(json_file.name):
+                category = self.extract_category_from_filename(json_file.name)
+                category_sources.setdefault(category, []).append(json_file.name)
+        
+        print(f"\n📊 Creating CSV files for {len(category_sources)} categories...")
+        rebuilt = False
+        with self.metrics.stage('write_csv'):
+            for category, names in category_sources.items():
+                output_file = self.category_file(category)
+                category_leads = sum(lead_counts[name] for name in names)
+                if category in affected or not output_file.exists():
+                    concatenate_csv([manifest.cache_file(name) for name in names], output_file)
+                    rebuilt = True
+                    print(f"✅ Created {output_file} with {category_leads} leads")
+                else:
+                    print(f"♻️  Reused {output_file} with {category_leads} leads")
             
-            if not leads:
-                continue
-                
-            # Group by category
-            for lead in leads:
-                category = lead['category']
-                if category not in leads_by_category:
-                    leads_by_category[category] = []
-                leads_by_category[category].append(lead)
-        
-        # Write CSV files by category
-        print(f"\n📊 Creating CSV files for {len(leads_by_category)} categories...")
-        
-        for category, leads in leads_by_category.items():
-            # Create safe filename
-            safe_category = re.sub(r'[^\w\s-]', '', category)
-            safe_category = re.sub(r'[-\s]+', '_', safe_category)
+            for category in affected - set(category_sources):
+                # No leads left in this category
+                self.category_file(category).unlink(missing_ok=True)
+                rebuilt = True
             
-            output_file = self.output_dir / f"leads_{safe_category.lower()}.csv"
-            self.write_csv(leads, output_file)
+            # The combined CSV lists leads grouped by category, in first-seen order,
+            # which is the category files one after the other
+            total_leads = sum(lead_counts.values())
+            combined_file = self.output_dir / "leads_combined.csv"
+            if total_leads and (rebuilt or not combined_file.exists()):
+                concatenate_csv([self.category_file(category) for category in category_sources], combined_file)
+                print(f"✅ Created {combined_file} with {total_leads} leads")
+            elif total_leads:
+                print(f"♻️  Reused {combined_file} with {total_leads} leads")
+            else:
+                combined_file.unlink(missing_ok=True)
         
-        # Create combined CSV
-        all_leads = []
-        for leads in leads_by_category.values():
-            all_leads.extend(leads)
+        manifest.save()
         
-        if all_leads:
-            combined_file = self.output_dir / "leads_combined.csv"
-            self.write_csv(all_leads, combined_file)
-            
         print(f"\n🎉 Conversion completed!")
-        print(f"📈 Total leads processed: {len(all_leads)}")
+        print(f"📈 Total leads processed: {total_leads}")
         print(f"📂 Output directory: {self.output_dir}")
 
+# Per-process converter of pool workers, set once by the pool initializer
+_worker_converter: Optional[LeadConverter] = None
+
+def _init_worker(input_dir: str, output_dir: str) -> None:
+    global _worker_converter
+    _worker_converter = LeadConverter(input_dir, output_dir)
+
+def _convert_file(file_path: Path, cache_file: Path) -> Tuple[int, str, Dict[str, int]]:
+    """Convert one file into its cache CSV inside a worker process: lead count, printed messages and counters"""
+    _worker_converter.metrics = RunMetrics()
+    output = io.StringIO()
+    with redirect_stdout(output), CsvWriterPool(_worker_converter.csv_headers, 1) as writers:
+        leads = _worker_converter.write_cache_file(file_path, cache_file, writers)
+    return leads, output.getvalue(), _worker_converter.metrics.counters
+
 def main():
     parser = argparse.ArgumentParser(description='Convert JSON leads to CSV format')
     parser.add_argument('--input', '-i', default='models/fvOdGZZZ', help='Input directory with JSON files')
     parser.add_argument('--output', '-o', default='output/csv', help='Output directory for CSV files')
+    parser.add_argument('--workers', type=int, default=1, help='Worker processes converting files (default: 1)')
+    parser.add_argument('--full', action='store_true',
+                        help='Reconvert every file instead of reusing the cached leads of unchanged ones')
+    parser.add_argument('--metrics', metavar='FILE',
+                        help='Write per-stage timings, peak memory and counters as JSON (traces memory, slower)')
+    parser.add_argument('--profile', metavar='FILE', help='Write a cProfile dump of the file conversion loop')
     
     args = parser.parse_args()
     
     converter = LeadConverter(args.input, args.output)
+    converter.workers = args.workers
+    converter.full_rebuild = args.full
+    converter.metrics = RunMetrics(trace_memory=bool(args.metrics), profile_file=args.profile)
+    converter.metrics.start()
     converter.convert_all()
+    converter.metrics.write(args.metrics)
 
 if __name__ == '__main__':
     main() 
\ No newline at end of file
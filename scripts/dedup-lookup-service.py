@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Dedup Lookup Service for RitterFinder
+Resident HTTP service that answers duplicate checks for the admin lead
+import against a persistent dedup index (deduplicate-leads.py --against
+INDEX_DIR builds and extends one). The index is loaded into memory once at
+startup; accepted leads are added to it as they come in, on disk as well,
+so later batch runs see them too.
+
+Endpoints (JSON bodies, leads use the lead CSV / LeadData field names):
+  POST /lookup  {"leads": [{...}, ...]}
+                -> {"results": [{"duplicate": true, "row_id": 12, "reason": "...",
+                                 "match": {...}} | {"duplicate": false}, ...]}
+  POST /leads   {"leads": [{...}, ...]}  -> {"row_ids": [...]}
+  GET  /health  -> index size and lookup counters
+
+Usage:
+  python3 dedup-lookup-service.py output/index --port 8765
+"""
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Tuple
+
+from lead_index import CORPUS_COLUMNS, LeadIndex
+from lead_lookup import MemoryLeadIndex
+from lead_matching import PairScorer
+from lead_normalizer import build_features
+from lead_similarity import SIMILARITY_BACKENDS
+
+# Requests larger than this are rejected rather than read
+MAX_BODY_SIZE = 16 * 1024 * 1024
+
+
+class LookupService:
+    """Duplicate checks and inserts against an in-memory lead index"""
+
+    def __init__(self, index: MemoryLeadIndex, scorer: PairScorer):
+        self.index = index
+        self.scorer = scorer
+        # The index is shared by the request threads
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.lookup_seconds = 0.0
+
+    def describe(self, row_id: int) -> Dict[str, str]:
+        """Normalized fields of an indexed lead, enough to tell which lead it is"""
+        features = self.index.features[row_id]
+        return {
+            'name': features.name,
+            'phone': features.phone,
+            'website': features.website,
+            'email': features.email,
+            'cif': features.cif
+        }
+
+    def lookup(self, leads: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        results = []
+        started = time.perf_counter()
+        with self.lock:
+            for lead in leads:
+                match = self.index.find_duplicate(build_features(-1, lead), self.scorer)
+                if match:
+                    row_id, reason = match
+                    results.append({'duplicate': True, 'row_id': row_id, 'reason': reason,
+                                    'match': self.describe(row_id)})
+                else:
+                    results.append({'duplicate': False})
+            self.requests += 1
+            self.lookup_seconds += time.perf_counter() - started
+        return results
+
+    def insert(self, leads: List[Dict[str, Any]]) -> List[int]:
+        with self.lock:
+            row_ids = [self.index.add(build_features(-1, lead)) for lead in leads]
+            # A new corpus gets the lead CSV columns, then any other field the leads have
+            fieldnames = list(CORPUS_COLUMNS)
+            for lead in leads:
+                fieldnames.extend(key for key in lead if key not in fieldnames)
+            self.index.index.append_corpus(fieldnames,
+                                           [{key: '' if value is None else str(value) for key, value in lead.items()}
+                                            for lead in leads])
+            self.index.index.commit()
+            self.requests += 1
+        return row_ids
+
+    def health(self) -> Dict[str, Any]:
+        with self.lock:
+            return {'leads': len(self.index), 'requests': self.requests,
+                    'lookup_seconds': round(self.lookup_seconds, 6), **self.index.stats}
+
+
+class LookupHandler(BaseHTTPRequestHandler):
+    """JSON-over-HTTP front end of a LookupService (server.service)"""
+
+    # Keep-alive, so a client pays the connection setup once
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out in separate writes; without TCP_NODELAY the
+    # body waits for the client's delayed ACK (~40 ms)
+    disable_nagle_algorithm = True
+
+    def send_json(self, status: int, payload: Dict[str, Any]) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def read_leads(self) -> Tuple[List[Dict[str, Any]], str]:
+        """Return the request's leads, or an error message"""
+        try:
+            length = int(self.headers.get('Content-Length', '0'))
+        except ValueError:
+            return [], 'invalid Content-Length'
+        if length > MAX_BODY_SIZE:
+            return [], 'request body too large'
+
+        try:
+            payload = json.loads(self.rfile.read(length) or b'{}')
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
+            return [], f"invalid JSON: {e}"
+
+        leads = payload.get('leads') if isinstance(payload, dict) else None
+        if not isinstance(leads, list) or not all(isinstance(lead, dict) for lead in leads):
+            return [], 'expected {"leads": [{...}, ...]}'
+        return leads, ''
+
+    def do_POST(self) -> None:
+        if self.path not in ('/lookup', '/leads'):
+            self.send_json(404, {'error': f"unknown endpoint {self.path}"})
+            return
+
+        leads, error = self.read_leads()
+        if error:
+            self.send_json(400, {'error': error})
+            return
+
+        service = self.server.service
+        if self.path == '/lookup':
+            self.send_json(200, {'results': service.lookup(leads)})
+        else:
+            self.send_json(200, {'row_ids': service.insert(leads)})
+
+    def do_GET(self) -> None:
+        if self.path == '/health':
+            self.send_json(200, self.server.service.health())
+        else:
+            self.send_json(404, {'error': f"unknown endpoint {self.path}"})
+
+    def log_message(self, format: str, *args) -> None:
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve duplicate checks against a persistent dedup index')
+    parser.add_argument('index_dir', help='Dedup index directory (created by deduplicate-leads.py --against)')
+    parser.add_argument('--host', default='127.0.0.1', help='Address to listen on (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8765, help='Port to listen on (default: 8765)')
+    parser.add_argument('--name-threshold', type=float,
+                        help='Name similarity threshold (0.0-1.0, default: that of the last batch run, else 0.85)')
+    parser.add_argument('--address-threshold', type=float,
+                        help='Address similarity threshold (0.0-1.0, default: that of the last batch run, else 0.80)')
+    parser.add_argument('--similarity', choices=SIMILARITY_BACKENDS,
+                        help='Similarity backend (default: that of the last batch run, else sequence, '
+                             'which reproduces the historical SequenceMatcher scores)')
+    parser.add_argument('--verbose', action='store_true', help='Log every request')
+
+    args = parser.parse_args()
+
+    print(f"🗂️  Loading index {args.index_dir}...")
+    started = time.perf_counter()
+    # Request threads share the SQLite connection, always under the service lock
+    index = LeadIndex(args.index_dir, threaded=True)
+    memory_index = MemoryLeadIndex(index)
+    print(f"✅ Loaded {len(memory_index)} leads and {len(memory_index.blocks)} blocking keys "
+          f"in {time.perf_counter() - started:.1f}s")
+
+    # Score as deduplicate-leads.py --against last did, unless told otherwise
+    name_threshold, address_threshold, very_similar_threshold, backend, geo_radius = \
+        index.scorer_settings() or PairScorer().settings()
+    scorer = PairScorer(
+        name_threshold if args.name_threshold is None else args.name_threshold,
+        address_threshold if args.address_threshold is None else args.address_threshold,
+        very_similar_threshold,
+        args.similarity or backend,
+        geo_radius
+    )
+    print(f"⚖️  Scoring with name {scorer.name_threshold}, address {scorer.address_threshold}, "
+          f"very similar name {scorer.very_similar_name_threshold}, {scorer.engine.backend} similarity")
+    server = ThreadingHTTPServer((args.host, args.port), LookupHandler)
+    server.daemon_threads = True
+    server.service = LookupService(memory_index, scorer)
+    server.verbose = args.verbose
+
+    print(f"🚀 Dedup lookup service listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        index.close()
+        print(f"\n🛑 Stopped after {server.service.requests} requests "
+              f"({memory_index.stats['added']} leads added)")
+
+if __name__ == '__main__':
+    main()
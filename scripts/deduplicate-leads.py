@@ -5,12 +5,34 @@ Detects and removes duplicate leads from CSV files using intelligent matching
 """
 
 import csv
-import re
 import argparse
+import math
+from array import array
+from collections import deque
+from itertools import islice
 from pathlib import Path
-from typing import Dict, List, Tuple, Set
-from difflib import SequenceMatcher
-import hashlib
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from lead_blocking import BLOCKING_STRATEGIES, DEFAULT_STRATEGIES, CandidateBlocker
+from lead_checkpoint import Checkpoint
+from lead_cluster_output import ClusterWriter, build_member
+from lead_csv_rows import CsvRowIndex
+from lead_clustering import EXACT_KEYS, DisjointSet, ExactKeyJoiner
+from lead_index import LeadIndex
+from lead_geo import PostalGeocoder
+from lead_normalizer import (LeadFeatures, build_features, normalize_phone, normalize_street, normalize_text,
+                             normalize_website)
+from lead_matching import PairScorer, ParallelPairScorer
+from lead_metrics import RunMetrics
+from lead_similarity import SIMILARITY_BACKENDS, char_bag
+from lead_spill import EdgeSpill, KeySpill, PartitionedSpill, parse_memory_limit
+from lead_store import LeadStore
+from lead_vectorized import HAS_NUMPY, VectorPrefilter
+
+# Columns read into memory from an input file: what matching, scoring and the
+# report use. Output rows are copied from the input file with every column.
+LOADED_COLUMNS = ['company_name', 'address', 'state', 'phone', 'company_website', 'email', 'cif',
+                  'description', 'data_quality_score']
 
 class LeadDeduplicator:
     def __init__(self, input_file: str, output_file: str = None, report_file: str = None):
@@ -23,8 +45,67 @@ class LeadDeduplicator:
         self.address_similarity_threshold = 0.80
         self.phone_exact_match = True
         self.website_similarity_threshold = 0.90
+        self.very_similar_name_threshold = 0.95
+        self.similarity_backend = 'sequence'
+        
+        # Offline geo proximity (--geo-radius): street types spelled out, leads
+        # placed by postal code (else coarsely by capital or province), pairs
+        # certainly farther apart than the radius rejected
+        self.geo_radius = None
+        self.postal_centroids = None
+        self.geocoder = None
+        self.scorer = self.build_scorer()
+        
+        # Worker processes for pair scoring (1 scores in-process)
+        self.workers = 1
+        self.worker_stats = {}
+        
+        # Candidate blocking (an empty list compares every candidate pair)
+        self.blocking_strategies = list(DEFAULT_STRATEGIES)
+        self.blocking_window = 10
+        self.blocking_prefix_length = 4
+        self.max_block_size = 1000
+        self.blocking_stats = None
+        
+        # NumPy bound check over whole batches of candidate pairs (--prefilter vector)
+        self.vector_prefilter = False
+        self.prefilter_stats = None
+        
+        # Streaming mode: bounded by memory_limit bytes instead of input size
+        self.memory_limit = None
+        self.spill_dir = None
+        
+        # Sharded runs: fuzzy edges found by this run, or (reduce step) the shard
+        # runs' fuzzy edges to replay, or what they decided about candidate pairs
+        # so only the rest are scored here (--cross-shard)
+        self.fuzzy_edges = []
+        self.shard_edges = None
+        self.shard_pairs = None
+        
+        # Periodic checkpoints of an in-memory run (--checkpoint-dir, --resume)
+        self.checkpoint_dir = None
+        self.checkpoint_interval = 300.0
+        self.resume = False
+        self.checkpoint = None
+        
+        # Persistent index of an already-deduplicated corpus (--against)
+        self.index_dir = None
+        self.index = None
+        self.index_matches = {}
+        
+        # Machine-readable cluster records, streamed as clusters finalize (--clusters)
+        self.clusters_file = None
+        self.cluster_writer = None
         
-        self.leads = []
+        # Stage timings and counters (--metrics, --profile)
+        self.metrics = RunMetrics()
+        
+        # Raw rows, packed and addressed by row index; stages pass indices around.
+        # Loaded from input_file, they hold LOADED_COLUMNS and input_rows has
+        # each row's bytes in the file
+        self.leads = LeadStore()
+        self.input_rows = None
+        self.features = []
         self.duplicates_found = []
         self.stats = {
             'total_leads': 0,
@@ -33,168 +114,105 @@ class LeadDeduplicator:
             'name_duplicates': 0,
             'phone_duplicates': 0,
             'website_duplicates': 0,
-            'address_duplicates': 0
+            'email_duplicates': 0,
+            'cif_duplicates': 0,
+            'address_duplicates': 0,
+            'index_duplicates': 0,
+            'pairs_compared': 0
         }
     
     def normalize_text(self, text: str) -> str:
         """Normalize text for comparison"""
-        if not text:
-            return ""
-        
-        # Convert to lowercase
-        text = text.lower().strip()
-        
-        # Remove common business suffixes
-        suffixes = [
-            r'\s+(sl|sa|slu|sll|s\.l\.|s\.a\.|s\.l\.u\.|s\.l\.l\.)', 
-            r'\s+(ltd|ltd\.|limited|inc|inc\.|corp|corp\.)',
-            r'\s+(sociedad limitada|sociedad anonima)',
-            r'\s+(empresa|company|compañia|cia|cia\.)'
-        ]
-        
-        for suffix in suffixes:
-            text = re.sub(suffix, '', text)
-        
-        # Remove extra spaces and special characters
-        text = re.sub(r'[^\w\s]', ' ', text)
-        text = re.sub(r'\s+', ' ', text).strip()
-        
-        return text
+        return normalize_text(text)
     
     def normalize_phone(self, phone: str) -> str:
         """Normalize phone number for comparison"""
-        if not phone:
-            return ""
-        
-        # Remove all non-digits
-        digits = re.sub(r'[^\d]', '', phone)
-        
-        # Remove country code if present
-        if digits.startswith('34') and len(digits) == 11:
-            digits = digits[2:]
-        
-        return digits
+        return normalize_phone(phone)
     
     def normalize_website(self, website: str) -> str:
         """Normalize website URL for comparison"""
-        if not website:
-            return ""
-        
-        # Remove protocol and www
-        website = re.sub(r'^https?://(www\.)?', '', website.lower())
-        
-        # Remove trailing slash and query parameters
-        website = re.sub(r'[/?].*$', '', website)
-        
-        return website
+        return normalize_website(website)
     
     def similarity(self, text1: str, text2: str) -> float:
         """Calculate similarity between two texts"""
-        if not text1 and not text2:
-            return 1.0
-        if not text1 or not text2:
-            return 0.0
-        
-        return SequenceMatcher(None, text1, text2).ratio()
-    
-    def generate_fingerprint(self, lead: Dict[str, str]) -> str:
-        """Generate a unique fingerprint for exact matching"""
-        # Use normalized phone or website as primary identifier
-        phone = self.normalize_phone(lead.get('phone', ''))
-        website = self.normalize_website(lead.get('company_website', ''))
-        
-        if phone:
-            return f"phone:{phone}"
-        elif website:
-            return f"website:{website}"
-        else:
-            # Use name + address hash for businesses without phone/website
-            name = self.normalize_text(lead.get('company_name', ''))
-            address = self.normalize_text(lead.get('address', ''))
-            combined = f"{name}:{address}"
-            return f"hash:{hashlib.md5(combined.encode()).hexdigest()[:8]}"
+        return self.scorer.engine.similarity(text1, text2)
+    
+    def build_scorer(self) -> PairScorer:
+        """Create the pair scorer from the current thresholds and backend"""
+        return PairScorer(
+            self.name_similarity_threshold,
+            self.address_similarity_threshold,
+            self.very_similar_name_threshold,
+            self.similarity_backend,
+            self.geo_radius
+        )
     
-    def is_duplicate(self, lead1: Dict[str, str], lead2: Dict[str, str]) -> Tuple[bool, str]:
+    def is_duplicate(self, features1: LeadFeatures, features2: LeadFeatures) -> Tuple[bool, str]:
         """Check if two leads are duplicates and return reason"""
+        return self.scorer.is_duplicate(features1, features2)
+    
+    def lead_features(self, idx: int, lead: Dict[str, str]) -> LeadFeatures:
+        """Normalize a lead, spelling out its street and locating it when geo matching is on"""
+        features = build_features(idx, lead)
+        if self.geocoder:
+            features.address = normalize_street(features.address)
+            features.point = self.geocoder.locate(features.address, features.state)
+        return features
+    
+    def build_geocoder(self) -> Optional[PostalGeocoder]:
+        if self.geo_radius is None:
+            return None
+        geocoder = PostalGeocoder(self.postal_centroids)
+        if self.postal_centroids:
+            print(f"🌍 Loaded {len(geocoder.postal)} postal code centroids from {self.postal_centroids}")
+        return geocoder
+    
+    def print_geo_stats(self) -> None:
+        if self.geocoder:
+            stats = self.geocoder.stats
+            print(f"🌍 Located {stats['postal']} leads by postal code; {stats['city']} only placed at their "
+                  f"capital and {stats['province']} at their province (ruling out distant places only); "
+                  f"{stats['unlocated']} unlocated")
+    
+    def score_lead(self, lead: Dict[str, str]) -> int:
+        """Score how complete a lead is, to pick the one kept from a duplicate group"""
+        score = 0
         
-        # Exact phone match (strongest indicator)
-        phone1 = self.normalize_phone(lead1.get('phone', ''))
-        phone2 = self.normalize_phone(lead2.get('phone', ''))
+        # Base score from data_quality_score
+        try:
+            score += int(lead.get('data_quality_score', 1)) * 10
+        except:
+            score += 10
         
-        if phone1 and phone2 and phone1 == phone2:
-            return True, f"identical_phone: {phone1}"
+        # Bonus for having phone
+        if lead.get('phone'):
+            score += 15
         
-        # Exact website match (strong indicator)
-        website1 = self.normalize_website(lead1.get('company_website', ''))
-        website2 = self.normalize_website(lead2.get('company_website', ''))
+        # Bonus for having website
+        if lead.get('company_website'):
+            score += 10
         
-        if website1 and website2 and website1 == website2:
-            return True, f"identical_website: {website1}"
+        # Bonus for having description
+        if lead.get('description') and lead.get('description') != 'N/A':
+            score += 5
         
-        # Company name similarity
-        name1 = self.normalize_text(lead1.get('company_name', ''))
-        name2 = self.normalize_text(lead2.get('company_name', ''))
+        # Bonus for having address
+        if lead.get('address'):
+            score += 5
         
-        if name1 and name2:
-            name_sim = self.similarity(name1, name2)
-            
-            if name_sim >= self.name_similarity_threshold:
-                # If names are very similar, check address too
-                addr1 = self.normalize_text(lead1.get('address', ''))
-                addr2 = self.normalize_text(lead2.get('address', ''))
-                
-                if addr1 and addr2:
-                    addr_sim = self.similarity(addr1, addr2)
-                    
-                    if addr_sim >= self.address_similarity_threshold:
-                        return True, f"similar_name_address: {name_sim:.2f}/{addr_sim:.2f}"
-                
-                # Very high name similarity alone
-                if name_sim >= 0.95:
-                    return True, f"very_similar_name: {name_sim:.2f}"
+        # Penalty for missing key fields
+        if not lead.get('company_name'):
+            score -= 20
         
-        return False, ""
+        return score
     
     def select_best_lead(self, duplicates: List[Dict[str, str]]) -> Dict[str, str]:
         """Select the best lead from a group of duplicates"""
         if len(duplicates) == 1:
             return duplicates[0]
         
-        # Score each lead
-        scored_leads = []
-        
-        for lead in duplicates:
-            score = 0
-            
-            # Base score from data_quality_score
-            try:
-                score += int(lead.get('data_quality_score', 1)) * 10
-            except:
-                score += 10
-            
-            # Bonus for having phone
-            if lead.get('phone'):
-                score += 15
-            
-            # Bonus for having website
-            if lead.get('company_website'):
-                score += 10
-            
-            # Bonus for having description
-            if lead.get('description') and lead.get('description') != 'N/A':
-                score += 5
-            
-            # Bonus for having address
-            if lead.get('address'):
-                score += 5
-            
-            # Penalty for missing key fields
-            if not lead.get('company_name'):
-                score -= 20
-            
-            scored_leads.append((score, lead))
-        
-        # Sort by score (highest first)
+        # Highest score wins; the stable sort keeps the earliest lead on ties
+        scored_leads = [(self.score_lead(lead), lead) for lead in duplicates]
         scored_leads.sort(key=lambda x: x[0], reverse=True)
         
         return scored_leads[0][1]
@@ -203,193 +221,728 @@ class LeadDeduplicator:
         """Load leads from CSV file"""
         print(f"📖 Loading leads from {self.input_file}...")
         
-        with open(self.input_file, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            self.leads = list(reader)
+        self.input_rows = CsvRowIndex(self.input_file)
+        self.load_records(self.input_rows.read(LOADED_COLUMNS))
         
-        self.stats['total_leads'] = len(self.leads)
         print(f"✅ Loaded {self.stats['total_leads']} leads")
     
-    def find_duplicates(self) -> None:
-        """Find all duplicate groups"""
-        print("🔍 Searching for duplicates...")
+    def load_records(self, records: Iterable[Dict[str, str]]) -> None:
+        """Load leads from any iterable of row dicts, e.g. a converter generator"""
+        with self.metrics.stage('parse'):
+            self.leads = LeadStore.from_records(records)
         
-        # Group leads by fingerprint for exact matches
-        fingerprint_groups = {}
-        similarity_candidates = []
+        # Normalize every lead exactly once; comparisons only read these records
+        with self.metrics.stage('normalize'):
+            self.features = self.resumed_features()
+            if self.features is None:
+                self.geocoder = self.build_geocoder()
+                self.features = [self.lead_features(idx, self.leads.row(idx)) for idx in range(len(self.leads))]
+                self.print_geo_stats()
+                self.metrics.count('normalizations', len(self.features))
+                if self.checkpoint:
+                    self.checkpoint.save_features(self.features)
         
-        for i, lead in enumerate(self.leads):
-            fingerprint = self.generate_fingerprint(lead)
-            
-            if fingerprint.startswith('hash:'):
-                # These need similarity checking
-                similarity_candidates.append((i, lead))
+        self.stats['total_leads'] = len(self.leads)
+    
+    def checkpoint_fingerprint(self) -> Dict:
+        """Identity of the input and every setting that affects the edges found"""
+        stat = self.input_file.stat()
+        return {
+            'input_file': str(self.input_file.resolve()),
+            'input_size': stat.st_size,
+            'input_mtime_ns': stat.st_mtime_ns,
+            'thresholds': [self.name_similarity_threshold, self.address_similarity_threshold,
+                           self.very_similar_name_threshold],
+            'similarity_backend': self.similarity_backend,
+            'blocking': [self.blocking_strategies, self.blocking_window,
+                         self.blocking_prefix_length, self.max_block_size],
+            'vector_prefilter': self.vector_prefilter,
+            'geo': [self.geo_radius, self.postal_centroids]
+        }
+    
+    def resumed_features(self) -> Optional[List[LeadFeatures]]:
+        """Normalized features saved by an interrupted run of the same input, if resuming"""
+        if not (self.checkpoint and self.resume):
+            return None
+        
+        features = self.checkpoint.load_features()
+        if features is None or len(features) != len(self.leads):
+            print("⚠️  No matching checkpoint to resume from; starting over")
+            return None
+        
+        print(f"♻️  Resumed {len(features)} normalized leads from {self.checkpoint.directory}")
+        return features
+    
+    def find_candidate_pairs(self, candidates: List[LeadFeatures]) -> Iterable[Tuple[int, int]]:
+        """Return the candidate pairs to score, sorted by row index"""
+        prefilter = None
+        if self.vector_prefilter:
+            prefilter = VectorPrefilter(self.scorer, candidates)
+            self.prefilter_stats = prefilter.stats
+        
+        if not self.blocking_strategies:
+            # Exhaustive comparison: every candidate against every later one
+            self.blocking_stats = None
+            if prefilter:
+                return prefilter.all_pairs()
+            order = [features.index for features in candidates]
+            return ((idx1, idx2) for i, idx1 in enumerate(order) for idx2 in order[i + 1:])
+        
+        blocker = CandidateBlocker(
+            self.blocking_strategies,
+            window=self.blocking_window,
+            prefix_length=self.blocking_prefix_length,
+            max_block_size=self.max_block_size,
+            geo_radius=self.geo_radius or 0.0
+        )
+        # Streamed in sorted order; the pair counts are final once scoring has drained it
+        pairs = blocker.iter_candidate_pairs(candidates)
+        self.blocking_stats = blocker.stats
+        
+        return prefilter.filter_pairs(pairs) if prefilter else pairs
+    
+    def add_edge(self, clusters: DisjointSet, edges: List[Tuple[int, int, str]],
+                 idx1: int, idx2: int, reason: str) -> None:
+        """Merge two leads and record the edge if it joined two clusters"""
+        if not clusters.union(idx1, idx2):
+            return
+        
+        edges.append((idx1, idx2, reason))
+        if reason.startswith('identical_phone'):
+            self.stats['phone_duplicates'] += 1
+        elif reason.startswith('identical_website'):
+            self.stats['website_duplicates'] += 1
+        elif reason.startswith('identical_email'):
+            self.stats['email_duplicates'] += 1
+        elif reason.startswith('identical_cif'):
+            self.stats['cif_duplicates'] += 1
+        elif 'name' in reason:
+            self.stats['name_duplicates'] += 1
+        elif 'address' in reason:
+            self.stats['address_duplicates'] += 1
+    
+    def merge_fuzzy_edges(self, clusters: DisjointSet, edges: List[Tuple[int, int, str]],
+                          candidates: List[LeadFeatures]) -> None:
+        """Merge fuzzy edges between similarity candidates into the clusters"""
+        with self.metrics.stage('blocking'):
+            candidate_pairs = self.find_candidate_pairs(candidates)
+        
+        first_fuzzy_edge = len(edges)
+        with self.metrics.stage('compare'), self.metrics.profile():
+            self.score_candidate_pairs(clusters, edges, candidates, candidate_pairs)
+        if not self.memory_limit:
+            # Saved by shard runs; streaming runs keep their edges on disk
+            self.fuzzy_edges = edges[first_fuzzy_edge:]
+        
+        if self.blocking_stats:
+            print(f"🧱 Blocking kept {self.blocking_stats['candidate_pairs']} of "
+                  f"{self.blocking_stats['exhaustive_pairs']} candidate pairs "
+                  f"({self.blocking_stats['pruned_pairs']} pruned)")
+            for strategy, strategy_stats in self.blocking_stats['strategies'].items():
+                print(f"   • {strategy}: {strategy_stats['pairs']} pairs, {strategy_stats['pruned']} pruned")
+            if self.blocking_stats['geo_unplaced']:
+                print(f"   ⚠️  geo: {self.blocking_stats['geo_unplaced']} leads without a postal code centroid "
+                      f"blocked by postal code instead")
+        if self.geo_radius is not None:
+            print(f"🌍 Geo filter rejected {self.scorer.stats['geo_rejects']} pairs more than "
+                  f"{self.geo_radius:g} km apart")
+        if self.prefilter_stats:
+            print(f"🧮 Vector prefilter passed {self.prefilter_stats['kept']} of "
+                  f"{self.prefilter_stats['pairs']} pairs to the exact scorer")
+    
+    def link_fuzzy_edges(self, clusters: DisjointSet, edges: List[Tuple[int, int, str]],
+                         candidates: List[LeadFeatures]) -> None:
+        """Merge fuzzy edges, scored here or (partly) replayed from the shard runs of a sharded dedup"""
+        if self.shard_edges is not None:
+            # Exact keys joined the shards; their fuzzy edges are taken as they are
+            replayed = 0
+            with self.metrics.stage('compare'):
+                for idx1, idx2, reason in self.shard_edges:
+                    self.add_edge(clusters, edges, idx1, idx2, reason)
+                    replayed += 1
+            print(f"🧩 Replayed {replayed} fuzzy edges from shard runs")
+            return
+        if self.shard_pairs is None:
+            self.merge_fuzzy_edges(clusters, edges, candidates)
+            return
+        
+        with self.metrics.stage('blocking'):
+            candidate_pairs = self.find_candidate_pairs(candidates)
+        
+        # The pairs of a single run, in its order: the shard runs decided those
+        # within a shard, pairs across shards (or skipped by a shard) are scored here
+        by_index = {features.index: features for features in candidates}
+        replayed = scored = 0
+        
+        def merge(idx1: int, idx2: int, decision: Optional[Tuple[bool, str]], reason: Optional[str]) -> None:
+            nonlocal replayed, scored
+            if clusters.connected(idx1, idx2):
+                return
+            if decision is None:
+                scored += 1
+                self.stats['pairs_compared'] += 1
+                decision = (reason is not None, reason)
             else:
-                # These can be grouped by exact fingerprint
-                if fingerprint not in fingerprint_groups:
-                    fingerprint_groups[fingerprint] = []
-                fingerprint_groups[fingerprint].append((i, lead))
-        
-        # Process exact fingerprint groups
-        duplicate_groups = []
-        
-        for fingerprint, group in fingerprint_groups.items():
-            if len(group) > 1:
-                duplicate_groups.append([item[1] for item in group])
-                if fingerprint.startswith('phone:'):
-                    self.stats['phone_duplicates'] += len(group) - 1
-                elif fingerprint.startswith('website:'):
-                    self.stats['website_duplicates'] += len(group) - 1
-        
-        # Process similarity candidates
-        processed = set()
-        
-        for i, (idx1, lead1) in enumerate(similarity_candidates):
-            if idx1 in processed:
-                continue
-            
-            current_group = [lead1]
-            processed.add(idx1)
+                replayed += 1
+            if decision[0]:
+                self.add_edge(clusters, edges, idx1, idx2, decision[1])
+        
+        with self.metrics.stage('compare'):
+            if self.workers > 1:
+                # Pairs to score go to the workers in order; the decided pairs among
+                # them wait in pending until the chunk after them is merged
+                pending = deque()
+                
+                def undecided_pairs() -> Iterator[Tuple[int, int]]:
+                    for idx1, idx2 in candidate_pairs:
+                        decision = self.shard_pairs.decision(by_index[idx1], by_index[idx2])
+                        pending.append((idx1, idx2, decision))
+                        if decision is None:
+                            yield idx1, idx2
+                
+                parallel = ParallelPairScorer(self.scorer, self.workers)
+                compact = {features.index: (features.name, features.address, features.point)
+                           for features in candidates}
+                for chunk, matches in parallel.score_chunks(compact, undecided_pairs()):
+                    reasons = {(idx1, idx2): reason for idx1, idx2, reason in matches}
+                    remaining = len(chunk)
+                    while remaining:
+                        idx1, idx2, decision = pending.popleft()
+                        remaining -= decision is None
+                        merge(idx1, idx2, decision, reasons.get((idx1, idx2)))
+                for idx1, idx2, decision in pending:
+                    merge(idx1, idx2, decision, None)
+            else:
+                for idx1, idx2 in candidate_pairs:
+                    if clusters.connected(idx1, idx2):
+                        continue
+                    decision = self.shard_pairs.decision(by_index[idx1], by_index[idx2])
+                    if decision is None:
+                        is_dup, reason = self.is_duplicate(by_index[idx1], by_index[idx2])
+                        merge(idx1, idx2, None, reason if is_dup else None)
+                    else:
+                        merge(idx1, idx2, decision, None)
+        print(f"🧩 Replayed {replayed} pair decisions from shard runs, scored {scored} pairs here")
+    
+    def score_candidate_pairs(self, clusters: DisjointSet, edges: List[Tuple[int, int, str]],
+                              candidates: List[LeadFeatures], candidate_pairs: Iterable[Tuple[int, int]]) -> None:
+        """Score candidate pairs, serially or across worker processes, merging matches"""
+        # Fuzzy edges and the pair cursor are what a checkpoint has to save
+        first_fuzzy_edge = len(edges)
+        cursor = 0
+        
+        progress = self.checkpoint.load_progress() if self.checkpoint and self.resume else None
+        if progress:
+            # Replaying the merging edges restores the clusters and duplicate counts
+            for idx1, idx2, reason in progress['edges']:
+                self.add_edge(clusters, edges, idx1, idx2, reason)
+            cursor = progress['cursor']
+            self.stats['pairs_compared'] = progress['pairs_compared']
+            candidate_pairs = islice(candidate_pairs, cursor, None)
+            print(f"♻️  Resumed pair scoring at pair {cursor} with {len(progress['edges'])} fuzzy edges")
+        
+        def save_progress() -> None:
+            self.checkpoint.save_progress(cursor, edges[first_fuzzy_edge:], self.stats['pairs_compared'])
+        
+        if self.workers > 1:
+            # Workers score every pair; edges are then merged in pair order, skipping
+            # pairs connected by then, which yields the serial loop's clusters, edges
+            # and pair count
+            parallel = ParallelPairScorer(self.scorer, self.workers)
+            compact = {features.index: (features.name, features.address, features.point) for features in candidates}
+            for chunk, matches in parallel.score_chunks(compact, candidate_pairs):
+                reasons = {(idx1, idx2): reason for idx1, idx2, reason in matches}
+                for idx1, idx2 in chunk:
+                    if clusters.connected(idx1, idx2):
+                        continue
+                    self.stats['pairs_compared'] += 1
+                    reason = reasons.get((idx1, idx2))
+                    if reason is not None:
+                        self.add_edge(clusters, edges, idx1, idx2, reason)
+                
+                cursor += len(chunk)
+                if self.checkpoint and self.checkpoint.due():
+                    save_progress()
             
-            for j, (idx2, lead2) in enumerate(similarity_candidates[i+1:], i+1):
-                if idx2 in processed:
+            self.worker_stats = parallel.worker_stats
+            for pid, worker in sorted(self.worker_stats.items()):
+                rate = worker['pairs'] / worker['seconds'] if worker['seconds'] else 0.0
+                print(f"   ⚙️  worker {pid}: {worker['pairs']} pairs in {worker['chunks']} chunks "
+                      f"({rate:,.0f} pairs/sec)")
+        else:
+            by_index = {features.index: features for features in candidates}
+            for idx1, idx2 in candidate_pairs:
+                if self.checkpoint and cursor % 10000 == 0 and self.checkpoint.due():
+                    save_progress()
+                cursor += 1
+                
+                if clusters.connected(idx1, idx2):
                     continue
                 
-                is_dup, reason = self.is_duplicate(lead1, lead2)
+                self.stats['pairs_compared'] += 1
+                is_dup, reason = self.is_duplicate(by_index[idx1], by_index[idx2])
                 if is_dup:
-                    current_group.append(lead2)
-                    processed.add(idx2)
-                    
-                    if 'name' in reason:
-                        self.stats['name_duplicates'] += 1
-                    elif 'address' in reason:
-                        self.stats['address_duplicates'] += 1
-            
-            if len(current_group) > 1:
-                duplicate_groups.append(current_group)
+                    self.add_edge(clusters, edges, idx1, idx2, reason)
         
-        # Store duplicate information
-        for group in duplicate_groups:
-            best_lead = self.select_best_lead(group)
-            
-            duplicate_info = {
-                'group': group,
-                'best_lead': best_lead,
-                'removed_count': len(group) - 1,
-                'reasons': []
-            }
-            
-            # Analyze reasons for this group
-            for lead in group:
-                if lead != best_lead:
-                    is_dup, reason = self.is_duplicate(best_lead, lead)
-                    duplicate_info['reasons'].append(reason)
+        if self.checkpoint:
+            save_progress()
+    
+    def build_cluster(self, cluster_id: int, members: List[int], rows: Dict[int, Dict[str, str]],
+                      features: Dict[int, LeadFeatures], scores: Dict[int, int],
+                      edge_reasons: Dict[int, str]) -> Dict:
+        """Cluster record for one duplicate group: its rows, kept row and removal reasons"""
+        # Highest score wins, the earliest row on ties
+        best_index = members[0]
+        for idx in members[1:]:
+            if scores[idx] > scores[best_index]:
+                best_index = idx
+        
+        # Prefer a direct match with the kept lead, else the edge that linked the lead in
+        cluster_members = []
+        for idx in members:
+            if idx == best_index:
+                cluster_members.append(build_member(idx + 1, rows[idx], True, None))
+                continue
             
-            self.duplicates_found.append(duplicate_info)
+            is_dup, reason, name_score, address_score = self.scorer.match(features[best_index], features[idx])
+            if is_dup:
+                cluster_members.append(build_member(idx + 1, rows[idx], False, reason, name_score, address_score))
+            else:
+                cluster_members.append(build_member(idx + 1, rows[idx], False, f"linked_via {edge_reasons[idx]}"))
         
-        total_duplicates = sum(dup['removed_count'] for dup in self.duplicates_found)
+        return {
+            'cluster_id': cluster_id,
+            'rows': [idx + 1 for idx in members],
+            'kept_row': best_index + 1,
+            'removed_count': len(members) - 1,
+            'members': cluster_members
+        }
+    
+    def edge_reasons(self, edges: List[Tuple[int, int, str]]) -> Dict[int, str]:
+        """Reason each lead joined its cluster, taken from the edge that attached it"""
+        reasons = {}
+        for idx1, idx2, reason in edges:
+            reasons.setdefault(idx2, reason)
+            reasons.setdefault(idx1, reason)
+        return reasons
+    
+    def find_duplicates(self) -> None:
+        """Find all duplicate clusters"""
+        print("🔍 Searching for duplicates...")
+        
+        self.scorer = self.build_scorer()
+        clusters = DisjointSet(len(self.leads))
+        joiner = ExactKeyJoiner()
+        edges = []
+        similarity_candidates = []
+        
+        # Hash-join on every exact key in a single pass
+        with self.metrics.stage('exact_keys'):
+            for features in self.features:
+                idx = features.index
+                
+                for earlier, key_name, value in joiner.join(idx, features.exact_keys):
+                    self.add_edge(clusters, edges, earlier, idx, f"identical_{key_name}: {value}")
+                
+                if features.needs_similarity:
+                    similarity_candidates.append(features)
+        
+        self.link_fuzzy_edges(clusters, edges, similarity_candidates)
+        
+        # Store duplicate information for each connected component
+        with self.metrics.stage('select_best'):
+            edge_reasons = self.edge_reasons(edges)
+            for cluster_id, members in enumerate(clusters.components(), 1):
+                rows = {idx: self.leads.row(idx) for idx in members}
+                scores = {idx: self.score_lead(rows[idx]) for idx in members}
+                cluster = self.build_cluster(cluster_id, members, rows, self.features,
+                                             scores, edge_reasons)
+                self.duplicates_found.append(cluster)
+                if self.cluster_writer:
+                    self.cluster_writer.write(cluster)
+        
+        total_duplicates = sum(cluster['removed_count'] for cluster in self.duplicates_found)
         self.stats['duplicates_removed'] = total_duplicates
         self.stats['unique_leads'] = self.stats['total_leads'] - total_duplicates
         
         print(f"🔍 Found {len(self.duplicates_found)} duplicate groups")
         print(f"📊 Total duplicates to remove: {total_duplicates}")
     
+    def kept_indices(self) -> List[int]:
+        """Rows kept after in-batch dedup: cluster winners first, then leads in no cluster"""
+        kept = [cluster['kept_row'] - 1 for cluster in self.duplicates_found]
+        
+        clustered = set()
+        for cluster in self.duplicates_found:
+            clustered.update(row - 1 for row in cluster['rows'])
+        
+        kept.extend(idx for idx in range(len(self.leads)) if idx not in clustered)
+        return kept
+    
+    def match_against_index(self) -> None:
+        """Drop batch survivors that duplicate a lead already in the index"""
+        self.index = LeadIndex(
+            self.index_dir,
+            self.blocking_strategies,
+            prefix_length=self.blocking_prefix_length,
+            max_block_size=self.max_block_size,
+            window=self.blocking_window
+        )
+        # The lookup service scores with the settings of the last batch run
+        self.index.set_scorer_settings(self.scorer.settings())
+        print(f"🗂️  Checking batch against index {self.index_dir} ({len(self.index)} leads)...")
+        
+        for idx in self.kept_indices():
+            match = self.index.find_duplicate(self.features[idx], self.scorer)
+            if match:
+                self.index_matches[idx] = match
+        
+        matched = len(self.index_matches)
+        self.stats['index_duplicates'] = matched
+        self.stats['duplicates_removed'] += matched
+        self.stats['unique_leads'] -= matched
+        print(f"🗂️  {matched} leads already in the index "
+              f"({self.index.stats['exact_matches']} exact, {self.index.stats['fuzzy_matches']} fuzzy, "
+              f"{self.index.stats['fuzzy_comparisons']} comparisons)")
+    
+    def update_index(self) -> None:
+        """Append the batch survivors to the index and its corpus CSV"""
+        survivors = [idx for idx in self.kept_indices() if idx not in self.index_matches]
+        
+        for idx in survivors:
+            self.index.add(self.features[idx])
+        if self.input_rows is not None:
+            self.index.append_corpus(self.input_rows.fieldnames, [self.input_rows.row(idx) for idx in survivors])
+        elif len(self.leads):
+            self.index.append_corpus(self.leads.fieldnames, [self.leads.row(idx) for idx in survivors])
+        self.index.close()
+        
+        print(f"🗂️  Added {len(survivors)} leads to index {self.index_dir}")
+    
     def generate_clean_csv(self) -> None:
         """Generate clean CSV with duplicates removed"""
         print(f"🧹 Generating clean CSV: {self.output_file}")
         
-        # Collect all best leads
-        kept_leads = set()
-        clean_leads = []
+        # Kept rows in input order, like the streaming mode writes them
+        clean_rows = sorted(idx for idx in self.kept_indices() if idx not in self.index_matches)
         
-        # Add best leads from duplicate groups
-        for dup_info in self.duplicates_found:
-            best_lead = dup_info['best_lead']
-            lead_key = id(best_lead)  # Use object id as unique identifier
-            
-            if lead_key not in kept_leads:
-                clean_leads.append(best_lead)
-                kept_leads.add(lead_key)
+        # Write clean CSV
+        if clean_rows and self.input_rows is not None:
+            with open(self.output_file, 'wb') as f:
+                self.input_rows.copy_rows(clean_rows, f)
+        elif clean_rows:
+            with open(self.output_file, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f)
+                writer.writerow(self.leads.fieldnames)
+                writer.writerows(self.leads.values(idx) for idx in clean_rows)
         
-        # Add unique leads (not in any duplicate group)
-        all_duplicate_leads = set()
-        for dup_info in self.duplicates_found:
-            for lead in dup_info['group']:
-                all_duplicate_leads.add(id(lead))
+        print(f"✅ Clean CSV created with {len(clean_rows)} unique leads")
+    
+    def write_report_summary(self, f, group_count: int) -> None:
+        """Write the report header, statistics and detail section title"""
+        f.write("🔍 RITTERFINDER DUPLICATE LEADS REPORT\n")
+        f.write("=" * 50 + "\n\n")
         
-        for lead in self.leads:
-            if id(lead) not in all_duplicate_leads:
-                clean_leads.append(lead)
+        # Summary statistics
+        f.write("📊 SUMMARY\n")
+        f.write("-" * 20 + "\n")
+        f.write(f"Total leads processed: {self.stats['total_leads']}\n")
+        f.write(f"Unique leads kept: {self.stats['unique_leads']}\n")
+        f.write(f"Duplicates removed: {self.stats['duplicates_removed']}\n")
+        f.write(f"Duplicate groups found: {group_count}\n\n")
         
-        # Write clean CSV
-        if clean_leads:
-            with open(self.output_file, 'w', newline='', encoding='utf-8') as f:
-                fieldnames = clean_leads[0].keys()
-                writer = csv.DictWriter(f, fieldnames=fieldnames)
-                writer.writeheader()
-                writer.writerows(clean_leads)
+        f.write("🏷️ DUPLICATE TYPES\n")
+        f.write("-" * 20 + "\n")
+        f.write(f"Phone duplicates: {self.stats['phone_duplicates']}\n")
+        f.write(f"Website duplicates: {self.stats['website_duplicates']}\n")
+        f.write(f"Email duplicates: {self.stats['email_duplicates']}\n")
+        f.write(f"CIF duplicates: {self.stats['cif_duplicates']}\n")
+        f.write(f"Name duplicates: {self.stats['name_duplicates']}\n")
+        f.write(f"Address duplicates: {self.stats['address_duplicates']}\n")
+        if self.index_dir:
+            f.write(f"Already in index: {self.stats['index_duplicates']}\n")
+        f.write("\n")
+        
+        if self.blocking_stats:
+            f.write("🧱 CANDIDATE BLOCKING\n")
+            f.write("-" * 20 + "\n")
+            f.write(f"Similarity candidates: {self.blocking_stats['candidates']}\n")
+            f.write(f"Exhaustive pairs: {self.blocking_stats['exhaustive_pairs']}\n")
+            f.write(f"Pairs compared: {self.blocking_stats['candidate_pairs']}\n")
+            f.write(f"Pairs pruned: {self.blocking_stats['pruned_pairs']}\n")
+            for strategy, strategy_stats in self.blocking_stats['strategies'].items():
+                f.write(f"  {strategy}: {strategy_stats['pairs']} pairs, {strategy_stats['pruned']} pruned\n")
+            if self.blocking_stats['oversized_blocks']:
+                f.write(f"Oversized blocks skipped: {self.blocking_stats['oversized_blocks']}\n")
+            f.write("\n")
+        
+        # Detailed duplicate groups
+        f.write("📋 DETAILED DUPLICATE GROUPS\n")
+        f.write("-" * 30 + "\n\n")
+    
+    def write_report_group(self, f, cluster: Dict) -> None:
+        """Render one cluster record as a group of the text report"""
+        def field(member: Dict, name: str) -> str:
+            return 'N/A' if member[name] is None else member[name]
+        
+        f.write(f"GROUP {cluster['cluster_id']} ({cluster['removed_count']} duplicates removed)\n")
+        f.write("=" * 40 + "\n")
         
-        print(f"✅ Clean CSV created with {len(clean_leads)} unique leads")
+        best_lead = next(member for member in cluster['members'] if member['kept'])
+        f.write(f"✅ KEPT: {field(best_lead, 'company_name')}\n")
+        f.write(f"   Phone: {field(best_lead, 'phone')}\n")
+        f.write(f"   Website: {field(best_lead, 'company_website')}\n")
+        f.write(f"   Address: {field(best_lead, 'address')}\n")
+        f.write(f"   Quality Score: {field(best_lead, 'data_quality_score')}\n\n")
+        
+        f.write("❌ REMOVED:\n")
+        for member in cluster['members']:
+            if not member['kept']:
+                f.write(f"   • {field(member, 'company_name')} (Reason: {member['reason'] or 'unknown'})\n")
+                f.write(f"     Phone: {field(member, 'phone')}\n")
+                f.write(f"     Website: {field(member, 'company_website')}\n")
+                f.write(f"     Quality Score: {field(member, 'data_quality_score')}\n")
+        
+        f.write("\n" + "-" * 40 + "\n\n")
     
     def generate_report(self) -> None:
         """Generate detailed duplicate report"""
         print(f"📄 Generating duplicate report: {self.report_file}")
         
         with open(self.report_file, 'w', encoding='utf-8') as f:
-            f.write("🔍 RITTERFINDER DUPLICATE LEADS REPORT\n")
-            f.write("=" * 50 + "\n\n")
+            self.write_report_summary(f, len(self.duplicates_found))
             
-            # Summary statistics
-            f.write("📊 SUMMARY\n")
-            f.write("-" * 20 + "\n")
-            f.write(f"Total leads processed: {self.stats['total_leads']}\n")
-            f.write(f"Unique leads kept: {self.stats['unique_leads']}\n")
-            f.write(f"Duplicates removed: {self.stats['duplicates_removed']}\n")
-            f.write(f"Duplicate groups found: {len(self.duplicates_found)}\n\n")
+            for cluster in self.duplicates_found:
+                self.write_report_group(f, cluster)
             
-            f.write("🏷️ DUPLICATE TYPES\n")
-            f.write("-" * 20 + "\n")
-            f.write(f"Phone duplicates: {self.stats['phone_duplicates']}\n")
-            f.write(f"Website duplicates: {self.stats['website_duplicates']}\n")
-            f.write(f"Name duplicates: {self.stats['name_duplicates']}\n")
-            f.write(f"Address duplicates: {self.stats['address_duplicates']}\n\n")
+            if self.index_matches:
+                f.write("🗂️ ALREADY IN INDEX\n")
+                f.write("-" * 30 + "\n\n")
+                for idx, (row_id, reason) in self.index_matches.items():
+                    lead = self.leads.row(idx)
+                    f.write(f"   • {lead.get('company_name', 'N/A')} (Matches index row {row_id}: {reason})\n")
+                    f.write(f"     Phone: {lead.get('phone', 'N/A')}\n")
+                    f.write(f"     Website: {lead.get('company_website', 'N/A')}\n")
+                f.write("\n")
+        
+        print(f"✅ Report generated successfully")
+    
+    def deduplicate_streaming(self) -> None:
+        """Deduplicate with memory bounded by memory_limit instead of input size
+        
+        Pass 1 streams the CSV once, spilling (exact key, row) pairs to
+        hash partitions on disk and keeping only the similarity candidates'
+        features plus a quality score per row in RAM. Exact-key edges are
+        sorted one partition at a time into runs, merged from disk, and
+        joined by the fuzzy edges; every edge is spilled. Pass 2 streams
+        the CSV again, writing kept rows as it goes (in input order) and
+        spilling clustered rows and edge reasons, range-partitioned by
+        cluster, for the report.
+        
+        Beyond memory_limit, RAM still grows by about 24 bytes per input row
+        (16 for the union-find, 4 for the quality score, 4 for the cluster
+        rank) plus the similarity candidates' features.
+        """
+        memory_limit = self.memory_limit
+        spill_budget = max(1, memory_limit // 4)
+        input_size = self.input_file.stat().st_size
+        partitions = max(8, math.ceil(2 * input_size / memory_limit))
+        
+        print("🚀 Starting streaming lead deduplication...")
+        print(f"💾 Memory limit {memory_limit // (1024 * 1024)} MB, {partitions} spill partitions")
+        
+        self.scorer = self.build_scorer()
+        self.geocoder = self.build_geocoder()
+        key_spill = KeySpill(partitions, spill_budget, self.spill_dir)
+        scores = array('i')
+        candidates = []
+        
+        # Pass 1: normalize, spill exact keys, keep candidate features
+        print(f"📖 Streaming leads from {self.input_file}...")
+        # Parsing and normalization interleave here, so they share one stage
+        input_rows = CsvRowIndex(self.input_file)
+        positions = input_rows.positions(LOADED_COLUMNS)
+        fieldnames = [column for column, _ in positions]
+        with self.metrics.stage('load'):
+            for idx, (_, _, values) in enumerate(input_rows.scan()):
+                lead = input_rows.select(values, positions)
+                features = self.lead_features(idx, lead)
+                scores.append(self.score_lead(lead))
+                
+                for key_name, value in features.exact_keys.items():
+                    if value:
+                        key_spill.add_key(key_name, value, idx)
+                
+                # A reduce step that replays the shards' fuzzy edges scores no pairs
+                if features.needs_similarity and self.shard_edges is None:
+                    candidates.append(features)
+        
+        total = len(scores)
+        self.metrics.count('normalizations', total)
+        self.stats['total_leads'] = total
+        print(f"✅ Streamed {total} leads, {key_spill.records} exact keys spilled "
+              f"in {key_spill.flushes} flushes")
+        self.print_geo_stats()
+        
+        # Exact-key edges, applied in the same order as the in-memory hash join
+        print("🔍 Searching for duplicates...")
+        clusters = DisjointSet(total)
+        edges = EdgeSpill(spill_budget, self.spill_dir)
+        key_rank = {key_name: rank for rank, key_name in enumerate(EXACT_KEYS)}
+        report_spill = reason_spill = None
+        
+        try:
+            with self.metrics.stage('exact_keys'):
+                try:
+                    for first, row, key_name, value in key_spill.shared_key_edges(key_rank):
+                        self.add_edge(clusters, edges, first, row, f"identical_{key_name}: {value}")
+                finally:
+                    key_spill.close()
             
-            # Detailed duplicate groups
-            f.write("📋 DETAILED DUPLICATE GROUPS\n")
-            f.write("-" * 30 + "\n\n")
+            self.link_fuzzy_edges(clusters, edges, candidates)
+            del candidates
             
-            for i, dup_info in enumerate(self.duplicates_found, 1):
-                f.write(f"GROUP {i} ({dup_info['removed_count']} duplicates removed)\n")
-                f.write("=" * 40 + "\n")
-                
-                best_lead = dup_info['best_lead']
-                f.write(f"✅ KEPT: {best_lead.get('company_name', 'N/A')}\n")
-                f.write(f"   Phone: {best_lead.get('phone', 'N/A')}\n")
-                f.write(f"   Website: {best_lead.get('company_website', 'N/A')}\n")
-                f.write(f"   Address: {best_lead.get('address', 'N/A')}\n")
-                f.write(f"   Quality Score: {best_lead.get('data_quality_score', 'N/A')}\n\n")
+            # Clusters are ranked by their first row; a row's rank is set on its
+            # root as soon as the first member is seen
+            with self.metrics.stage('select_best'):
+                cluster_of = array('i', [-1]) * total
+                best_of = array('i')
+                clustered = 0
+                for idx in range(total):
+                    root = clusters.find(idx)
+                    if clusters.size[root] == 1:
+                        continue
+                    clustered += 1
+                    rank = cluster_of[root]
+                    if rank < 0:
+                        rank = cluster_of[root] = len(best_of)
+                        best_of.append(idx)
+                    cluster_of[idx] = rank
+                    # Highest score wins, the earliest row on ties
+                    if scores[idx] > scores[best_of[rank]]:
+                        best_of[rank] = idx
+            del clusters
+            
+            group_count = len(best_of)
+            total_duplicates = clustered - group_count
+            self.stats['duplicates_removed'] = total_duplicates
+            self.stats['unique_leads'] = total - total_duplicates
+            print(f"🔍 Found {group_count} duplicate groups")
+            print(f"📊 Total duplicates to remove: {total_duplicates}")
+            
+            # Pass 2: write kept rows, spill clustered rows and edge reasons by cluster range
+            row_bytes = input_size / total if total else 1
+            cluster_bytes = row_bytes * clustered / group_count if group_count else 1
+            clusters_per_partition = max(1, int(spill_budget // max(1.0, 4 * cluster_bytes)))
+            report_partitions = math.ceil(group_count / clusters_per_partition) or 1
+            report_spill = PartitionedSpill(report_partitions, spill_budget // 2, self.spill_dir, prefix='clusters')
+            reason_spill = PartitionedSpill(report_partitions, spill_budget // 2, self.spill_dir, prefix='reasons')
+            
+            # The first edge that touches a row is the reason it joined its cluster
+            for idx1, idx2, reason in edges:
+                partition = cluster_of[idx1] // clusters_per_partition
+                reason_spill.add(partition, [str(idx2), reason])
+                reason_spill.add(partition, [str(idx1), reason])
+            edges.close()
+            
+            print(f"🧹 Generating clean CSV: {self.output_file}")
+            kept = 0
+            # Kept rows are copied from the input as is; clustered rows spill their loaded columns
+            with self.metrics.stage('write_csv'), open(self.output_file, 'wb') as f_out:
+                if total:
+                    input_rows.write_header(f_out)
                 
-                f.write("❌ REMOVED:\n")
-                for j, lead in enumerate(dup_info['group']):
-                    if lead != best_lead:
-                        reason = dup_info['reasons'][j-1] if j-1 < len(dup_info['reasons']) else "unknown"
-                        f.write(f"   • {lead.get('company_name', 'N/A')} (Reason: {reason})\n")
-                        f.write(f"     Phone: {lead.get('phone', 'N/A')}\n")
-                        f.write(f"     Website: {lead.get('company_website', 'N/A')}\n")
-                        f.write(f"     Quality Score: {lead.get('data_quality_score', 'N/A')}\n")
+                for idx, (start, end, values) in enumerate(input_rows.scan()):
+                    rank = cluster_of[idx]
+                    if rank < 0 or best_of[rank] == idx:
+                        input_rows.write_range(start, end, f_out)
+                        kept += 1
+                    if rank >= 0:
+                        report_spill.add(rank // clusters_per_partition, [str(rank), str(idx)] +
+                                         [values[position] if position < len(values) else ''
+                                          for _, position in positions])
+            
+            print(f"✅ Clean CSV created with {kept} unique leads")
+            
+            print(f"📄 Generating duplicate report: {self.report_file}")
+            report_spill.flush()
+            reason_spill.flush()
+            
+            with self.metrics.stage('report'), open(self.report_file, 'w', encoding='utf-8') as f:
+                self.write_report_summary(f, group_count)
                 
-                f.write("\n" + "-" * 40 + "\n\n")
+                for partition in range(report_spill.partitions):
+                    edge_reasons: Dict[int, str] = {}
+                    for idx, reason in reason_spill.read(partition):
+                        edge_reasons.setdefault(int(idx), reason)
+                    
+                    rows_by_rank: Dict[int, Dict[int, Dict[str, str]]] = {}
+                    for record in report_spill.read(partition):
+                        lead = dict(zip(fieldnames, record[2:]))
+                        rows_by_rank.setdefault(int(record[0]), {})[int(record[1])] = lead
+                    
+                    for rank in sorted(rows_by_rank):
+                        # Rows were spilled in input order, so members are ascending
+                        rows = rows_by_rank[rank]
+                        features = {idx: self.lead_features(idx, lead) for idx, lead in rows.items()}
+                        self.metrics.count('normalizations', len(features))
+                        group_scores = {idx: scores[idx] for idx in rows}
+                        cluster = self.build_cluster(rank + 1, list(rows), rows, features,
+                                                     group_scores, edge_reasons)
+                        if self.cluster_writer:
+                            self.cluster_writer.write(cluster)
+                        self.write_report_group(f, cluster)
+        finally:
+            edges.close()
+            for spill in (report_spill, reason_spill):
+                if spill is not None:
+                    spill.close()
+            input_rows.close()
         
         print(f"✅ Report generated successfully")
     
-    def deduplicate(self) -> None:
-        """Main deduplication process"""
-        print("🚀 Starting lead deduplication process...")
+    def collect_metrics(self) -> None:
+        """Copy the run's stats and work counters into the metrics document"""
+        self.metrics.set_counters(self.stats)
+        self.metrics.set_counters(self.scorer.engine.stats, prefix='similarity_')
+        if self.geo_radius is not None:
+            self.metrics.set_counters(self.scorer.stats)
+        if self.geocoder:
+            self.metrics.set_counters(self.geocoder.stats, prefix='geo_located_')
+        
+        cache = char_bag.cache_info()
+        self.metrics.set_counters({'hits': cache.hits, 'misses': cache.misses}, prefix='char_bag_cache_')
+        
+        if self.blocking_stats:
+            self.metrics.set_counters({
+                key: self.blocking_stats[key]
+                for key in ('candidates', 'exhaustive_pairs', 'candidate_pairs', 'pruned_pairs', 'oversized_blocks')
+            }, prefix='blocking_')
+        if self.prefilter_stats:
+            self.metrics.set_counters(self.prefilter_stats, prefix='prefilter_')
+        if self.index is not None:
+            self.metrics.set_counters(self.index.stats, prefix='index_')
+        if self.worker_stats:
+            self.metrics.set_counters({'workers': len(self.worker_stats)})
+    
+    def deduplicate(self, records: Optional[Iterable[Dict[str, str]]] = None) -> None:
+        """Main deduplication process
+        
+        records, when given, replaces reading input_file (in-memory mode only).
+        """
+        self.metrics.start()
+        if self.clusters_file:
+            self.cluster_writer = ClusterWriter(self.clusters_file)
+        
+        try:
+            self.run_stages(records)
+        finally:
+            if self.cluster_writer:
+                self.cluster_writer.close()
+            if self.input_rows is not None:
+                self.input_rows.close()
         
-        self.load_leads()
-        self.find_duplicates()
-        self.generate_clean_csv()
-        self.generate_report()
+        self.collect_metrics()
         
         print(f"\n🎉 Deduplication completed!")
         print(f"📈 Original leads: {self.stats['total_leads']}")
@@ -397,22 +950,161 @@ class LeadDeduplicator:
         print(f"✨ Clean leads: {self.stats['unique_leads']}")
         print(f"📁 Clean file: {self.output_file}")
         print(f"📄 Report file: {self.report_file}")
+        if self.clusters_file:
+            print(f"🧩 Clusters file: {self.clusters_file}")
+    
+    def run_stages(self, records: Optional[Iterable[Dict[str, str]]] = None) -> None:
+        """Run the streaming or in-memory stages"""
+        if self.memory_limit:
+            self.deduplicate_streaming()
+        else:
+            print("🚀 Starting lead deduplication process...")
+            
+            if self.checkpoint_dir:
+                self.checkpoint = Checkpoint(self.checkpoint_dir, self.checkpoint_fingerprint(),
+                                             self.checkpoint_interval)
+            
+            if records is None:
+                self.load_leads()
+            else:
+                self.load_records(records)
+                print(f"✅ Received {self.stats['total_leads']} leads")
+            self.find_duplicates()
+            if self.index_dir:
+                with self.metrics.stage('index_match'):
+                    self.match_against_index()
+            with self.metrics.stage('write_csv'):
+                self.generate_clean_csv()
+            if self.checkpoint:
+                # Resuming after the index update would append the survivors twice
+                self.metrics.set_counters({'checkpoints_saved': self.checkpoint.saves})
+                self.checkpoint.clear()
+            if self.index_dir:
+                with self.metrics.stage('index_update'):
+                    self.update_index()
+            with self.metrics.stage('report'):
+                self.generate_report()
+
+def add_dedup_arguments(parser: argparse.ArgumentParser) -> None:
+    """Matching, blocking and scaling options shared with run-lead-pipeline.py"""
+    parser.add_argument('--name-threshold', type=float, default=0.85, help='Name similarity threshold (0.0-1.0)')
+    parser.add_argument('--address-threshold', type=float, default=0.80, help='Address similarity threshold (0.0-1.0)')
+    parser.add_argument('--similarity', choices=SIMILARITY_BACKENDS, default='sequence',
+                        help='Similarity backend (sequence reproduces the historical SequenceMatcher scores)')
+    parser.add_argument('--workers', type=int, default=1, help='Worker processes for pair scoring (default: 1)')
+    parser.add_argument('--memory-limit',
+                        help='Stream the input with spill files instead of loading it, keeping memory near this size '
+                             '(e.g. 512M, 2G) plus about 24 bytes per row and the features of leads '
+                             'that need similarity scoring')
+    parser.add_argument('--against', metavar='INDEX_DIR',
+                        help='Check the input against a persistent dedup index and append the survivors to it '
+                             '(the index is created if missing)')
+    parser.add_argument('--clusters', metavar='FILE',
+                        help='Also write duplicate clusters as JSONL (or CSV, by extension) for downstream tools')
+    parser.add_argument('--checkpoint-dir', metavar='DIR',
+                        help='Save normalized features and pair-scoring progress here so a killed run can --resume')
+    parser.add_argument('--checkpoint-interval', type=float, default=300.0,
+                        help='Seconds between pair-scoring checkpoints (default: 300)')
+    parser.add_argument('--resume', action='store_true',
+                        help='Continue from the checkpoint in --checkpoint-dir if it matches this input and settings')
+    parser.add_argument('--spill-dir', help='Directory for streaming-mode spill files (default: system temp dir)')
+    parser.add_argument('--blocking', default=','.join(DEFAULT_STRATEGIES),
+                        help=f"Comma-separated blocking strategies ({', '.join(BLOCKING_STRATEGIES)}) or 'none' to compare every pair")
+    parser.add_argument('--window', type=int, default=10, help='Sorted-neighborhood window size')
+    parser.add_argument('--prefix-length', type=int, default=4, help='Name-token prefix length for name_prefix blocking')
+    parser.add_argument('--max-block-size', type=int, default=1000, help='Skip key blocks larger than this')
+    parser.add_argument('--geo-radius', type=float, metavar='KM',
+                        help='Spell out street types, locate leads offline and never match leads farther '
+                             'apart than KM by similarity. Without --postal-centroids leads are only placed '
+                             'at their provincial capital or province, which rules out other cities and '
+                             'provinces, not distant streets')
+    parser.add_argument('--postal-centroids', metavar='FILE',
+                        help='Postal code centroids for --geo-radius, needed by --blocking geo: GeoNames '
+                             'postal code dump (e.g. ES.txt) or CSV with postal_code,latitude,longitude')
+    parser.add_argument('--prefilter', choices=['none', 'vector'], default='none',
+                        help='vector: reject hopeless pairs in NumPy batches before exact scoring (needs numpy)')
+    parser.add_argument('--metrics', metavar='FILE',
+                        help='Write per-stage timings, peak memory and counters as JSON (traces memory, slower)')
+    parser.add_argument('--profile', metavar='FILE', help='Write a cProfile dump of the pair comparison loop')
+
+def configure_deduplicator(deduplicator: LeadDeduplicator, args: argparse.Namespace,
+                           parser: argparse.ArgumentParser) -> None:
+    """Apply the options added by add_dedup_arguments"""
+    deduplicator.name_similarity_threshold = args.name_threshold
+    deduplicator.address_similarity_threshold = args.address_threshold
+    deduplicator.similarity_backend = args.similarity
+    deduplicator.workers = args.workers
+    deduplicator.clusters_file = args.clusters
+    
+    if args.memory_limit:
+        try:
+            deduplicator.memory_limit = parse_memory_limit(args.memory_limit)
+        except ValueError as e:
+            parser.error(str(e))
+        deduplicator.spill_dir = args.spill_dir
+    
+    if args.resume and not args.checkpoint_dir:
+        parser.error('--resume needs --checkpoint-dir')
+    if args.checkpoint_dir:
+        if args.memory_limit:
+            parser.error('--checkpoint-dir cannot be combined with --memory-limit')
+        deduplicator.checkpoint_dir = args.checkpoint_dir
+        deduplicator.checkpoint_interval = args.checkpoint_interval
+        deduplicator.resume = args.resume
+    
+    if args.against:
+        if args.memory_limit:
+            parser.error('--against cannot be combined with --memory-limit')
+        deduplicator.index_dir = args.against
+    
+    strategies = [name.strip() for name in args.blocking.split(',') if name.strip()]
+    if strategies == ['none']:
+        strategies = []
+    for strategy in strategies:
+        if strategy not in BLOCKING_STRATEGIES:
+            parser.error(f"unknown blocking strategy: {strategy}")
+    deduplicator.blocking_strategies = strategies
+    
+    if args.geo_radius is not None and args.geo_radius <= 0:
+        parser.error('--geo-radius must be positive')
+    if 'geo' in strategies and args.geo_radius is None:
+        parser.error('--blocking geo needs --geo-radius')
+    if 'geo' in strategies and not args.postal_centroids:
+        # Capital and province centroids are far coarser than any match radius
+        parser.error('--blocking geo needs --postal-centroids to place leads closely enough')
+    if args.postal_centroids and args.geo_radius is None:
+        parser.error('--postal-centroids needs --geo-radius')
+    if args.geo_radius is not None and args.against:
+        # Index leads carry no location to filter on
+        parser.error('--geo-radius cannot be combined with --against')
+    if args.postal_centroids and not Path(args.postal_centroids).exists():
+        parser.error(f"postal centroids file not found: {args.postal_centroids}")
+    deduplicator.geo_radius = args.geo_radius
+    deduplicator.postal_centroids = args.postal_centroids
+    deduplicator.blocking_window = args.window
+    deduplicator.blocking_prefix_length = args.prefix_length
+    deduplicator.max_block_size = args.max_block_size
+    
+    if args.prefilter == 'vector':
+        if not HAS_NUMPY:
+            parser.error('--prefilter vector needs NumPy (pip install numpy)')
+        deduplicator.vector_prefilter = True
+    deduplicator.metrics = RunMetrics(trace_memory=bool(args.metrics), profile_file=args.profile)
 
 def main():
     parser = argparse.ArgumentParser(description='Deduplicate leads from CSV file')
     parser.add_argument('input_file', help='Input CSV file with leads')
     parser.add_argument('--output', '-o', help='Output CSV file (default: input_file.deduplicated.csv)')
     parser.add_argument('--report', '-r', help='Report file (default: input_file.duplicates_report.txt)')
-    parser.add_argument('--name-threshold', type=float, default=0.85, help='Name similarity threshold (0.0-1.0)')
-    parser.add_argument('--address-threshold', type=float, default=0.80, help='Address similarity threshold (0.0-1.0)')
+    add_dedup_arguments(parser)
     
     args = parser.parse_args()
     
     deduplicator = LeadDeduplicator(args.input_file, args.output, args.report)
-    deduplicator.name_similarity_threshold = args.name_threshold
-    deduplicator.address_similarity_threshold = args.address_threshold
+    configure_deduplicator(deduplicator, args, parser)
     
     deduplicator.deduplicate()
+    deduplicator.metrics.write(args.metrics)
 
 if __name__ == '__main__':
-    main() 
\ No newline at end of file
+    main()
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Candidate Blocking for RitterFinder Lead Deduplication
+Restricts fuzzy comparisons to leads that share a cheap blocking key
+instead of comparing every candidate against every other one.
+"""
+
+import re
+from array import array
+from bisect import bisect_right
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from lead_geo import GeoGrid
+
+POSTAL_CODE_PATTERN = re.compile(r'\b(\d{5})\b')
+STREET_NUMBER_PATTERN = re.compile(r'\b(\d{1,4})\b')
+
+# Blocking strategies available from the command line
+BLOCKING_STRATEGIES = ['postal_code', 'province', 'state', 'address', 'name_prefix', 'sorted_neighborhood', 'geo']
+DEFAULT_STRATEGIES = ['name_prefix', 'sorted_neighborhood', 'address']
+
+
+class BlockingRecord:
+    """Minimal view of a lead needed to compute blocking keys
+
+    Any object exposing index, name, tokens, address, state and point (such
+    as LeadFeatures) can be passed to CandidateBlocker in its place.
+    """
+    __slots__ = ('index', 'name', 'tokens', 'address', 'state', 'point')
+
+    def __init__(self, index: int, name: str, address: str, state: str = "", point=None):
+        self.index = index
+        self.name = name
+        self.tokens = frozenset(name.split())
+        self.address = address or ""
+        self.state = state or ""
+        self.point = point
+
+
+def postal_code_keys(record: BlockingRecord) -> List[str]:
+    """Block on the 5-digit postal code found in the address"""
+    match = POSTAL_CODE_PATTERN.search(record.address)
+    return [match.group(1)] if match else []
+
+
+def province_keys(record: BlockingRecord) -> List[str]:
+    """Block on the province, i.e. the first two digits of the postal code"""
+    match = POSTAL_CODE_PATTERN.search(record.address)
+    return [match.group(1)[:2]] if match else []
+
+
+def state_keys(record: BlockingRecord) -> List[str]:
+    """Block on the resolved province (the state column), which also covers addresses without a postal code"""
+    return [record.state] if record.state else []
+
+
+def address_keys(record: BlockingRecord) -> List[str]:
+    """Block on the postal code together with each street number, i.e. on the building
+
+    Short names leave too few characters for name keys to survive a typo,
+    but the same business listed twice usually keeps its address.
+    """
+    match = POSTAL_CODE_PATTERN.search(record.address)
+    if not match:
+        return []
+    numbers = set(STREET_NUMBER_PATTERN.findall(record.address))
+    return sorted(f"{match.group(1)}/{number}" for number in numbers)
+
+
+def name_prefix_keys(record: BlockingRecord, prefix_length: int = 4) -> List[str]:
+    """Block on the prefix and suffix of every name token
+
+    A single typo or a dropped space can break one affix of one token, but
+    not every affix of every token, so near-identical names still meet.
+    """
+    keys = set()
+    for token in record.tokens:
+        keys.add(token[:prefix_length])
+        keys.add(f"~{token[-prefix_length:]}")
+    return sorted(keys)
+
+
+class CandidateBlocker:
+    """Builds the set of candidate pairs that the similarity pass must score"""
+
+    def __init__(self, strategies: Optional[List[str]] = None, window: int = 10,
+                 prefix_length: int = 4, max_block_size: int = 1000, geo_radius: float = 1.0):
+        self.strategies = list(strategies) if strategies is not None else list(DEFAULT_STRATEGIES)
+        for strategy in self.strategies:
+            if strategy not in BLOCKING_STRATEGIES:
+                raise ValueError(f"Unknown blocking strategy: {strategy}")
+
+        self.window = window
+        self.prefix_length = prefix_length
+        self.max_block_size = max_block_size
+        # Distance in km within which the geo strategy pairs located leads
+        self.geo_radius = geo_radius
+
+        self.stats = {
+            'candidates': 0,
+            'exhaustive_pairs': 0,
+            'candidate_pairs': 0,
+            'pruned_pairs': 0,
+            'oversized_blocks': 0,
+            'geo_unplaced': 0,
+            'strategies': {}
+        }
+
+    def block_keys(self, strategy: str, record: BlockingRecord) -> List[str]:
+        """Return the blocking keys of a record for a key-based strategy"""
+        if strategy == 'postal_code':
+            return postal_code_keys(record)
+        if strategy == 'province':
+            return province_keys(record)
+        if strategy == 'state':
+            return state_keys(record)
+        if strategy == 'address':
+            return address_keys(record)
+        if strategy == 'name_prefix':
+            return name_prefix_keys(record, self.prefix_length)
+        return []
+
+    def block_neighbors(self, strategy: str,
+                        records: List[BlockingRecord]) -> Callable[[int, BlockingRecord], Set[int]]:
+        """Index the blocks of a key-based strategy; return a lookup of each record's later block mates"""
+        blocks: Dict[str, List[int]] = {}
+        for record in records:
+            for key in self.block_keys(strategy, record):
+                blocks.setdefault(key, []).append(record.index)
+
+        useful = {}
+        for key, members in blocks.items():
+            if len(members) < 2:
+                continue
+            if len(members) > self.max_block_size:
+                # Too common to be a useful key; sorted neighborhood still covers it
+                self.stats['oversized_blocks'] += 1
+                continue
+            useful[key] = members
+        del blocks
+
+        def neighbors(position: int, record: BlockingRecord) -> Set[int]:
+            found = set()
+            for key in self.block_keys(strategy, record):
+                members = useful.get(key)
+                if members:
+                    # Members were appended in index order
+                    found.update(members[bisect_right(members, record.index):])
+            return found
+
+        return neighbors
+
+    def geo_neighbors(self, records: List[BlockingRecord]) -> Callable[[int, BlockingRecord], Set[int]]:
+        """Grid-index located records; return a lookup of each record's later neighbours
+
+        Records without a postal code centroid are only placed at their
+        capital or province, which says nothing about who their neighbours
+        are, so they fall back to postal code blocks among themselves.
+        """
+        grid = GeoGrid(self.geo_radius)
+        unplaced = [record for record in records if not grid.add(record.index, record.point)]
+        self.stats['geo_unplaced'] = len(unplaced)
+        fallback = self.block_neighbors('postal_code', unplaced)
+
+        def neighbors(position: int, record: BlockingRecord) -> Set[int]:
+            if not grid.covers(record.point):
+                return fallback(position, record)
+            return {index for index in grid.near(record.point) if index > record.index}
+
+        return neighbors
+
+    def window_neighbors(self, records: List[BlockingRecord]) -> Callable[[int, BlockingRecord], Set[int]]:
+        """Sort the records for the sliding window; return a lookup of each record's later neighbors
+
+        Two orders are used, one over the names and one over the reversed
+        names, so a typo near the start of a name does not push it out of
+        its neighbors' window.
+        """
+        orders = []
+        for sort_key in (lambda position: (records[position].name, records[position].index),
+                         lambda position: (records[position].name[::-1], records[position].index)):
+            ordered = array('q', sorted(range(len(records)), key=sort_key))
+            rank = array('q', bytes(8 * len(records)))
+            for place, position in enumerate(ordered):
+                rank[position] = place
+            orders.append((ordered, rank))
+
+        window = self.window
+
+        def neighbors(position: int, record: BlockingRecord) -> Set[int]:
+            found = set()
+            for ordered, rank in orders:
+                place = rank[position]
+                for other in ordered[max(0, place - window + 1):place + window]:
+                    if other > position:
+                        found.add(records[other].index)
+            return found
+
+        return neighbors
+
+    def iter_candidate_pairs(self, records: Iterable[BlockingRecord]) -> Iterator[Tuple[int, int]]:
+        """Yield the union of pairs proposed by every configured strategy, sorted
+
+        Pairs are produced one record at a time from the blocks, so the pair
+        set (which outgrows the leads themselves on large inputs) is never
+        held in memory. The blocks are built before this returns; the pair
+        counts in stats are complete once the iterator is exhausted.
+        """
+        records = sorted(records, key=lambda record: record.index)
+        n = len(records)
+        exhaustive = n * (n - 1) // 2
+
+        self.stats['candidates'] = n
+        self.stats['exhaustive_pairs'] = exhaustive
+
+        lookups = []
+        for strategy in self.strategies:
+            if strategy == 'sorted_neighborhood':
+                neighbors = self.window_neighbors(records)
+            elif strategy == 'geo':
+                neighbors = self.geo_neighbors(records)
+            else:
+                neighbors = self.block_neighbors(strategy, records)
+            self.stats['strategies'][strategy] = {'pairs': 0, 'pruned': exhaustive}
+            lookups.append((self.stats['strategies'][strategy], neighbors))
+
+        return self.generate_pairs(records, lookups, exhaustive)
+
+    def generate_pairs(self, records: List[BlockingRecord], lookups: List[Tuple[Dict[str, int], Callable]],
+                       exhaustive: int) -> Iterator[Tuple[int, int]]:
+        total = 0
+        for position, record in enumerate(records):
+            found = set()
+            for strategy_stats, neighbors in lookups:
+                strategy_found = neighbors(position, record)
+                strategy_stats['pairs'] += len(strategy_found)
+                found |= strategy_found
+
+            total += len(found)
+            for idx2 in sorted(found):
+                yield record.index, idx2
+
+        for strategy_stats, _ in lookups:
+            strategy_stats['pruned'] = exhaustive - strategy_stats['pairs']
+        self.stats['candidate_pairs'] = total
+        self.stats['pruned_pairs'] = exhaustive - total
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Checkpoints for Long RitterFinder Dedup Runs
+Saves the normalized features once and, periodically during pair scoring,
+the scoring cursor, the fuzzy edges merged so far and the comparison count,
+so a killed run can continue with --resume instead of starting over.
+
+Every file carries a fingerprint of the input file and the matching
+settings; a checkpoint is only resumed when the fingerprint still matches.
+Files are written to a temporary name and renamed into place, so a run
+killed mid-write leaves the previous checkpoint intact.
+
+Layout of a checkpoint directory:
+  features.pickle   normalized LeadFeatures of every input row
+  progress.pickle   pair cursor, fuzzy edges and pairs compared
+"""
+
+import os
+import pickle
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class Checkpoint:
+    """Reads and writes the checkpoint files of one dedup run"""
+
+    def __init__(self, directory: str, fingerprint: Dict[str, Any], interval: float = 300.0):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.fingerprint = fingerprint
+        self.interval = interval
+        self.last_saved = time.monotonic()
+        self.saves = 0
+
+    def path(self, name: str) -> Path:
+        return self.directory / f"{name}.pickle"
+
+    def write(self, name: str, payload: Any) -> None:
+        path = self.path(name)
+        temporary = path.with_suffix('.tmp')
+        with open(temporary, 'wb') as f:
+            pickle.dump({'fingerprint': self.fingerprint, 'payload': payload}, f,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, path)
+        self.last_saved = time.monotonic()
+        self.saves += 1
+
+    def read(self, name: str) -> Optional[Any]:
+        """Payload of a checkpoint file, or None if missing or from another run"""
+        path = self.path(name)
+        if not path.exists():
+            return None
+        with open(path, 'rb') as f:
+            stored = pickle.load(f)
+        if stored.get('fingerprint') != self.fingerprint:
+            return None
+        return stored['payload']
+
+    def save_features(self, features: List) -> None:
+        self.write('features', features)
+
+    def load_features(self) -> Optional[List]:
+        return self.read('features')
+
+    def due(self) -> bool:
+        """Whether the save interval has passed since the last checkpoint"""
+        return time.monotonic() - self.last_saved >= self.interval
+
+    def save_progress(self, cursor: int, edges: List[Tuple[int, int, str]], pairs_compared: int) -> None:
+        self.write('progress', {'cursor': cursor, 'edges': edges, 'pairs_compared': pairs_compared})
+
+    def load_progress(self) -> Optional[Dict[str, Any]]:
+        return self.read('progress')
+
+    def clear(self) -> None:
+        """Remove the checkpoint files after a completed run"""
+        for name in ('features', 'progress'):
+            self.path(name).unlink(missing_ok=True)
+        try:
+            self.directory.rmdir()
+        except OSError:
+            pass
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Cluster Output for RitterFinder Lead Deduplication
+Machine-readable duplicate clusters, written one at a time as they are
+finalized so large runs never hold the whole report. The format follows
+the file extension: .csv writes one row per cluster member, anything else
+writes one JSON object per cluster (JSONL).
+
+A cluster record looks like:
+  {"cluster_id": 1, "rows": [3, 17], "kept_row": 17, "removed_count": 1,
+   "members": [{"row": 3, "kept": false, "reason": "similar_name_address: 0.91/0.88",
+                "name_score": 0.91, "address_score": 0.88, "company_name": ...}, ...]}
+
+Row numbers are 1-based data rows of the input CSV (the header is row 0).
+Scores are the name and address similarity with the kept lead that the
+match was decided on; they are null where no similarity was scored (the
+kept lead itself, exact-key matches and members linked via another lead).
+"""
+
+import csv
+import json
+from pathlib import Path
+from typing import Dict, Optional
+
+# Lead fields copied into every member, enough to render the text report
+MEMBER_FIELDS = ['company_name', 'phone', 'company_website', 'address', 'data_quality_score']
+
+CSV_HEADERS = ['cluster_id', 'row', 'kept_row', 'kept', 'reason', 'name_score', 'address_score'] + MEMBER_FIELDS
+
+
+def is_csv_output(path: Path) -> bool:
+    return Path(path).suffix.lower() == '.csv'
+
+
+class ClusterWriter:
+    """Streams cluster records to a JSONL or CSV file"""
+
+    def __init__(self, output_file: str):
+        self.output_file = Path(output_file)
+        self.csv = is_csv_output(self.output_file)
+        self.file = open(self.output_file, 'w', newline='' if self.csv else None, encoding='utf-8')
+        self.writer = None
+        if self.csv:
+            self.writer = csv.writer(self.file)
+            self.writer.writerow(CSV_HEADERS)
+        self.clusters = 0
+
+    def write(self, record: Dict) -> None:
+        self.clusters += 1
+        if not self.csv:
+            self.file.write(json.dumps(record, ensure_ascii=False) + '\n')
+            return
+
+        for member in record['members']:
+            self.writer.writerow(
+                [record['cluster_id'], member['row'], record['kept_row'], int(member['kept']),
+                 member['reason'] or '', format_score(member['name_score']),
+                 format_score(member['address_score'])]
+                + ['' if member[field] is None else member[field] for field in MEMBER_FIELDS]
+            )
+
+    def close(self) -> None:
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def format_score(score: Optional[float]) -> str:
+    return '' if score is None else f"{score:.4f}"
+
+
+def build_member(row: int, lead: Dict[str, str], kept: bool, reason: Optional[str],
+                 name_score: Optional[float] = None, address_score: Optional[float] = None) -> Dict:
+    """One member entry of a cluster record"""
+    member = {
+        'row': row,
+        'kept': kept,
+        'reason': reason,
+        'name_score': None if name_score is None else round(name_score, 4),
+        'address_score': None if address_score is None else round(address_score, 4)
+    }
+    for field in MEMBER_FIELDS:
+        member[field] = lead.get(field)
+    return member
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Row Byte Ranges of Lead CSVs for RitterFinder Lead Deduplication
+Reads a lead CSV through mmap and remembers where every row starts and
+ends in the file. The deduplicator only keeps the columns it matches and
+scores on; kept rows are copied from the mapped input to the output as
+the input's own bytes, so the output stage neither re-parses nor
+re-encodes them. Rows are found by the csv module, so quoted fields
+spanning lines and blank lines are read the way csv.DictReader reads them.
+"""
+
+import csv
+import mmap
+from array import array
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+
+class LineFeed:
+    """Lines of a buffer for csv.reader, tracking how far it has read"""
+
+    def __init__(self, buffer, position: int = 0):
+        self.buffer = buffer
+        self.position = position
+
+    def __iter__(self) -> 'LineFeed':
+        return self
+
+    def __next__(self) -> str:
+        start = self.position
+        if start >= len(self.buffer):
+            raise StopIteration
+        end = self.buffer.find(b'\n', start)
+        self.position = len(self.buffer) if end < 0 else end + 1
+        return self.buffer[start:self.position].decode('utf-8')
+
+
+class CsvRowIndex:
+    """A CSV file mapped into memory, with the byte range of each row read"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.file = open(self.path, 'rb')
+        try:
+            self.buffer = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # An empty file cannot be mapped
+            self.buffer = b''
+        self.view = memoryview(self.buffer)
+
+        feed = LineFeed(self.buffer)
+        self.fieldnames: List[str] = next(csv.reader(feed), [])
+        self.header_end = feed.position
+        # Appended to a last row the input left unterminated
+        self.line_ending = b'\r\n' if self.buffer[:self.header_end].endswith(b'\r\n') else b'\n'
+
+        # Byte range of every row read by read(), by row index
+        self.starts = array('q')
+        self.ends = array('q')
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def positions(self, columns: Sequence[str]) -> List[Tuple[str, int]]:
+        """(column, position) of the named columns the header has"""
+        return [(column, self.fieldnames.index(column)) for column in columns if column in self.fieldnames]
+
+    @staticmethod
+    def select(values: List[str], positions: List[Tuple[str, int]]) -> Dict[str, str]:
+        """A row's values as a dict of the given columns, '' where the row is short"""
+        return {column: values[position] if position < len(values) else '' for column, position in positions}
+
+    def scan(self) -> Iterator[Tuple[int, int, List[str]]]:
+        """Yield (start, end, values) of every data row, skipping blank lines"""
+        feed = LineFeed(self.buffer, self.header_end)
+        reader = csv.reader(feed)
+        while True:
+            start = feed.position
+            values = next(reader, None)
+            if values is None:
+                return
+            if values:
+                yield start, feed.position, values
+
+    def read(self, columns: Sequence[str]) -> Iterator[Dict[str, str]]:
+        """Yield every row as a dict of only these columns, indexing its byte range"""
+        positions = self.positions(columns)
+        for start, end, values in self.scan():
+            self.starts.append(start)
+            self.ends.append(end)
+            yield self.select(values, positions)
+
+    def row(self, row_id: int) -> Dict[str, str]:
+        """Every column of an indexed row"""
+        values = next(csv.reader(LineFeed(self.buffer[self.starts[row_id]:self.ends[row_id]])), [])
+        return self.select(values, [(column, position) for position, column in enumerate(self.fieldnames)])
+
+    def write_header(self, output: BinaryIO) -> None:
+        output.write(self.view[:self.header_end])
+        if self.header_end and self.buffer[self.header_end - 1] != ord('\n'):
+            output.write(self.line_ending)
+
+    def write_range(self, start: int, end: int, output: BinaryIO) -> None:
+        """Copy the row in [start, end) of the input as is"""
+        output.write(self.view[start:end])
+        if self.buffer[end - 1] != ord('\n'):
+            output.write(self.line_ending)
+
+    def copy_rows(self, row_ids: Iterable[int], output: BinaryIO) -> None:
+        """Write the header and the indexed rows, in the order given"""
+        self.write_header(output)
+        starts = self.starts
+        ends = self.ends
+        for row_id in row_ids:
+            self.write_range(starts[row_id], ends[row_id], output)
+
+    def close(self) -> None:
+        self.view.release()
+        if isinstance(self.buffer, mmap.mmap):
+            self.buffer.close()
+        self.file.close()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Streaming CSV Writers for RitterFinder Lead Conversion
+Keeps one buffered csv.writer per output file, opened the first time a
+row is written to it, so rows can be written as soon as they are produced
+instead of being collected per file first. Only max_open_files files are
+open at once; the least recently used one is closed when another has to
+be opened, and reopened for appending when it gets another row.
+"""
+
+import csv
+import shutil
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+BUFFER_SIZE = 256 * 1024
+
+
+class CsvWriterPool:
+    """Lazily opened, size-capped set of CSV writers sharing one header"""
+
+    def __init__(self, headers: Sequence[str], max_open_files: int = 64, buffer_size: int = BUFFER_SIZE):
+        self.headers = list(headers)
+        self.max_open_files = max(1, max_open_files)
+        self.buffer_size = buffer_size
+        self.open_files: 'OrderedDict[Path, tuple]' = OrderedDict()
+        # Rows written per file, in the order files were first written
+        self.rows: Dict[Path, int] = {}
+        self.reopened = 0
+
+    def writer(self, path: Path):
+        handle = self.open_files.get(path)
+        if handle is not None:
+            self.open_files.move_to_end(path)
+            return handle[1]
+
+        if len(self.open_files) >= self.max_open_files:
+            _, (f, _) = self.open_files.popitem(last=False)
+            f.close()
+
+        new_file = path not in self.rows
+        if not new_file:
+            self.reopened += 1
+        f = open(path, 'w' if new_file else 'a', newline='', encoding='utf-8', buffering=self.buffer_size)
+        writer = csv.writer(f)
+        if new_file:
+            writer.writerow(self.headers)
+            self.rows[path] = 0
+        self.open_files[path] = (f, writer)
+        return writer
+
+    def writerow(self, path: Path, row: List) -> None:
+        """Append a row (values in header order) to path"""
+        self.writer(path).writerow(row)
+        self.rows[path] += 1
+
+    def close(self) -> None:
+        while self.open_files:
+            _, (f, _) = self.open_files.popitem(last=False)
+            f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def concatenate_csv(sources: Sequence[Path], output_file: Path) -> None:
+    """Copy the rows of CSV files sharing one header into a single file, byte for byte"""
+    with open(output_file, 'wb') as out:
+        for position, source in enumerate(sources):
+            with open(source, 'rb') as f:
+                header = f.readline()
+                if position == 0:
+                    out.write(header)
+                shutil.copyfileobj(f, out, BUFFER_SIZE)
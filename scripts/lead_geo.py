@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Offline Geo Proximity for RitterFinder Lead Deduplication
+Gives leads approximate coordinates without any network lookup. The
+postal code of the address is looked up in a postal-code centroid table
+(--postal-centroids, e.g. the GeoNames ES postal code dump). Codes not in
+the table fall back to bundled centroids: a code whose third digit is 0
+belongs to the provincial capital, any other code (or a lead with only a
+province) to the province as a whole.
+
+Every point carries how far off it may be, so a coarse fallback can only
+rule out pairs that are far apart however the points are placed: a lead
+placed at its capital (10 km) or province (150 km) is told apart from leads
+in other cities or provinces, never from its neighbours across Madrid or
+Barcelona. Only postal code centroids locate leads closely enough for
+proximity matching; GeoGrid buckets those leads into cells of the match
+radius, so the geo blocking strategy only proposes pairs of neighbours.
+"""
+
+import csv
+import math
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from lead_provinces import POSTAL_CODE_PATTERN, POSTAL_PROVINCES
+
+# (latitude, longitude, accuracy in km)
+GeoPoint = Tuple[float, float, float]
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+# How far a lead may be from the centroid it was placed at
+POSTAL_ACCURACY_KM = 2.0
+CITY_ACCURACY_KM = 10.0
+PROVINCE_ACCURACY_KM = 150.0
+
+# Provincial capital of each postal prefix
+CAPITAL_CENTROIDS = {
+    '01': (42.85, -2.67), '02': (38.99, -1.86), '03': (38.35, -0.48), '04': (36.84, -2.46),
+    '05': (40.66, -4.70), '06': (38.88, -6.97), '07': (39.57, 2.65), '08': (41.39, 2.17),
+    '09': (42.34, -3.70), '10': (39.47, -6.37), '11': (36.53, -6.29), '12': (39.99, -0.05),
+    '13': (38.99, -3.93), '14': (37.89, -4.78), '15': (43.36, -8.41), '16': (40.07, -2.14),
+    '17': (41.98, 2.82), '18': (37.18, -3.60), '19': (40.63, -3.17), '20': (43.32, -1.98),
+    '21': (37.26, -6.95), '22': (42.14, -0.41), '23': (37.77, -3.79), '24': (42.60, -5.57),
+    '25': (41.62, 0.62), '26': (42.47, -2.45), '27': (43.01, -7.56), '28': (40.42, -3.70),
+    '29': (36.72, -4.42), '30': (37.99, -1.13), '31': (42.81, -1.64), '32': (42.34, -7.86),
+    '33': (43.36, -5.85), '34': (42.01, -4.53), '35': (28.12, -15.43), '36': (42.43, -8.64),
+    '37': (40.97, -5.66), '38': (28.46, -16.25), '39': (43.46, -3.81), '40': (40.95, -4.12),
+    '41': (37.39, -5.99), '42': (41.76, -2.46), '43': (41.12, 1.25), '44': (40.34, -1.11),
+    '45': (39.86, -4.03), '46': (39.47, -0.38), '47': (41.65, -4.72), '48': (43.26, -2.93),
+    '49': (41.50, -5.75), '50': (41.65, -0.89), '51': (35.89, -5.32), '52': (35.29, -2.94)
+}
+
+# Canonical province name (as resolve_state returns it) -> postal prefix
+PROVINCE_PREFIXES = {province: prefix for prefix, province in POSTAL_PROVINCES.items()}
+
+
+def distance_km(point1: GeoPoint, point2: GeoPoint) -> float:
+    """Great-circle distance between two points"""
+    lat1, lon1 = math.radians(point1[0]), math.radians(point1[1])
+    lat2, lon2 = math.radians(point2[0]), math.radians(point2[1])
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def far_apart(point1: Optional[GeoPoint], point2: Optional[GeoPoint], radius_km: float) -> bool:
+    """Whether two leads are farther apart than radius_km wherever they are within their accuracy"""
+    if point1 is None or point2 is None or point1 is point2:
+        return False
+    reach = radius_km + point1[2] + point2[2]
+    # Degrees of latitude have the same length everywhere, a lower bound without trigonometry
+    if abs(point1[0] - point2[0]) * KM_PER_DEGREE > reach:
+        return True
+    return distance_km(point1, point2) > reach
+
+
+class PostalGeocoder:
+    """Approximate coordinates of leads from their postal code or province"""
+
+    def __init__(self, centroids_file: Optional[str] = None):
+        # Postal code -> (latitude, longitude)
+        self.postal: Dict[str, Tuple[float, float]] = {}
+        if centroids_file:
+            self.load(Path(centroids_file))
+        # One shared tuple per centroid, so leads placed alike compare by identity
+        self.points: Dict[Tuple[str, float], GeoPoint] = {}
+        self.stats = {'postal': 0, 'city': 0, 'province': 0, 'unlocated': 0}
+
+    def load(self, path: Path) -> None:
+        """Read a GeoNames postal code dump (tab-separated) or a postal_code,latitude,longitude CSV"""
+        sums: Dict[str, List[float]] = {}
+        with open(path, 'r', newline='', encoding='utf-8') as f:
+            tab_separated = '\t' in f.readline()
+            f.seek(0)
+            if tab_separated:
+                # country, postal code, place, 6 admin columns, latitude, longitude, accuracy
+                rows = ((row[1], row[9], row[10]) for row in csv.reader(f, delimiter='\t') if len(row) > 10)
+            else:
+                rows = ((row['postal_code'], row['latitude'], row['longitude']) for row in csv.DictReader(f))
+
+            for code, latitude, longitude in rows:
+                code = code.strip()
+                try:
+                    point = (float(latitude), float(longitude))
+                except ValueError:
+                    continue
+                # A code listed for several places sits at their mean
+                total = sums.setdefault(code, [0.0, 0.0, 0])
+                total[0] += point[0]
+                total[1] += point[1]
+                total[2] += 1
+
+        self.postal = {code: (lat / count, lon / count) for code, (lat, lon, count) in sums.items()}
+
+    def locate(self, address: str, state: str = '') -> Optional[GeoPoint]:
+        """Approximate location of a lead from its address and resolved province"""
+        code = None
+        for match in POSTAL_CODE_PATTERN.finditer(address):
+            if match.group(1)[:2] in CAPITAL_CENTROIDS:
+                code = match.group(1)
+                break
+
+        if code:
+            if code in self.postal:
+                self.stats['postal'] += 1
+                return self.point(code, self.postal[code], POSTAL_ACCURACY_KM)
+            if code[2] == '0':
+                # XX0YY codes belong to the provincial capital
+                self.stats['city'] += 1
+                return self.point(code[:2], CAPITAL_CENTROIDS[code[:2]], CITY_ACCURACY_KM)
+
+        prefix = code[:2] if code else PROVINCE_PREFIXES.get(state)
+        if prefix:
+            self.stats['province'] += 1
+            return self.point(prefix, CAPITAL_CENTROIDS[prefix], PROVINCE_ACCURACY_KM)
+
+        self.stats['unlocated'] += 1
+        return None
+
+    def point(self, key: str, centroid: Tuple[float, float], accuracy: float) -> GeoPoint:
+        point = self.points.get((key, accuracy))
+        if point is None:
+            point = self.points[(key, accuracy)] = (centroid[0], centroid[1], accuracy)
+        return point
+
+
+class GeoGrid:
+    """Precisely located records bucketed into cells, for neighbour lookups within a radius"""
+
+    def __init__(self, radius_km: float, max_accuracy_km: float = POSTAL_ACCURACY_KM):
+        self.radius_km = radius_km
+        self.max_accuracy_km = max_accuracy_km
+        # Two points within reach of each other are at most this far apart
+        self.reach_km = radius_km + 2 * max_accuracy_km
+        self.cell_degrees = self.reach_km / KM_PER_DEGREE
+        # (row, column) -> (record index, point) in insertion order
+        self.cells: Dict[Tuple[int, int], List[Tuple[int, GeoPoint]]] = {}
+
+    def cell(self, point: GeoPoint) -> Tuple[int, int]:
+        return math.floor(point[0] / self.cell_degrees), math.floor(point[1] / self.cell_degrees)
+
+    def covers(self, point: Optional[GeoPoint]) -> bool:
+        """Whether a point is precise enough to be indexed"""
+        return point is not None and point[2] <= self.max_accuracy_km
+
+    def add(self, index: int, point: Optional[GeoPoint]) -> bool:
+        """Index a record's point; coarse or missing points are left out"""
+        if not self.covers(point):
+            return False
+        self.cells.setdefault(self.cell(point), []).append((index, point))
+        return True
+
+    def near(self, point: Optional[GeoPoint]) -> List[int]:
+        """Indices of the records that may be within radius_km of a point"""
+        if not self.covers(point):
+            return []
+
+        row, column = self.cell(point)
+        # A degree of longitude shrinks towards the poles
+        columns = math.ceil(1 / max(0.01, math.cos(math.radians(point[0]))))
+        found = []
+        for cell_row in range(row - 1, row + 2):
+            for cell_column in range(column - columns, column + columns + 1):
+                for index, other in self.cells.get((cell_row, cell_column), ()):
+                    if not far_apart(point, other, self.radius_km):
+                        found.append(index)
+        return found
+
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Persistent Dedup Index for RitterFinder Leads
+SQLite index of the exact keys, blocking keys and normalized features of an
+already-deduplicated corpus, so a new batch only has to be checked against
+it instead of being re-deduplicated together with the whole corpus.
+
+Key blocks larger than max_block_size are skipped, as in batch runs. Sorted
+neighborhood takes their place the same way: the similarity candidates are
+kept sorted by name and by reversed name in SQLite indexes, and a lookup
+compares the window of leads on either side of the new lead's name.
+
+The scorer settings of the last batch run are kept with the blocking
+settings, so dedup-lookup-service.py judges pairs the way that run did.
+
+Layout of an index directory:
+  index.sqlite   exact keys, blocking keys and features of every corpus lead
+  leads.csv      the corpus rows themselves; SQLite row_id N is data row N
+"""
+
+import csv
+import json
+import sqlite3
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from lead_blocking import CandidateBlocker
+from lead_clustering import EXACT_KEYS
+from lead_normalizer import LeadFeatures
+
+# Lead CSV columns as convert-json-to-csv.py writes them, the header of a corpus started from JSON leads
+CORPUS_COLUMNS = [
+    'company_name', 'email', 'verified_email', 'phone', 'verified_phone',
+    'company_website', 'verified_website', 'address', 'state', 'country',
+    'activity', 'description', 'category', 'data_quality_score', 'created_at'
+]
+
+# Geo blocking needs the leads' locations, which the index does not store
+INDEXABLE_STRATEGIES = ['postal_code', 'province', 'state', 'address', 'name_prefix', 'sorted_neighborhood']
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS leads (
+    row_id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    address TEXT NOT NULL,
+    phone TEXT NOT NULL,
+    website TEXT NOT NULL,
+    email TEXT NOT NULL,
+    cif TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT '',
+    reversed_name TEXT NOT NULL DEFAULT ''
+);
+CREATE TABLE IF NOT EXISTS exact_keys (
+    key_name TEXT NOT NULL,
+    value TEXT NOT NULL,
+    row_id INTEGER NOT NULL,
+    PRIMARY KEY (key_name, value)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS block_keys (
+    key TEXT NOT NULL,
+    row_id INTEGER NOT NULL,
+    PRIMARY KEY (key, row_id)
+) WITHOUT ROWID;
+"""
+
+# Name orders of the similarity candidates, for sorted neighborhood lookups
+NAME_INDEXES = """
+CREATE INDEX IF NOT EXISTS leads_by_name ON leads (name) WHERE phone = '' AND website = '';
+CREATE INDEX IF NOT EXISTS leads_by_reversed_name ON leads (reversed_name) WHERE phone = '' AND website = '';
+"""
+
+
+class LeadIndex:
+    """On-disk index of a deduplicated lead corpus"""
+
+    def __init__(self, directory: str, strategies: Optional[Sequence[str]] = None,
+                 prefix_length: int = 4, max_block_size: int = 1000, window: int = 10,
+                 threaded: bool = False):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.db_file = self.directory / 'index.sqlite'
+        self.corpus_file = self.directory / 'leads.csv'
+
+        # threaded: the connection may be used from several threads, one at a time
+        self.connection = sqlite3.connect(str(self.db_file), check_same_thread=not threaded)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.executescript(SCHEMA)
+        self.upgrade_schema()
+        self.connection.executescript(NAME_INDEXES)
+
+        # Blocking settings are fixed when the index is created
+        settings = self.get_meta('blocking')
+        if settings is None:
+            requested = strategies if strategies is not None else INDEXABLE_STRATEGIES
+            settings = {
+                'strategies': [name for name in requested if name in INDEXABLE_STRATEGIES],
+                'prefix_length': prefix_length,
+                'max_block_size': max_block_size,
+                'window': window
+            }
+            self.set_meta('blocking', settings)
+            self.connection.commit()
+
+        self.strategies = settings['strategies']
+        self.max_block_size = settings['max_block_size']
+        self.window = settings.get('window', 10)
+        self.blocker = CandidateBlocker(self.strategies, prefix_length=settings['prefix_length'],
+                                        max_block_size=self.max_block_size)
+        self.fieldnames = self.read_corpus_header()
+
+        self.stats = {
+            'lookups': 0,
+            'exact_matches': 0,
+            'fuzzy_matches': 0,
+            'fuzzy_comparisons': 0,
+            'oversized_keys': 0,
+            'added': 0
+        }
+
+    def upgrade_schema(self) -> None:
+        """Add the columns that indexes created before them lack"""
+        columns = {row[1] for row in self.connection.execute('PRAGMA table_info(leads)')}
+        if 'state' not in columns:
+            self.connection.execute("ALTER TABLE leads ADD COLUMN state TEXT NOT NULL DEFAULT ''")
+        if 'reversed_name' not in columns:
+            self.connection.execute("ALTER TABLE leads ADD COLUMN reversed_name TEXT NOT NULL DEFAULT ''")
+            self.connection.create_function('reverse', 1, lambda text: text[::-1], deterministic=True)
+            self.connection.execute('UPDATE leads SET reversed_name = reverse(name)')
+            self.connection.commit()
+
+    def get_meta(self, key: str):
+        row = self.connection.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set_meta(self, key: str, value) -> None:
+        self.connection.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)',
+                                (key, json.dumps(value)))
+
+    def scorer_settings(self) -> Optional[List]:
+        """PairScorer arguments of the last batch run against the index"""
+        return self.get_meta('scorer')
+
+    def set_scorer_settings(self, settings: Sequence) -> None:
+        self.set_meta('scorer', list(settings))
+
+    def read_corpus_header(self) -> Optional[List[str]]:
+        if not self.corpus_file.exists():
+            return None
+        with open(self.corpus_file, 'r', newline='', encoding='utf-8') as f:
+            return next(csv.reader(f), None)
+
+    def __len__(self) -> int:
+        return self.connection.execute('SELECT COUNT(*) FROM leads').fetchone()[0]
+
+    def block_keys(self, features: LeadFeatures) -> List[str]:
+        """Blocking keys of a lead, prefixed with their strategy"""
+        keys = []
+        for strategy in self.strategies:
+            keys.extend(f"{strategy}:{key}" for key in self.blocker.block_keys(strategy, features))
+        return keys
+
+    def find_exact(self, features: LeadFeatures) -> Optional[Tuple[int, str]]:
+        """Return (row_id, reason) of a corpus lead sharing an exact key"""
+        exact_keys = features.exact_keys
+        for key_name in EXACT_KEYS:
+            value = exact_keys[key_name]
+            if not value:
+                continue
+            row = self.connection.execute(
+                'SELECT row_id FROM exact_keys WHERE key_name = ? AND value = ?', (key_name, value)
+            ).fetchone()
+            if row:
+                return row[0], f"identical_{key_name}: {value}"
+        return None
+
+    def neighbor_rows(self, features: LeadFeatures) -> List[int]:
+        """Similarity candidates within the window on either side of the lead's name and reversed name"""
+        rows = []
+        for column, name in (('name', features.name), ('reversed_name', features.name[::-1])):
+            for comparison, order in (('<', 'DESC'), ('>=', 'ASC')):
+                rows.extend(row for (row,) in self.connection.execute(
+                    f"SELECT row_id FROM leads WHERE phone = '' AND website = '' AND {column} {comparison} ? "
+                    f"ORDER BY {column} {order} LIMIT ?", (name, self.window)
+                ))
+        return rows
+
+    def candidate_rows(self, features: LeadFeatures) -> List[int]:
+        """Corpus rows sharing a blocking key, skipping keys too common to be useful"""
+        rows = set()
+        for key in self.block_keys(features):
+            members = [row for (row,) in self.connection.execute(
+                'SELECT row_id FROM block_keys WHERE key = ? LIMIT ?', (key, self.max_block_size + 1)
+            )]
+            if len(members) > self.max_block_size:
+                self.stats['oversized_keys'] += 1
+                continue
+            rows.update(members)
+        if 'sorted_neighborhood' in self.strategies:
+            rows.update(self.neighbor_rows(features))
+        return sorted(rows)
+
+    def load_features(self, row_ids: List[int]) -> List[LeadFeatures]:
+        features = []
+        for start in range(0, len(row_ids), 500):
+            chunk = row_ids[start:start + 500]
+            placeholders = ','.join('?' * len(chunk))
+            for row in self.connection.execute(
+                    f'SELECT row_id, name, address, phone, website, email, cif, state FROM leads '
+                    f'WHERE row_id IN ({placeholders}) ORDER BY row_id', chunk):
+                features.append(LeadFeatures(*row))
+        return features
+
+    def find_duplicate(self, features: LeadFeatures, scorer) -> Optional[Tuple[int, str]]:
+        """Return (row_id, reason) of the corpus lead this lead duplicates, if any"""
+        self.stats['lookups'] += 1
+
+        match = self.find_exact(features)
+        if match:
+            self.stats['exact_matches'] += 1
+            return match
+
+        if not features.needs_similarity:
+            return None
+
+        for existing in self.load_features(self.candidate_rows(features)):
+            if not existing.needs_similarity:
+                continue
+            self.stats['fuzzy_comparisons'] += 1
+            is_dup, reason = scorer.is_duplicate(existing, features)
+            if is_dup:
+                self.stats['fuzzy_matches'] += 1
+                return existing.index, reason
+        return None
+
+    def add(self, features: LeadFeatures) -> int:
+        """Index a new corpus lead and return its row_id"""
+        cursor = self.connection.execute(
+            'INSERT INTO leads (name, address, phone, website, email, cif, state, reversed_name) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            (features.name, features.address, features.phone, features.website, features.email, features.cif,
+             features.state, features.name[::-1])
+        )
+        row_id = cursor.lastrowid
+
+        self.connection.executemany(
+            'INSERT OR IGNORE INTO exact_keys (key_name, value, row_id) VALUES (?, ?, ?)',
+            [(key_name, value, row_id) for key_name, value in features.exact_keys.items() if value]
+        )
+        if features.needs_similarity:
+            self.connection.executemany(
+                'INSERT OR IGNORE INTO block_keys (key, row_id) VALUES (?, ?)',
+                [(key, row_id) for key in self.block_keys(features)]
+            )
+
+        self.stats['added'] += 1
+        return row_id
+
+    def append_corpus(self, fieldnames: List[str], leads: List[Dict[str, str]]) -> None:
+        """Append surviving rows to the corpus CSV, keeping its existing header"""
+        if not leads:
+            return
+
+        new_file = self.fieldnames is None
+        if new_file:
+            self.fieldnames = list(fieldnames)
+
+        with open(self.corpus_file, 'a', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=self.fieldnames, extrasaction='ignore')
+            if new_file:
+                writer.writeheader()
+            writer.writerows(leads)
+
+    def commit(self) -> None:
+        self.connection.commit()
+
+    def close(self) -> None:
+        self.connection.commit()
+        self.connection.close()
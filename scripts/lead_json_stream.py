@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Incremental JSON Reading for RitterFinder Scrape Files
+Yields the records of a scrape file one at a time, so a dump of several GB
+never has to fit in memory. Two layouts are read:
+
+  .json             a top-level array of records (or a single record object),
+                    decoded element by element from fixed-size text chunks
+  .jsonl / .ndjson  one record per line (JSON Lines)
+"""
+
+import json
+import re
+from pathlib import Path
+from typing import Any, Iterator, TextIO
+
+JSON_SUFFIXES = ['.json', '.jsonl', '.ndjson']
+JSON_LINES_SUFFIXES = ['.jsonl', '.ndjson']
+
+CHUNK_SIZE = 1024 * 1024
+# A record this large is taken as a malformed file rather than read to the end
+MAX_RECORD_SIZE = 64 * 1024 * 1024
+
+WHITESPACE_PATTERN = re.compile(r'[ \t\n\r]*')
+
+
+class JsonArrayReader:
+    """Decodes the elements of a top-level JSON array from a text stream"""
+
+    def __init__(self, f: TextIO, chunk_size: int = CHUNK_SIZE):
+        self.file = f
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buffer = ''
+        self.position = 0
+        # Characters dropped from the front of the buffer, for error offsets
+        self.consumed = 0
+        self.eof = False
+
+    def read_more(self) -> bool:
+        """Append the next chunk to the unread part of the buffer; False at end of file"""
+        if self.eof:
+            return False
+        # Reads grow with a long pending value, so re-decoding it stays linear overall
+        chunk = self.file.read(max(self.chunk_size, len(self.buffer) - self.position))
+        if not chunk:
+            self.eof = True
+            return False
+
+        self.consumed += self.position
+        self.buffer = self.buffer[self.position:] + chunk
+        self.position = 0
+        return True
+
+    def peek(self) -> str:
+        """Skip whitespace and return the next character ('' at end of file)"""
+        while True:
+            self.position = WHITESPACE_PATTERN.match(self.buffer, self.position).end()
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+            if not self.read_more():
+                return ''
+
+    def error(self, message: str) -> ValueError:
+        return ValueError(f"{message} at character {self.consumed + self.position}")
+
+    def decode_value(self) -> Any:
+        """Decode the value starting at the current position, reading more text as needed"""
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.position)
+            except json.JSONDecodeError as e:
+                # The value may just be cut off by the end of the chunk
+                if len(self.buffer) - self.position < MAX_RECORD_SIZE and self.read_more():
+                    continue
+                raise self.error(f"Invalid JSON ({e.msg})") from None
+
+            # A number or literal ending the buffer may continue in the next chunk
+            if end == len(self.buffer) and self.read_more():
+                continue
+
+            self.position = end
+            return value
+
+    def __iter__(self) -> Iterator[Any]:
+        """Yield the array elements, or the value itself if it is a single object"""
+        first = self.peek()
+        if first == '{':
+            yield self.decode_value()
+        elif first == '[':
+            self.position += 1
+            if self.peek() == ']':
+                self.position += 1
+            else:
+                while True:
+                    yield self.decode_value()
+
+                    separator = self.peek()
+                    if separator not in (',', ']'):
+                        raise self.error("Expecting ',' or ']'")
+                    self.position += 1
+                    if separator == ']':
+                        break
+                    self.peek()
+        elif first == '':
+            raise self.error("Empty JSON file")
+        else:
+            raise self.error("Expected a JSON array or object")
+
+        if self.peek():
+            raise self.error("Extra data after the top-level value")
+
+
+def iter_json_lines(f: TextIO) -> Iterator[Any]:
+    """Yield one decoded value per non-blank line"""
+    for line_number, line in enumerate(f, 1):
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON on line {line_number} ({e.msg})") from None
+
+
+def is_json_lines(path: Path) -> bool:
+    return Path(path).suffix.lower() in JSON_LINES_SUFFIXES
+
+
+def iter_json_records(path: Path, chunk_size: int = CHUNK_SIZE) -> Iterator[Any]:
+    """Yield the records of a .json, .jsonl or .ndjson scrape file one at a time"""
+    with open(path, 'r', encoding='utf-8') as f:
+        if is_json_lines(path):
+            yield from iter_json_lines(f)
+        else:
+            yield from JsonArrayReader(f, chunk_size)
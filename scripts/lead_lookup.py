@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+In-Memory Dedup Lookups for RitterFinder Leads
+Loads a persistent dedup index (lead_index, as built by
+deduplicate-leads.py --against) into dicts and arrays once, so a resident
+process can answer "is this lead a duplicate, and of which lead?" without
+a SQLite query per key. Lookups follow LeadIndex.find_duplicate exactly;
+inserts are written through to the index so it stays usable by batch runs.
+"""
+
+from array import array
+from bisect import bisect_left, insort
+from typing import Dict, List, Optional, Tuple
+
+from lead_clustering import EXACT_KEYS
+from lead_index import LeadIndex
+from lead_normalizer import LeadFeatures
+
+
+class MemoryLeadIndex:
+    """A LeadIndex held in memory for low-latency lookups"""
+
+    def __init__(self, index: LeadIndex):
+        self.index = index
+        self.blocker = index.blocker
+        self.max_block_size = index.max_block_size
+
+        self.features: Dict[int, LeadFeatures] = {}
+        # key_name -> value -> row_id of the first lead with that value
+        self.exact: Dict[str, Dict[str, int]] = {key_name: {} for key_name in EXACT_KEYS}
+        # "strategy:key" -> row_ids in ascending order
+        self.blocks: Dict[str, array] = {}
+        # (name, row_id) and (reversed name, row_id) of the similarity candidates, sorted
+        self.by_name: List[Tuple[str, int]] = []
+        self.by_reversed_name: List[Tuple[str, int]] = []
+
+        self.stats = {
+            'lookups': 0,
+            'exact_matches': 0,
+            'fuzzy_matches': 0,
+            'fuzzy_comparisons': 0,
+            'oversized_keys': 0,
+            'added': 0
+        }
+        self.load()
+
+    def load(self) -> None:
+        connection = self.index.connection
+        for row in connection.execute('SELECT row_id, name, address, phone, website, email, cif, state FROM leads'):
+            features = self.features[row[0]] = LeadFeatures(*row)
+            if features.needs_similarity:
+                self.by_name.append((features.name, features.index))
+                self.by_reversed_name.append((features.name[::-1], features.index))
+        self.by_name.sort()
+        self.by_reversed_name.sort()
+        for key_name, value, row_id in connection.execute('SELECT key_name, value, row_id FROM exact_keys'):
+            self.exact.setdefault(key_name, {})[value] = row_id
+        for key, row_id in connection.execute('SELECT key, row_id FROM block_keys'):
+            members = self.blocks.get(key)
+            if members is None:
+                members = self.blocks[key] = array('q')
+            members.append(row_id)
+        # block_keys is stored by (key, row_id), so every block is already in row order
+
+    def __len__(self) -> int:
+        return len(self.features)
+
+    def find_exact(self, features: LeadFeatures) -> Optional[Tuple[int, str]]:
+        exact_keys = features.exact_keys
+        for key_name in EXACT_KEYS:
+            value = exact_keys[key_name]
+            if not value:
+                continue
+            row_id = self.exact[key_name].get(value)
+            if row_id is not None:
+                return row_id, f"identical_{key_name}: {value}"
+        return None
+
+    def neighbor_rows(self, features: LeadFeatures) -> List[int]:
+        """LeadIndex.neighbor_rows over the sorted name lists"""
+        rows = []
+        window = self.index.window
+        for ordered, name in ((self.by_name, features.name), (self.by_reversed_name, features.name[::-1])):
+            place = bisect_left(ordered, (name,))
+            rows.extend(row_id for _, row_id in ordered[max(0, place - window):place + window])
+        return rows
+
+    def candidate_rows(self, features: LeadFeatures) -> List[int]:
+        rows = set()
+        for key in self.index.block_keys(features):
+            members = self.blocks.get(key)
+            if members is None:
+                continue
+            if len(members) > self.max_block_size:
+                self.stats['oversized_keys'] += 1
+                continue
+            rows.update(members)
+        if 'sorted_neighborhood' in self.index.strategies:
+            rows.update(self.neighbor_rows(features))
+        return sorted(rows)
+
+    def find_duplicate(self, features: LeadFeatures, scorer) -> Optional[Tuple[int, str]]:
+        """Return (row_id, reason) of the indexed lead this lead duplicates, if any"""
+        self.stats['lookups'] += 1
+
+        match = self.find_exact(features)
+        if match:
+            self.stats['exact_matches'] += 1
+            return match
+
+        if not features.needs_similarity:
+            return None
+
+        for row_id in self.candidate_rows(features):
+            existing = self.features[row_id]
+            if not existing.needs_similarity:
+                continue
+            self.stats['fuzzy_comparisons'] += 1
+            is_dup, reason = scorer.is_duplicate(existing, features)
+            if is_dup:
+                self.stats['fuzzy_matches'] += 1
+                return row_id, reason
+        return None
+
+    def add(self, features: LeadFeatures) -> int:
+        """Index a new lead on disk and in memory; return its row_id (commit separately)"""
+        row_id = self.index.add(features)
+        self.features[row_id] = LeadFeatures(row_id, features.name, features.address, features.phone,
+                                             features.website, features.email, features.cif, features.state)
+
+        for key_name, value in features.exact_keys.items():
+            if value:
+                self.exact[key_name].setdefault(value, row_id)
+        if features.needs_similarity:
+            for key in set(self.index.block_keys(features)):
+                members = self.blocks.get(key)
+                if members is None:
+                    members = self.blocks[key] = array('q')
+                members.append(row_id)
+            insort(self.by_name, (features.name, row_id))
+            insort(self.by_reversed_name, (features.name[::-1], row_id))
+
+        self.stats['added'] += 1
+        return row_id
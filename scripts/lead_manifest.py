@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Conversion Manifest for RitterFinder Lead Conversion
+Remembers, for every scrape file converted, its size, mtime and SHA-256
+together with the CSV rows it produced, so a later run only re-parses the
+files that changed and rebuilds the outputs they feed.
+
+Layout of the cache directory (inside the converter's output directory):
+  manifest.json     one entry per input file name
+  <input>.csv       the leads converted from <input>, with the CSV header
+
+A file counts as unchanged when its size and mtime match its entry, or
+when only the mtime differs but the content hash still matches. Entries
+are dropped when the CSV headers change.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+CACHE_DIR_NAME = '.conversion_cache'
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ConversionManifest:
+    """Per-input fingerprints and cached leads of earlier conversions"""
+
+    def __init__(self, directory: Path, headers: Sequence[str]):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.path = self.directory / 'manifest.json'
+        self.headers = list(headers)
+        self.entries: Dict[str, Dict[str, Any]] = {}
+
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                stored = json.load(f)
+            if stored.get('headers') == self.headers:
+                self.entries = stored.get('files', {})
+
+    def cache_file(self, name: str) -> Path:
+        return self.directory / f"{name}.csv"
+
+    def check(self, path: Path) -> Tuple[bool, Dict[str, Any]]:
+        """Return whether path is unchanged since it was recorded, and its fingerprint"""
+        stat = path.stat()
+        entry = self.entries.get(path.name)
+        fingerprint = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': None}
+
+        if entry is None or entry['size'] != stat.st_size or (
+                entry['leads'] and not self.cache_file(path.name).exists()):
+            fingerprint['sha256'] = file_sha256(path)
+            return False, fingerprint
+
+        if entry['mtime_ns'] == stat.st_mtime_ns:
+            return True, dict(entry)
+
+        # Touched but possibly not modified
+        fingerprint['sha256'] = file_sha256(path)
+        if fingerprint['sha256'] != entry['sha256']:
+            return False, fingerprint
+        entry['mtime_ns'] = stat.st_mtime_ns
+        return True, dict(entry)
+
+    def leads(self, name: str) -> int:
+        return self.entries[name]['leads']
+
+    def record(self, name: str, fingerprint: Dict[str, Any], category: str, leads: int) -> None:
+        self.entries[name] = {
+            'size': fingerprint['size'],
+            'mtime_ns': fingerprint['mtime_ns'],
+            'sha256': fingerprint['sha256'],
+            'category': category,
+            'leads': leads
+        }
+
+    def forget(self, name: str) -> Optional[Dict[str, Any]]:
+        """Drop a file's entry and cached leads, returning the old entry"""
+        self.cache_file(name).unlink(missing_ok=True)
+        return self.entries.pop(name, None)
+
+    def forget_missing(self, names: Sequence[str]) -> List[Dict[str, Any]]:
+        """Drop the entries of inputs that no longer exist"""
+        present = set(names)
+        return [self.forget(name) for name in list(self.entries) if name not in present]
+
+    def clear(self) -> None:
+        for name in list(self.entries):
+            self.forget(name)
+
+    def save(self) -> None:
+        temporary = self.path.with_suffix('.tmp')
+        with open(temporary, 'w', encoding='utf-8') as f:
+            json.dump({'headers': self.headers, 'files': self.entries}, f, indent=2, ensure_ascii=False)
+        os.replace(temporary, self.path)
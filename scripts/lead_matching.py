@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Pair Matching for RitterFinder Lead Deduplication
+Decides whether two normalized leads are duplicates, either in-process or
+spread over a pool of worker processes that only receive the compact
+name/address features of the similarity candidates.
+"""
+
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from lead_geo import far_apart
+from lead_similarity import SimilarityEngine
+
+
+class PairScorer:
+    """Duplicate decision rules for a pair of LeadFeatures-like records"""
+
+    def __init__(self, name_threshold: float = 0.85, address_threshold: float = 0.80,
+                 very_similar_name_threshold: float = 0.95, backend: str = 'sequence',
+                 geo_radius: Optional[float] = None):
+        self.name_threshold = name_threshold
+        self.address_threshold = address_threshold
+        self.very_similar_name_threshold = very_similar_name_threshold
+        self.engine = SimilarityEngine(backend)
+        # Leads located farther apart than this (km) never match by similarity
+        self.geo_radius = geo_radius
+        self.stats = {'geo_rejects': 0}
+
+    def settings(self) -> Tuple[float, float, float, str, Optional[float]]:
+        """Constructor arguments that rebuild this scorer"""
+        return (self.name_threshold, self.address_threshold, self.very_similar_name_threshold,
+                self.engine.backend, self.geo_radius)
+
+    def far_apart(self, point1, point2) -> bool:
+        """Geographic filter run before the similarity rules"""
+        if self.geo_radius is None or not far_apart(point1, point2, self.geo_radius):
+            return False
+        self.stats['geo_rejects'] += 1
+        return True
+
+    def is_duplicate(self, features1, features2) -> Tuple[bool, str]:
+        """Check if two leads are duplicates and return reason"""
+        return self.match(features1, features2)[:2]
+
+    def match(self, features1, features2) -> Tuple[bool, str, Optional[float], Optional[float]]:
+        """is_duplicate plus the name and address scores behind a similarity match"""
+
+        # Exact phone match (strongest indicator)
+        if features1.phone and features1.phone == features2.phone:
+            return True, f"identical_phone: {features1.phone}", None, None
+
+        # Exact website match (strong indicator)
+        if features1.website and features1.website == features2.website:
+            return True, f"identical_website: {features1.website}", None, None
+
+        if self.far_apart(features1.point, features2.point):
+            return False, "", None, None
+
+        return self.similar(features1.name, features1.address, features2.name, features2.address)
+
+    def is_similar(self, name1: str, address1: str, name2: str, address2: str) -> Tuple[bool, str]:
+        """Name and address similarity rules"""
+        return self.similar(name1, address1, name2, address2)[:2]
+
+    def similar(self, name1: str, address1: str, name2: str,
+                address2: str) -> Tuple[bool, str, Optional[float], Optional[float]]:
+        """is_similar plus the name and address scores it matched on"""
+        if not name1 or not name2:
+            return False, "", None, None
+
+        # Early-exits as soon as the threshold can no longer be reached
+        name_sim = self.engine.score_at_least(name1, name2, self.name_threshold)
+        if name_sim is None:
+            return False, "", None, None
+
+        # If names are very similar, check address too
+        if address1 and address2:
+            addr_sim = self.engine.score_at_least(address1, address2, self.address_threshold)
+            if addr_sim is not None:
+                return True, f"similar_name_address: {name_sim:.2f}/{addr_sim:.2f}", name_sim, addr_sim
+
+        # Very high name similarity alone
+        if name_sim >= self.very_similar_name_threshold:
+            return True, f"very_similar_name: {name_sim:.2f}", name_sim, None
+
+        return False, "", None, None
+
+
+# Per-process state of pool workers, set once by the pool initializer
+_worker_scorer: Optional[PairScorer] = None
+_worker_features: Dict[int, Tuple] = {}
+
+
+def _init_worker(scorer_settings: Tuple[float, float, float, str, Optional[float]],
+                 features: Dict[int, Tuple]) -> None:
+    global _worker_scorer, _worker_features
+    _worker_scorer = PairScorer(*scorer_settings)
+    _worker_features = features
+
+
+def _score_chunk(pairs: List[Tuple[int, int]]) -> Tuple[int, List[Tuple[int, int, str]], int, float,
+                                                        Dict[str, int], Dict[str, int]]:
+    """Score a chunk of candidate pairs inside a worker process"""
+    start = time.perf_counter()
+    before = dict(_worker_scorer.engine.stats)
+    before_scorer = dict(_worker_scorer.stats)
+
+    matches = []
+    for idx1, idx2 in pairs:
+        name1, address1, point1 = _worker_features[idx1]
+        name2, address2, point2 = _worker_features[idx2]
+        if _worker_scorer.far_apart(point1, point2):
+            continue
+        is_dup, reason = _worker_scorer.is_similar(name1, address1, name2, address2)
+        if is_dup:
+            matches.append((idx1, idx2, reason))
+
+    engine_stats = {key: value - before[key] for key, value in _worker_scorer.engine.stats.items()}
+    scorer_stats = {key: value - before_scorer[key] for key, value in _worker_scorer.stats.items()}
+    return os.getpid(), matches, len(pairs), time.perf_counter() - start, engine_stats, scorer_stats
+
+
+def chunked(pairs: Iterable[Tuple[int, int]], chunk_size: int) -> Iterator[List[Tuple[int, int]]]:
+    iterator = iter(pairs)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class ParallelPairScorer:
+    """Scores candidate pairs across a process pool with deterministic output"""
+
+    def __init__(self, scorer: PairScorer, workers: int, chunk_size: int = 20000):
+        self.scorer = scorer
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.worker_stats: Dict[int, Dict[str, float]] = {}
+
+    def score_chunks(self, features: Dict[int, Tuple],
+                     pairs: Iterable[Tuple[int, int]]) -> Iterator[Tuple[List[Tuple[int, int]],
+                                                                      List[Tuple[int, int, str]]]]:
+        """Yield (pairs, matches) per chunk, in the order of pairs
+
+        features maps each candidate row index to its normalized
+        (name, address, point); pairs must only reference those indices.
+        """
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                 initargs=(self.scorer.settings(), features)) as pool:
+            # At most two chunks per worker are in flight, so pairs are drawn from
+            # the iterator as workers free up instead of all being queued at once
+            chunks = chunked(pairs, self.chunk_size)
+            pending = deque((chunk, pool.submit(_score_chunk, chunk)) for chunk in islice(chunks, 2 * self.workers))
+
+            while pending:
+                chunk, future = pending.popleft()
+                for next_chunk in islice(chunks, 1):
+                    pending.append((next_chunk, pool.submit(_score_chunk, next_chunk)))
+
+                # Results are taken in submission order, whichever worker finishes first
+                pid, chunk_matches, count, elapsed, engine_stats, scorer_stats = future.result()
+                worker = self.worker_stats.setdefault(pid, {'chunks': 0, 'pairs': 0, 'seconds': 0.0})
+                worker['chunks'] += 1
+                worker['pairs'] += count
+                worker['seconds'] += elapsed
+
+                for key, value in engine_stats.items():
+                    self.scorer.engine.stats[key] += value
+                for key, value in scorer_stats.items():
+                    self.scorer.stats[key] += value
+
+                yield chunk, chunk_matches
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Run Metrics for RitterFinder Lead Scripts
+Per-stage wall time, CPU time and peak traced memory plus work counters,
+written as one JSON document (--metrics), and an optional cProfile dump
+scoped to the hot loop (--profile).
+
+Stages may nest and may be entered repeatedly; repeated entries accumulate.
+Memory is only traced when asked for, since tracemalloc slows Python code
+down noticeably.
+"""
+
+import cProfile
+import json
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+class RunMetrics:
+    """Collects stage timings and counters for one run"""
+
+    def __init__(self, trace_memory: bool = False, profile_file: Optional[str] = None):
+        self.trace_memory = trace_memory
+        self.profile_file = Path(profile_file) if profile_file else None
+        self.profiler = cProfile.Profile() if profile_file else None
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self.counters: Dict[str, int] = {}
+        self.stack: List[List] = []
+        self.peak_traced = 0
+        self.started_wall = time.perf_counter()
+        self.started_cpu = time.process_time()
+
+    def start(self) -> None:
+        """Reset the run clocks and begin tracing memory if requested"""
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self.started_wall = time.perf_counter()
+        self.started_cpu = time.process_time()
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time a stage; its peak memory also counts towards enclosing stages"""
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            peak = tracemalloc.get_traced_memory()[1]
+            self.peak_traced = max(self.peak_traced, peak)
+            if self.stack:
+                self.stack[-1][1] = max(self.stack[-1][1], peak)
+            tracemalloc.reset_peak()
+
+        # [name, peak seen so far by finished children]
+        frame = [name, 0]
+        self.stack.append(frame)
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall
+            cpu = time.process_time() - cpu
+            self.stack.pop()
+
+            stage = self.stages.setdefault(name, {
+                'calls': 0, 'wall_seconds': 0.0, 'cpu_seconds': 0.0, 'peak_traced_bytes': None
+            })
+            stage['calls'] += 1
+            stage['wall_seconds'] += wall
+            stage['cpu_seconds'] += cpu
+
+            if tracing:
+                peak = max(frame[1], tracemalloc.get_traced_memory()[1])
+                stage['peak_traced_bytes'] = max(stage['peak_traced_bytes'] or 0, peak)
+                self.peak_traced = max(self.peak_traced, peak)
+                if self.stack:
+                    self.stack[-1][1] = max(self.stack[-1][1], peak)
+
+    @contextmanager
+    def profile(self):
+        """Profile the enclosed hot loop when a profile file was requested"""
+        if self.profiler is None:
+            yield
+            return
+
+        self.profiler.enable()
+        try:
+            yield
+        finally:
+            self.profiler.disable()
+
+    def count(self, name: str, value: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def set_counters(self, counters: Dict[str, int], prefix: str = '') -> None:
+        """Record absolute counter values, e.g. a stats dict at the end of a run"""
+        for name, value in counters.items():
+            self.counters[f"{prefix}{name}"] = value
+
+    def to_dict(self) -> Dict:
+        document = {
+            'wall_seconds': round(time.perf_counter() - self.started_wall, 6),
+            'cpu_seconds': round(time.process_time() - self.started_cpu, 6),
+            'peak_traced_bytes': None,
+            'peak_rss_bytes': None,
+            'stages': {},
+            'counters': dict(sorted(self.counters.items()))
+        }
+
+        if tracemalloc.is_tracing():
+            document['peak_traced_bytes'] = max(self.peak_traced, tracemalloc.get_traced_memory()[1])
+        if resource is not None:
+            # ru_maxrss is in kilobytes on Linux and bytes on macOS
+            maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            document['peak_rss_bytes'] = maxrss * (1 if sys.platform == 'darwin' else 1024)
+
+        for name, stage in self.stages.items():
+            document['stages'][name] = {
+                'calls': stage['calls'],
+                'wall_seconds': round(stage['wall_seconds'], 6),
+                'cpu_seconds': round(stage['cpu_seconds'], 6),
+                'peak_traced_bytes': stage['peak_traced_bytes']
+            }
+        return document
+
+    def write(self, metrics_file: Optional[str]) -> None:
+        """Write the metrics JSON and, if profiling, the cProfile dump"""
+        if metrics_file:
+            with open(metrics_file, 'w', encoding='utf-8') as f:
+                json.dump(self.to_dict(), f, indent=2)
+            print(f"📏 Metrics written to {metrics_file}")
+
+        if self.profiler is not None:
+            self.profiler.dump_stats(str(self.profile_file))
+            print(f"📏 Profile written to {self.profile_file} (inspect with python3 -m pstats)")
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Lead Normalization for RitterFinder
+Shared cleaning and normalization rules used by convert-json-to-csv.py and
+deduplicate-leads.py, plus the compact per-lead feature record that the
+deduplicator compares instead of raw CSV rows.
+"""
+
+import re
+from typing import Dict, Optional
+
+from lead_provinces import resolve_province
+
+# Business suffixes stripped from names, applied in this order
+BUSINESS_SUFFIX_PATTERNS = [
+    re.compile(r'\s+(sl|sa|slu|sll|s\.l\.|s\.a\.|s\.l\.u\.|s\.l\.l\.)'),
+    re.compile(r'\s+(ltd|ltd\.|limited|inc|inc\.|corp|corp\.)'),
+    re.compile(r'\s+(sociedad limitada|sociedad anonima)'),
+    re.compile(r'\s+(empresa|company|compañia|cia|cia\.)')
+]
+NON_WORD_PATTERN = re.compile(r'[^\w\s]')
+WHITESPACE_PATTERN = re.compile(r'\s+')
+NON_DIGIT_PATTERN = re.compile(r'[^\d]')
+SPAIN_PREFIX_PATTERN = re.compile(r'^\+34')
+URL_PREFIX_PATTERN = re.compile(r'^https?://(www\.)?')
+URL_TAIL_PATTERN = re.compile(r'[/?].*$')
+UTM_PATTERN = re.compile(r'\?utm_.*$')
+NON_CIF_PATTERN = re.compile(r'[^0-9A-Z]')
+
+# Street types as written out, keyed by their abbreviations as normalize_text leaves them ('C/' -> 'c')
+STREET_TYPES = {
+    'c': 'calle', 'cl': 'calle', 'cll': 'calle', 'calle': 'calle',
+    'av': 'avenida', 'avd': 'avenida', 'avda': 'avenida', 'avenida': 'avenida',
+    'pl': 'plaza', 'pza': 'plaza', 'plza': 'plaza', 'plaza': 'plaza',
+    'p': 'paseo', 'pº': 'paseo', 'po': 'paseo', 'pso': 'paseo', 'paseo': 'paseo',
+    'ctra': 'carretera', 'crta': 'carretera', 'carretera': 'carretera',
+    'rda': 'ronda', 'ronda': 'ronda',
+    'cno': 'camino', 'camino': 'camino',
+    'trav': 'travesía', 'trva': 'travesía', 'travesia': 'travesía', 'travesía': 'travesía',
+    'gta': 'glorieta', 'glorieta': 'glorieta',
+    'pje': 'pasaje', 'psje': 'pasaje', 'pasaje': 'pasaje',
+    'urb': 'urbanización', 'urbanizacion': 'urbanización', 'urbanización': 'urbanización'
+}
+# Dropped between the street type and the street name ('Calle de la Paz' -> 'calle paz')
+STREET_PARTICLES = {'de', 'del', 'la', 'las', 'los', 'el'}
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text for comparison"""
+    if not text:
+        return ""
+
+    text = text.lower().strip()
+
+    for pattern in BUSINESS_SUFFIX_PATTERNS:
+        text = pattern.sub('', text)
+
+    # Remove extra spaces and special characters
+    text = NON_WORD_PATTERN.sub(' ', text)
+    return WHITESPACE_PATTERN.sub(' ', text).strip()
+
+
+def normalize_street(address: str) -> str:
+    """Spell out the street type of a normalize_text address: 'c mayor 5' -> 'calle mayor 5'"""
+    tokens = address.split(' ')
+    street_type = STREET_TYPES.get(tokens[0])
+    if street_type is None:
+        return address
+
+    rest = 1
+    while rest < len(tokens) - 1 and tokens[rest] in STREET_PARTICLES:
+        rest += 1
+    return ' '.join([street_type] + tokens[rest:])
+
+
+def normalize_phone(phone: str) -> str:
+    """Normalize phone number for comparison"""
+    if not phone:
+        return ""
+
+    digits = NON_DIGIT_PATTERN.sub('', phone)
+
+    # Remove country code if present
+    if digits.startswith('34') and len(digits) == 11:
+        digits = digits[2:]
+
+    return digits
+
+
+def normalize_website(website: str) -> str:
+    """Normalize website URL for comparison (bare domain, no protocol or path)"""
+    if not website:
+        return ""
+
+    website = URL_PREFIX_PATTERN.sub('', website.lower())
+    return URL_TAIL_PATTERN.sub('', website)
+
+
+def normalize_email(email: str) -> str:
+    """Normalize email address for comparison"""
+    if not email:
+        return ""
+
+    return email.strip().lower()
+
+
+def normalize_cif(cif: str) -> str:
+    """Normalize CIF/NIF tax id for comparison"""
+    if not cif:
+        return ""
+
+    return NON_CIF_PATTERN.sub('', cif.upper())
+
+
+def clean_phone(phone: str) -> Optional[str]:
+    """Clean and format a scraped phone number for the leads table"""
+    if not phone or phone.upper() == 'N/A':
+        return None
+
+    phone = SPAIN_PREFIX_PATTERN.sub('', phone.strip())
+    phone = NON_DIGIT_PATTERN.sub('', phone)
+
+    # Spanish phone validation (9 digits)
+    if len(phone) == 9 and phone[0] in '6789':
+        return f"+34{phone}"
+
+    return phone if phone else None
+
+
+def clean_website(website: str) -> Optional[str]:
+    """Clean a scraped website URL for the leads table"""
+    if not website or website.upper() == 'N/A':
+        return None
+
+    website = website.strip()
+    if not website.startswith(('http://', 'https://')):
+        website = f"https://{website}"
+
+    # Remove UTM parameters
+    return UTM_PATTERN.sub('', website)
+
+
+class LeadFeatures:
+    """Normalized values of one lead, computed once at load time"""
+    __slots__ = ('index', 'name', 'tokens', 'address', 'phone', 'website', 'email', 'cif', 'state', 'point')
+
+    def __init__(self, index: int, name: str, address: str, phone: str,
+                 website: str, email: str, cif: str, state: str = '', point: Optional[tuple] = None):
+        self.index = index
+        self.name = name
+        # Distinct name tokens, for the name_prefix blocking keys
+        self.tokens = frozenset(name.split())
+        self.address = address
+        self.phone = phone
+        self.website = website
+        self.email = email
+        self.cif = cif
+        self.state = state
+        # (latitude, longitude, accuracy in km) when geo matching is on
+        self.point = point
+
+    @property
+    def exact_keys(self) -> Dict[str, str]:
+        return {'phone': self.phone, 'website': self.website, 'email': self.email, 'cif': self.cif}
+
+    @property
+    def needs_similarity(self) -> bool:
+        """Leads without phone or website can only be matched by similarity"""
+        return not self.phone and not self.website
+
+
+def resolve_state(lead: Dict[str, str]) -> str:
+    """Canonical province of a lead, from its state column or else its address"""
+    return resolve_province(lead.get('state') or '') or resolve_province(lead.get('address') or '') or ''
+
+
+def build_features(index: int, lead: Dict[str, str]) -> LeadFeatures:
+    """Normalize a lead row into its feature record"""
+    return LeadFeatures(
+        index,
+        normalize_text(lead.get('company_name', '')),
+        normalize_text(lead.get('address', '')),
+        normalize_phone(lead.get('phone', '')),
+        normalize_website(lead.get('company_website', '')),
+        normalize_email(lead.get('email', '')),
+        normalize_cif(lead.get('cif', '')),
+        resolve_state(lead)
+    )
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Spanish Province Resolution for RitterFinder Leads
+Maps a free-text address to its province: first through the postal code
+(the first two digits of a Spanish postal code identify one of the 52
+provinces), then through province, capital and large-municipality names
+found in the text.
+
+Names are matched with an Aho-Corasick automaton over the upper-cased,
+accent-folded address, so every name is found in one pass however many
+there are. Only whole words match, and the rightmost match wins, since
+addresses end with the town and province ("Calle Toledo 4, Madrid").
+Results are memoized, as scrapes repeat the same addresses many times.
+"""
+
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+POSTAL_CODE_PATTERN = re.compile(r'\b(\d{5})\b')
+NON_ALNUM_PATTERN = re.compile(r'[^A-Z0-9]+')
+
+# First two digits of the postal code -> province
+POSTAL_PROVINCES = {
+    '01': 'Álava', '02': 'Albacete', '03': 'Alicante', '04': 'Almería', '05': 'Ávila',
+    '06': 'Badajoz', '07': 'Baleares', '08': 'Barcelona', '09': 'Burgos', '10': 'Cáceres',
+    '11': 'Cádiz', '12': 'Castellón', '13': 'Ciudad Real', '14': 'Córdoba', '15': 'A Coruña',
+    '16': 'Cuenca', '17': 'Girona', '18': 'Granada', '19': 'Guadalajara', '20': 'Guipúzcoa',
+    '21': 'Huelva', '22': 'Huesca', '23': 'Jaén', '24': 'León', '25': 'Lleida',
+    '26': 'La Rioja', '27': 'Lugo', '28': 'Madrid', '29': 'Málaga', '30': 'Murcia',
+    '31': 'Navarra', '32': 'Ourense', '33': 'Asturias', '34': 'Palencia', '35': 'Las Palmas',
+    '36': 'Pontevedra', '37': 'Salamanca', '38': 'Santa Cruz de Tenerife', '39': 'Cantabria',
+    '40': 'Segovia', '41': 'Sevilla', '42': 'Soria', '43': 'Tarragona', '44': 'Teruel',
+    '45': 'Toledo', '46': 'Valencia', '47': 'Valladolid', '48': 'Vizcaya', '49': 'Zamora',
+    '50': 'Zaragoza', '51': 'Ceuta', '52': 'Melilla'
+}
+
+# Other names of a province and its larger municipalities, by postal prefix
+PLACE_NAMES = {
+    '01': ['Araba', 'Vitoria', 'Gasteiz'],
+    '03': ['Alacant', 'Elche', 'Elx', 'Torrevieja', 'Orihuela', 'Benidorm', 'Alcoy', 'Alcoi'],
+    '04': ['Roquetas de Mar', 'El Ejido'],
+    '06': ['Mérida', 'Don Benito'],
+    '07': ['Illes Balears', 'Islas Baleares', 'Palma de Mallorca', 'Mallorca', 'Menorca',
+           'Ibiza', 'Eivissa', 'Formentera'],
+    '08': ['Hospitalet de Llobregat', "L'Hospitalet", 'Badalona', 'Terrassa', 'Sabadell',
+           'Mataró', 'Santa Coloma de Gramenet', 'Cornellà', 'Sant Cugat del Vallès', 'Manresa'],
+    '11': ['Jerez de la Frontera', 'Algeciras', 'San Fernando', 'El Puerto de Santa María',
+           'Chiclana de la Frontera', 'La Línea de la Concepción'],
+    '12': ['Castelló', 'Castellón de la Plana', 'Villarreal', 'Vila-real'],
+    '13': ['Puertollano'],
+    '15': ['La Coruña', 'Coruña', 'Santiago de Compostela', 'Ferrol'],
+    '17': ['Gerona', 'Figueres'],
+    '18': ['Motril'],
+    '20': ['Gipuzkoa', 'San Sebastián', 'Donostia', 'Irún'],
+    '24': ['Ponferrada'],
+    '25': ['Lérida'],
+    '26': ['Logroño', 'Rioja'],
+    '28': ['Alcalá de Henares', 'Móstoles', 'Fuenlabrada', 'Leganés', 'Getafe', 'Alcorcón',
+           'Torrejón de Ardoz', 'Parla', 'Alcobendas', 'Las Rozas', 'Pozuelo de Alarcón'],
+    '29': ['Marbella', 'Mijas', 'Fuengirola', 'Vélez-Málaga', 'Torremolinos', 'Benalmádena', 'Estepona'],
+    '30': ['Cartagena', 'Lorca', 'Molina de Segura'],
+    '31': ['Nafarroa', 'Pamplona', 'Iruña', 'Tudela'],
+    '32': ['Orense'],
+    '33': ['Oviedo', 'Gijón', 'Avilés', 'Principado de Asturias'],
+    '35': ['Las Palmas de Gran Canaria', 'Gran Canaria', 'Lanzarote', 'Fuerteventura',
+           'Telde', 'Arrecife'],
+    '36': ['Vigo', 'Pontevedra'],
+    '38': ['Tenerife', 'San Cristóbal de La Laguna', 'La Laguna', 'La Palma', 'La Gomera', 'El Hierro'],
+    '39': ['Santander', 'Torrelavega'],
+    '41': ['Dos Hermanas', 'Alcalá de Guadaíra'],
+    '43': ['Reus'],
+    '45': ['Talavera de la Reina'],
+    '46': ['València', 'Torrent', 'Gandía', 'Sagunto', 'Paterna'],
+    '48': ['Bizkaia', 'Bilbao', 'Barakaldo', 'Getxo'],
+    '50': ['Calatayud'],
+}
+
+MEMO_SIZE = 65536
+
+
+def accent_table() -> Dict[int, str]:
+    """Translation of accented Latin letters to their base letter"""
+    table = {}
+    for code in range(0xC0, 0x250):
+        decomposed = unicodedata.normalize('NFKD', chr(code))
+        base = ''.join(char for char in decomposed if not unicodedata.combining(char))
+        if base and base != chr(code):
+            table[code] = base
+    return table
+
+
+ACCENT_TABLE = accent_table()
+
+
+def fold(text: str) -> str:
+    """Upper-case, strip accents and turn every run of other characters into one space"""
+    text = NON_ALNUM_PATTERN.sub(' ', text.upper().translate(ACCENT_TABLE))
+    return f" {text.strip()} "
+
+
+class MultiPatternMatcher:
+    """Aho-Corasick automaton returning the rightmost, then longest, pattern in a text"""
+
+    def __init__(self, patterns: Dict[str, str]):
+        # State 0 is the root; goto[state] maps a character to the next state
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        # Value of the longest pattern ending at each state, own or via failure links
+        self.output: List[Optional[str]] = [None]
+
+        for pattern, value in patterns.items():
+            state = 0
+            for char in pattern:
+                next_state = self.goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self.goto)
+                    self.goto[state][char] = next_state
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append(None)
+                state = next_state
+            self.output[state] = value
+
+        # Breadth-first failure links; a state's own pattern is longer than any inherited one
+        queue = list(self.goto[0].values())
+        for state in queue:
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.goto[fallback].get(char, 0)
+                if self.output[next_state] is None:
+                    self.output[next_state] = self.output[self.fail[next_state]]
+
+    def find_last(self, text: str) -> Optional[str]:
+        """Value of the pattern ending furthest right in text, preferring the longest"""
+        goto, fail, output = self.goto, self.fail, self.output
+        state = 0
+        found = None
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state] is not None:
+                found = output[state]
+        return found
+
+
+def build_matcher() -> MultiPatternMatcher:
+    patterns = {}
+    for prefix, province in POSTAL_PROVINCES.items():
+        for name in [province] + PLACE_NAMES.get(prefix, []):
+            # Surrounding spaces make only whole words match
+            patterns[fold(name)] = province
+    return MultiPatternMatcher(patterns)
+
+
+PLACE_MATCHER = build_matcher()
+
+
+def postal_province(address: str) -> Optional[str]:
+    """Province of the first valid Spanish postal code in the address"""
+    for match in POSTAL_CODE_PATTERN.finditer(address):
+        province = POSTAL_PROVINCES.get(match.group(1)[:2])
+        if province:
+            return province
+    return None
+
+
+@lru_cache(maxsize=MEMO_SIZE)
+def resolve_province(address: str) -> Optional[str]:
+    """Province of a free-text address (or place name), or None if it names none"""
+    if not address:
+        return None
+    return postal_province(address) or PLACE_MATCHER.find_last(fold(address))
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+On-Disk Spill Files for RitterFinder Lead Deduplication
+Partitioned, buffered CSV spill files that let the streaming dedup mode
+group rows by exact key (or by cluster) without holding them in RAM.
+"""
+
+import csv
+import heapq
+import re
+import shutil
+import tempfile
+import zlib
+from contextlib import ExitStack
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+MEMORY_LIMIT_PATTERN = re.compile(r'^\s*(\d+(?:\.\d+)?)\s*([kmgt]?)i?b?\s*$', re.IGNORECASE)
+MEMORY_UNITS = {'': 1, 'k': 1024, 'm': 1024 ** 2, 'g': 1024 ** 3, 't': 1024 ** 4}
+
+
+def parse_memory_limit(value: str) -> int:
+    """Parse sizes like '512M', '2G' or '1500000' into bytes"""
+    match = MEMORY_LIMIT_PATTERN.match(value)
+    if not match:
+        raise ValueError(f"Invalid memory limit: {value}")
+    number, unit = match.groups()
+    return int(float(number) * MEMORY_UNITS[unit.lower()])
+
+
+class PartitionedSpill:
+    """Buffered CSV records appended to N partition files in a temp directory
+
+    Records are buffered in memory and flushed to their partition files
+    whenever the buffered size reaches buffer_bytes, so the spill itself
+    never holds more than that in RAM.
+    """
+
+    def __init__(self, partitions: int, buffer_bytes: int, directory: Optional[str] = None,
+                 prefix: str = 'spill'):
+        self.partitions = max(1, partitions)
+        self.buffer_bytes = max(64 * 1024, buffer_bytes)
+        self.directory = Path(tempfile.mkdtemp(prefix=f'ritterfinder_{prefix}_', dir=directory))
+        self.buffers: List[List[List[str]]] = [[] for _ in range(self.partitions)]
+        self.buffered = 0
+        self.records = 0
+        self.flushes = 0
+
+    def path(self, partition: int) -> Path:
+        return self.directory / f"part_{partition:04d}.csv"
+
+    def add(self, partition: int, fields: List[str]) -> None:
+        self.buffers[partition].append(fields)
+        self.buffered += sum(len(field) for field in fields) + 16 * len(fields)
+        self.records += 1
+        if self.buffered >= self.buffer_bytes:
+            self.flush()
+
+    def flush(self) -> None:
+        """Append every buffered record to its partition file"""
+        for partition, buffer in enumerate(self.buffers):
+            if not buffer:
+                continue
+            with open(self.path(partition), 'a', newline='', encoding='utf-8') as f:
+                csv.writer(f).writerows(buffer)
+            buffer.clear()
+        self.buffered = 0
+        self.flushes += 1
+
+    def read(self, partition: int) -> Iterator[List[str]]:
+        """Iterate the records of one partition in the order they were added"""
+        path = self.path(partition)
+        if not path.exists():
+            return
+        with open(path, 'r', newline='', encoding='utf-8') as f:
+            yield from csv.reader(f)
+
+    def close(self) -> None:
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+class KeySpill(PartitionedSpill):
+    """Hash-partitioned (key, row) spill that yields the rows sharing each key"""
+
+    def __init__(self, partitions: int, buffer_bytes: int, directory: Optional[str] = None):
+        super().__init__(partitions, buffer_bytes, directory, prefix='keys')
+
+    def add_key(self, key_name: str, value: str, row: int) -> None:
+        # crc32 rather than hash() so partitioning is stable across processes
+        partition = zlib.crc32(f"{key_name}:{value}".encode('utf-8')) % self.partitions
+        self.add(partition, [key_name, value, str(row)])
+
+    def shared_key_edges(self, key_rank: Dict[str, int]) -> Iterator[Tuple[int, int, str, str]]:
+        """Yield (first row, row, key_name, value) for every later row of a shared key
+
+        Edges come in (row, key rank) order, the order of the in-memory hash
+        join. Each partition is loaded alone, its edges sorted into a run
+        file, and the runs merged lazily with heapq.merge.
+        """
+        self.flush()
+        runs = []
+        for partition in range(self.partitions):
+            groups: Dict[Tuple[str, str], List[int]] = {}
+            for key_name, value, row in self.read(partition):
+                groups.setdefault((key_name, value), []).append(int(row))
+
+            # Rows are ascending because they were spilled in input order
+            edges = sorted((row, key_rank[key_name], rows[0], key_name, value)
+                           for (key_name, value), rows in groups.items() for row in rows[1:])
+            del groups
+            if edges:
+                runs.append(self.directory / f"run_{partition:04d}.csv")
+                with open(runs[-1], 'w', newline='', encoding='utf-8') as f:
+                    csv.writer(f).writerows(edges)
+
+        def read_run(f) -> Iterator[Tuple[int, int, int, str, str]]:
+            for row, rank, first, key_name, value in csv.reader(f):
+                yield int(row), int(rank), int(first), key_name, value
+
+        with ExitStack() as stack:
+            readers = [read_run(stack.enter_context(open(path, 'r', newline='', encoding='utf-8')))
+                       for path in runs]
+            for row, _, first, key_name, value in heapq.merge(*readers):
+                yield first, row, key_name, value
+
+
+class EdgeSpill(PartitionedSpill):
+    """(row, row, reason) edges kept on disk in the order they were appended
+
+    Stands in for the edge list add_edge appends to, so the edges of a
+    streaming run do not grow in RAM with the input.
+    """
+
+    def __init__(self, buffer_bytes: int, directory: Optional[str] = None):
+        super().__init__(1, buffer_bytes, directory, prefix='edges')
+
+    def append(self, edge: Tuple[int, int, str]) -> None:
+        idx1, idx2, reason = edge
+        self.add(0, [str(idx1), str(idx2), reason])
+
+    def __len__(self) -> int:
+        return self.records
+
+    def __iter__(self) -> Iterator[Tuple[int, int, str]]:
+        self.flush()
+        for idx1, idx2, reason in self.read(0):
+            yield int(idx1), int(idx2), reason
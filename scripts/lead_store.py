@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Compact Lead Store for RitterFinder Lead Deduplication
+Holds the raw lead rows addressed by integer row ids. Each row is packed
+into a single UTF-8 bytes object instead of a csv.DictReader dict with
+all header keys, which cuts the per-row overhead from over a kilobyte to
+roughly the row's own length. Rows are unpacked on demand, which only the
+output and report stages do.
+"""
+
+from typing import Dict, Iterable, List, Sequence
+
+# ASCII unit separator; rows containing it are kept unpacked instead
+FIELD_SEPARATOR = '\x1f'
+
+
+class LeadStore:
+    """Append-only list of lead rows sharing one header"""
+
+    def __init__(self, fieldnames: Sequence[str] = ()):
+        self.fieldnames: List[str] = list(fieldnames)
+        self.rows: List = []
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict[str, str]]) -> 'LeadStore':
+        """Pack row dicts, taking the header from the first one"""
+        store = cls()
+        for record in records:
+            if not store.fieldnames:
+                store.fieldnames = list(record.keys())
+            store.append([record.get(field) for field in store.fieldnames])
+        return store
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def append(self, values: Sequence[str]) -> int:
+        """Add a row (values in fieldnames order) and return its row id"""
+        values = ['' if value is None else value for value in values]
+        packed = FIELD_SEPARATOR.join(values)
+        if packed.count(FIELD_SEPARATOR) == len(values) - 1:
+            self.rows.append(packed.encode('utf-8'))
+        else:
+            self.rows.append(tuple(values))
+        return len(self.rows) - 1
+
+    def values(self, row_id: int) -> List[str]:
+        """Field values of a row, in fieldnames order"""
+        row = self.rows[row_id]
+        if isinstance(row, tuple):
+            return list(row)
+        return row.decode('utf-8').split(FIELD_SEPARATOR)
+
+    def row(self, row_id: int) -> Dict[str, str]:
+        """A row as the dict csv.DictReader would have produced"""
+        return dict(zip(self.fieldnames, self.values(row_id)))
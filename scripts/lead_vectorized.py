@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Vectorized Pair Prefilter for RitterFinder Lead Deduplication
+Encodes normalized names and addresses as character count vectors and
+evaluates the similarity engine's upper bounds for a whole batch of pairs
+(or a whole row of the exhaustive comparison matrix) in a few NumPy
+operations. Only pairs whose bounds can still reach the thresholds are
+handed to the exact scorer, so duplicate decisions are unchanged.
+
+The bound used is the multiset overlap of the character vectors,
+sum(min(a, b)), which caps the SequenceMatcher ratio and the Levenshtein
+similarity (see lead_similarity.SimilarityEngine.score_at_least). Cosine
+similarity of n-gram vectors is cheaper to reason about but bounds neither,
+so it would silently drop real duplicates.
+
+NumPy is optional; HAS_NUMPY tells whether this module can be used.
+"""
+
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    np = None
+    HAS_NUMPY = False
+
+PAIR_CHUNK_SIZE = 65536
+
+
+class CharVectors:
+    """Character count matrix of a list of strings (one row per string)"""
+
+    def __init__(self, texts: Sequence[str]):
+        alphabet: Dict[str, int] = {}
+        for text in texts:
+            for char in text:
+                if char not in alphabet:
+                    alphabet[char] = len(alphabet)
+
+        self.counts = np.zeros((len(texts), max(1, len(alphabet))), dtype=np.uint16)
+        self.lengths = np.zeros(len(texts), dtype=np.int64)
+        for row, text in enumerate(texts):
+            self.lengths[row] = len(text)
+            for char in text:
+                self.counts[row, alphabet[char]] += 1
+
+    def overlap(self, rows1: 'np.ndarray', rows2: 'np.ndarray') -> 'np.ndarray':
+        """Shared character count of each (rows1[k], rows2[k]) pair"""
+        return np.minimum(self.counts[rows1], self.counts[rows2]).sum(axis=1, dtype=np.int64)
+
+    def overlap_row(self, row: int, rows: 'np.ndarray') -> 'np.ndarray':
+        """Shared character count of one string with each of rows"""
+        return np.minimum(self.counts[rows], self.counts[row]).sum(axis=1, dtype=np.int64)
+
+
+def reachable(backend: str, overlap: 'np.ndarray', lengths1: 'np.ndarray',
+              lengths2: 'np.ndarray', threshold: float) -> 'np.ndarray':
+    """Mask of pairs whose score may reach threshold, mirroring score_at_least's rejects"""
+    shortest = np.minimum(lengths1, lengths2)
+    longest = np.maximum(lengths1, lengths2)
+
+    if backend == 'sequence':
+        total = (lengths1 + lengths2).astype(np.float64)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return 2.0 * overlap / total >= threshold
+
+    if backend == 'levenshtein':
+        max_distance = np.floor((1.0 - threshold) * longest + 1e-9)
+        return (longest - shortest <= max_distance) & (longest - overlap <= max_distance)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        jaro_bound = (2.0 + shortest / longest) / 3.0
+        return jaro_bound + 0.4 * (1.0 - jaro_bound) >= threshold
+
+
+class VectorPrefilter:
+    """Drops candidate pairs that PairScorer.is_similar would reject on its bounds alone"""
+
+    def __init__(self, scorer, candidates: List):
+        if not HAS_NUMPY:
+            raise RuntimeError('the vector prefilter needs NumPy (pip install numpy)')
+
+        self.scorer = scorer
+        self.backend = scorer.engine.backend
+        self.rows = {features.index: row for row, features in enumerate(candidates)}
+        self.order = np.array([features.index for features in candidates], dtype=np.int64)
+        self.names = CharVectors([features.name for features in candidates])
+        self.addresses = CharVectors([features.address for features in candidates])
+        self.stats = {'pairs': 0, 'kept': 0}
+
+    def keep_mask(self, rows1: 'np.ndarray', rows2: 'np.ndarray',
+                  name_overlap: 'np.ndarray', address_overlap) -> 'np.ndarray':
+        """Pairs (as candidate rows) that may still be duplicates"""
+        scorer = self.scorer
+        names, addresses = self.names, self.addresses
+        name_len1, name_len2 = names.lengths[rows1], names.lengths[rows2]
+
+        # is_similar needs both names and a name score of at least name_threshold
+        keep = (name_len1 > 0) & (name_len2 > 0)
+        keep &= reachable(self.backend, name_overlap, name_len1, name_len2, scorer.name_threshold)
+        if not keep.any():
+            return keep
+
+        # ...then either a very similar name or a similar (non-empty) address
+        very_similar = reachable(self.backend, name_overlap, name_len1, name_len2,
+                                 scorer.very_similar_name_threshold)
+        address_len1, address_len2 = addresses.lengths[rows1], addresses.lengths[rows2]
+        similar_address = (address_len1 > 0) & (address_len2 > 0)
+        if similar_address.any():
+            similar_address &= reachable(self.backend, address_overlap(), address_len1, address_len2,
+                                         scorer.address_threshold)
+        return keep & (very_similar | similar_address)
+
+    def filter_pairs(self, pairs: Iterable[Tuple[int, int]]) -> Iterator[Tuple[int, int]]:
+        """Yield the pairs (as row indices, in the given order) that survive the bounds"""
+        pairs = iter(pairs)
+        while True:
+            chunk = [pair for _, pair in zip(range(PAIR_CHUNK_SIZE), pairs)]
+            if not chunk:
+                return
+
+            indices = np.array(chunk, dtype=np.int64)
+            rows1 = np.array([self.rows[idx] for idx in indices[:, 0].tolist()], dtype=np.int64)
+            rows2 = np.array([self.rows[idx] for idx in indices[:, 1].tolist()], dtype=np.int64)
+            keep = self.keep_mask(rows1, rows2, self.names.overlap(rows1, rows2),
+                                  lambda: self.addresses.overlap(rows1, rows2))
+
+            self.stats['pairs'] += len(chunk)
+            self.stats['kept'] += int(keep.sum())
+            for idx1, idx2 in indices[keep].tolist():
+                yield idx1, idx2
+
+    def all_pairs(self) -> Iterator[Tuple[int, int]]:
+        """Yield every surviving pair of the exhaustive comparison, one matrix row at a time"""
+        count = len(self.order)
+        for row in range(count - 1):
+            others = np.arange(row + 1, count, dtype=np.int64)
+            rows1 = np.full(len(others), row, dtype=np.int64)
+            keep = self.keep_mask(rows1, others, self.names.overlap_row(row, others),
+                                  lambda: self.addresses.overlap_row(row, others))
+
+            self.stats['pairs'] += len(others)
+            self.stats['kept'] += int(keep.sum())
+            idx1 = int(self.order[row])
+            for idx2 in self.order[others[keep]].tolist():
+                yield idx1, idx2
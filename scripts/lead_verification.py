@@ -0,0 +1,471 @@
+#!/usr/bin/env python3
+"""
+Contact Verification for RitterFinder Leads
+Checks, concurrently with asyncio, whether lead websites answer over HTTP
+(following redirects to the final domain) and whether email domains have
+MX records, so verified_website and verified_email mean more than
+"non-empty". Only the standard library is used:
+
+  HTTP   a minimal HTTP/1.1 client issuing HEAD requests (GET when a server
+         refuses HEAD) over keep-alive connections pooled per host, with a
+         per-host concurrency cap and minimum interval between requests
+  DNS    MX queries over UDP to the system's (or a given) name server,
+         all sharing one socket
+
+Results are kept in an on-disk JSON cache with a TTL, so re-runs only probe
+what is new or stale; timeouts and network errors are not cached. Both the HTTP and the DNS side can be pointed at local
+stub servers (http://127.0.0.1:PORT/ websites, dns_server=('127.0.0.1', PORT)).
+"""
+
+import asyncio
+import json
+import os
+import random
+import socket
+import ssl
+import struct
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+
+DEFAULT_TTL = 7 * 24 * 3600
+REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+# Servers that refuse HEAD are asked again with GET
+HEAD_REFUSED_STATUSES = (405, 501)
+# Statuses of a live site that turns robots away
+ALIVE_ERROR_STATUSES = (401, 403, 429)
+MAX_HEADER_LINES = 100
+USER_AGENT = 'Mozilla/5.0 (compatible; RitterFinderVerifier/1.0)'
+
+DNS_TYPE_MX = 15
+DNS_RCODE_NXDOMAIN = 3
+
+
+def is_alive(status: Optional[int]) -> bool:
+    return status is not None and (status < 400 or status in ALIVE_ERROR_STATUSES)
+
+
+def is_transient(error: Exception) -> bool:
+    """Whether a failed website check says nothing lasting about the site"""
+    if isinstance(error, socket.gaierror):
+        # A name that does not resolve is gone; a resolver that did not answer is not
+        return error.errno not in (socket.EAI_NONAME, getattr(socket, 'EAI_NODATA', socket.EAI_NONAME))
+    if isinstance(error, ssl.SSLError):
+        # Certificate and protocol failures come back the same next time
+        return False
+    return isinstance(error, (asyncio.TimeoutError, OSError, asyncio.IncompleteReadError))
+
+
+def email_domain(email: str) -> str:
+    if not email or '@' not in email:
+        return ''
+    return email.rsplit('@', 1)[1].strip().lower().rstrip('.')
+
+
+def system_name_server() -> Tuple[str, int]:
+    """First name server of /etc/resolv.conf, else the local one"""
+    try:
+        with open('/etc/resolv.conf', 'r', encoding='utf-8') as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) >= 2 and fields[0] == 'nameserver':
+                    return fields[1], 53
+    except OSError:
+        pass
+    return '127.0.0.1', 53
+
+
+class ResultCache:
+    """Check results stored in a JSON file, valid for ttl seconds"""
+
+    def __init__(self, path: Optional[Path], ttl: float = DEFAULT_TTL):
+        self.path = Path(path) if path else None
+        self.ttl = ttl
+        # key -> [checked_at, result]
+        self.entries: Dict[str, List] = {}
+        self.hits = 0
+
+        if self.path and self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+            now = time.time()
+            self.entries = {key: entry for key, entry in entries.items() if now - entry[0] < ttl}
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self.entries.get(key)
+        if entry is None or time.time() - entry[0] >= self.ttl:
+            return None
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: str, result: Dict[str, Any]) -> None:
+        self.entries[key] = [time.time(), result]
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = self.path.with_suffix('.tmp')
+        with open(temporary, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, ensure_ascii=False)
+        os.replace(temporary, self.path)
+
+
+class ConnectionPool:
+    """Idle keep-alive connections per (scheme, host, port)"""
+
+    def __init__(self, max_idle_per_host: int = 4, ssl_context: Optional[ssl.SSLContext] = None):
+        self.max_idle_per_host = max_idle_per_host
+        self.ssl_context = ssl_context or ssl.create_default_context()
+        self.idle: Dict[Tuple[str, str, int], List[Tuple]] = defaultdict(list)
+        self.opened = 0
+        self.reused = 0
+
+    async def acquire(self, key: Tuple[str, str, int]) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter, bool]:
+        """Return (reader, writer, reused), reusing an idle connection when there is one"""
+        idle = self.idle.get(key)
+        while idle:
+            reader, writer = idle.pop()
+            if not writer.is_closing() and not reader.at_eof():
+                self.reused += 1
+                return reader, writer, True
+            writer.close()
+
+        scheme, host, port = key
+        if scheme == 'https':
+            reader, writer = await asyncio.open_connection(host, port, ssl=self.ssl_context, server_hostname=host)
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+        self.opened += 1
+        return reader, writer, False
+
+    def release(self, key: Tuple[str, str, int], reader, writer, reusable: bool) -> None:
+        idle = self.idle[key]
+        if reusable and len(idle) < self.max_idle_per_host and not writer.is_closing():
+            idle.append((reader, writer))
+        else:
+            writer.close()
+
+    def close(self) -> None:
+        for connections in self.idle.values():
+            for _, writer in connections:
+                writer.close()
+        self.idle.clear()
+
+
+class HostLimiter:
+    """Caps concurrent requests per host and spaces their starts by interval seconds"""
+
+    def __init__(self, per_host: int = 2, interval: float = 0.0):
+        self.per_host = per_host
+        self.interval = interval
+        self.semaphores: Dict[str, asyncio.Semaphore] = {}
+        self.next_start: Dict[str, float] = {}
+
+    @asynccontextmanager
+    async def slot(self, host: str):
+        semaphore = self.semaphores.get(host)
+        if semaphore is None:
+            semaphore = self.semaphores[host] = asyncio.Semaphore(self.per_host)
+        async with semaphore:
+            if self.interval:
+                now = asyncio.get_running_loop().time()
+                start = max(now, self.next_start.get(host, 0.0))
+                self.next_start[host] = start + self.interval
+                if start > now:
+                    await asyncio.sleep(start - now)
+            yield
+
+
+class DnsProtocol(asyncio.DatagramProtocol):
+    """Hands DNS responses to the query waiting for their id"""
+
+    def __init__(self):
+        self.pending: Dict[int, asyncio.Future] = {}
+
+    def datagram_received(self, data: bytes, addr) -> None:
+        if len(data) < 12:
+            return
+        future = self.pending.get(struct.unpack('!H', data[:2])[0])
+        if future is not None and not future.done():
+            future.set_result(data)
+
+
+def read_dns_name(message: bytes, offset: int) -> Tuple[str, int]:
+    """Decode a possibly compressed domain name; return it and the offset after it"""
+    labels = []
+    end = None
+    jumps = 0
+    while True:
+        length = message[offset]
+        if length & 0xC0 == 0xC0:
+            if end is None:
+                end = offset + 2
+            jumps += 1
+            if jumps > 64:
+                raise ValueError('DNS name compression loop')
+            offset = ((length & 0x3F) << 8) | message[offset + 1]
+            continue
+        offset += 1
+        if length == 0:
+            break
+        labels.append(message[offset:offset + length].decode('ascii', 'replace'))
+        offset += length
+    return '.'.join(labels).lower(), end if end is not None else offset
+
+
+def build_mx_query(query_id: int, domain: str) -> bytes:
+    question = b''.join(bytes([len(label)]) + label for label in domain.encode('idna').split(b'.') if label)
+    return struct.pack('!HHHHHH', query_id, 0x0100, 1, 0, 0, 0) + question + b'\x00' + struct.pack('!HH', DNS_TYPE_MX, 1)
+
+
+def parse_mx_response(message: bytes) -> Tuple[int, List[str]]:
+    """Return the response code and the mail exchanges, by preference"""
+    _, flags, questions, answers, _, _ = struct.unpack('!HHHHHH', message[:12])
+    offset = 12
+    for _ in range(questions):
+        _, offset = read_dns_name(message, offset)
+        offset += 4
+
+    exchanges = []
+    for _ in range(answers):
+        _, offset = read_dns_name(message, offset)
+        record_type, _, _, length = struct.unpack('!HHIH', message[offset:offset + 10])
+        offset += 10
+        if record_type == DNS_TYPE_MX:
+            preference = struct.unpack('!H', message[offset:offset + 2])[0]
+            exchange, _ = read_dns_name(message, offset + 2)
+            exchanges.append((preference, exchange))
+        offset += length
+
+    # A lone "." exchange is a null MX: the domain accepts no mail
+    return flags & 0x000F, [exchange for _, exchange in sorted(exchanges) if exchange]
+
+
+class DnsResolver:
+    """MX lookups over one shared UDP socket"""
+
+    def __init__(self, server: Optional[Tuple[str, int]] = None, timeout: float = 3.0, retries: int = 2):
+        self.server = server or system_name_server()
+        self.timeout = timeout
+        self.retries = retries
+        self.transport = None
+        self.protocol: Optional[DnsProtocol] = None
+        self.opening: Optional[asyncio.Future] = None
+
+    async def open(self) -> None:
+        # Concurrent first queries share one socket
+        if self.opening is None:
+            self.opening = asyncio.ensure_future(asyncio.get_running_loop().create_datagram_endpoint(
+                DnsProtocol, remote_addr=self.server))
+        self.transport, self.protocol = await self.opening
+
+    def close(self) -> None:
+        if self.transport:
+            self.transport.close()
+        self.transport = self.protocol = self.opening = None
+
+    async def mx(self, domain: str) -> Dict[str, Any]:
+        """MX check of a domain: has_mx, mx hosts and any error ('transient' if worth retrying later)"""
+        if self.protocol is None:
+            await self.open()
+        try:
+            query = build_mx_query(0, domain)
+        except UnicodeError:
+            return {'has_mx': False, 'mx': [], 'error': 'invalid domain'}
+
+        for _ in range(self.retries + 1):
+            query_id = random.randrange(0x10000)
+            while query_id in self.protocol.pending:
+                query_id = random.randrange(0x10000)
+            future = asyncio.get_running_loop().create_future()
+            self.protocol.pending[query_id] = future
+            try:
+                self.transport.sendto(struct.pack('!H', query_id) + query[2:])
+                response = await asyncio.wait_for(future, self.timeout)
+            except asyncio.TimeoutError:
+                continue
+            finally:
+                del self.protocol.pending[query_id]
+
+            try:
+                rcode, exchanges = parse_mx_response(response)
+            except (ValueError, IndexError, struct.error):
+                return {'has_mx': False, 'mx': [], 'error': 'malformed response', 'transient': True}
+            if rcode == DNS_RCODE_NXDOMAIN:
+                return {'has_mx': False, 'mx': [], 'error': 'no such domain'}
+            if rcode:
+                return {'has_mx': False, 'mx': [], 'error': f"rcode {rcode}", 'transient': True}
+            return {'has_mx': bool(exchanges), 'mx': exchanges, 'error': None}
+
+        return {'has_mx': False, 'mx': [], 'error': 'timeout', 'transient': True}
+
+
+async def read_response_head(reader: asyncio.StreamReader) -> Tuple[str, int, Dict[str, str]]:
+    """Read a status line and headers; return (version, status, lower-cased headers)"""
+    status_line = (await reader.readline()).decode('latin-1').strip()
+    parts = status_line.split(None, 2)
+    if len(parts) < 2 or not parts[0].startswith('HTTP/') or not parts[1].isdigit():
+        raise ValueError(f"bad status line {status_line[:40]!r}")
+
+    headers = {}
+    for _ in range(MAX_HEADER_LINES):
+        line = await reader.readline()
+        if not line:
+            raise asyncio.IncompleteReadError(b'', None)
+        if line in (b'\r\n', b'\n'):
+            return parts[0], int(parts[1]), headers
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    raise ValueError('too many headers')
+
+
+class ContactVerifier:
+    """Concurrent website and email-domain checks with pooling, limits and caching"""
+
+    def __init__(self, cache: Optional[ResultCache] = None, concurrency: int = 200, per_host: int = 2,
+                 host_interval: float = 0.0, timeout: float = 10.0, max_redirects: int = 5,
+                 dns_server: Optional[Tuple[str, int]] = None, dns_timeout: float = 3.0):
+        self.cache = cache or ResultCache(None)
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.max_redirects = max_redirects
+        self.pool = ConnectionPool(max_idle_per_host=per_host)
+        self.limiter = HostLimiter(per_host, host_interval)
+        self.resolver = DnsResolver(dns_server, timeout=dns_timeout)
+        self.stats = {'website_checks': 0, 'email_checks': 0, 'cached': 0, 'seconds': 0.0}
+
+    async def request(self, url: str, method: str) -> Tuple[int, Dict[str, str]]:
+        """Send one request; return the status and headers"""
+        parts = urlsplit(url)
+        scheme = parts.scheme.lower()
+        host = (parts.hostname or '').lower()
+        if scheme not in ('http', 'https') or not host:
+            raise ValueError('not an http(s) URL')
+        port = parts.port or (443 if scheme == 'https' else 80)
+        key = (scheme, host, port)
+        target = (parts.path or '/') + (f"?{parts.query}" if parts.query else '')
+        host_header = host if parts.port is None else f"{host}:{port}"
+        connection = 'keep-alive' if method == 'HEAD' else 'close'
+        message = (f"{method} {target} HTTP/1.1\r\nHost: {host_header}\r\nUser-Agent: {USER_AGENT}\r\n"
+                   f"Accept: */*\r\nConnection: {connection}\r\n\r\n").encode('latin-1', 'replace')
+
+        # The timeout only starts once the host has a slot, so waiting on a busy host is not a dead site
+        async with self.limiter.slot(host):
+            return await asyncio.wait_for(self.exchange(key, message, method), self.timeout)
+
+    async def exchange(self, key: Tuple[str, str, int], message: bytes, method: str) -> Tuple[int, Dict[str, str]]:
+        while True:
+            reader, writer, reused = await self.pool.acquire(key)
+            try:
+                writer.write(message)
+                await writer.drain()
+                version, status, headers = await read_response_head(reader)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                writer.close()
+                # An idle connection the server has since dropped: retry on a fresh one
+                if reused:
+                    continue
+                raise
+            except BaseException:
+                writer.close()
+                raise
+
+            # Only a HEAD response is known to end with its headers
+            reusable = (method == 'HEAD' and headers.get('connection', '').lower() != 'close'
+                        and (version != 'HTTP/1.0' or headers.get('connection', '').lower() == 'keep-alive'))
+            self.pool.release(key, reader, writer, reusable)
+            return status, headers
+
+    async def probe(self, url: str) -> Dict[str, Any]:
+        """Follow url's redirects; return status, final URL and domain"""
+        result = {'reachable': False, 'status': None, 'final_url': url, 'final_domain': '',
+                  'redirects': 0, 'error': None}
+        visited = set()
+        current = url
+        while True:
+            visited.add(current)
+            status, headers = await self.request(current, 'HEAD')
+            if status in HEAD_REFUSED_STATUSES:
+                status, headers = await self.request(current, 'GET')
+            result['status'] = status
+
+            location = headers.get('location')
+            if status not in REDIRECT_STATUSES or not location:
+                break
+            next_url = urljoin(current, location)
+            if next_url in visited or result['redirects'] >= self.max_redirects:
+                result['error'] = 'redirect loop' if next_url in visited else 'too many redirects'
+                break
+            result['redirects'] += 1
+            current = next_url
+
+        result['final_url'] = current
+        result['final_domain'] = (urlsplit(current).hostname or '').lower().removeprefix('www.')
+        result['reachable'] = result['error'] is None and is_alive(status)
+        return result
+
+    async def check_website(self, url: str) -> Dict[str, Any]:
+        """Probe a website; 'transient' is set when it may well answer on a later run"""
+        try:
+            return await self.probe(url)
+        except Exception as e:
+            # clean_website assumes https for bare domains; plenty of small sites only serve http
+            if url.startswith('https://') and isinstance(e, (OSError, ssl.SSLError)):
+                fallback = await self.check_website('http://' + url[len('https://'):])
+                if fallback['reachable']:
+                    return fallback
+            error = 'timeout' if isinstance(e, asyncio.TimeoutError) else f"{type(e).__name__}: {e}"
+            result = {'reachable': False, 'status': None, 'final_url': url, 'final_domain': '',
+                      'redirects': 0, 'error': error[:200]}
+            if is_transient(e):
+                result['transient'] = True
+            return result
+
+    async def checked(self, key: str, check, semaphore: asyncio.Semaphore) -> Tuple[str, Dict[str, Any]]:
+        async with semaphore:
+            result = await check
+        if not result.get('transient'):
+            self.cache.put(key, result)
+        return key, result
+
+    async def verify(self, websites: Iterable[str], domains: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Check websites and email domains; results are keyed 'web:<url>' and 'mx:<domain>'"""
+        results = {}
+        semaphore = asyncio.Semaphore(self.concurrency)
+        checks = []
+        for kind, targets in (('web', websites), ('mx', domains)):
+            for target in targets:
+                key = f"{kind}:{target}"
+                if key in results:
+                    continue
+                cached = self.cache.get(key)
+                if cached is not None:
+                    results[key] = cached
+                    self.stats['cached'] += 1
+                    continue
+                results[key] = None
+                if kind == 'web':
+                    self.stats['website_checks'] += 1
+                    checks.append(self.checked(key, self.check_website(target), semaphore))
+                else:
+                    self.stats['email_checks'] += 1
+                    checks.append(self.checked(key, self.resolver.mx(target), semaphore))
+
+        started = time.perf_counter()
+        for key, result in await asyncio.gather(*checks):
+            results[key] = result
+        self.stats['seconds'] += time.perf_counter() - started
+        return results
+
+    def close(self) -> None:
+        """Close pooled connections and the DNS socket, which belong to the running loop"""
+        self.pool.close()
+        self.resolver.close()
+
+    def checks_per_second(self) -> float:
+        checks = self.stats['website_checks'] + self.stats['email_checks']
+        return checks / self.stats['seconds'] if self.stats['seconds'] else 0.0
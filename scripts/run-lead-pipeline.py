@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Lead Pipeline for RitterFinder
+Converts Axesor and Páginas Amarillas JSON files and deduplicates the
+resulting leads in a single process. Leads stream from the converter
+straight into the deduplicator's normalization stage instead of being
+written to leads_combined.csv and parsed again; only the deduplicated CSV
+and the report are written, unless --debug-csv asks for the intermediate
+per-category and combined CSVs as well.
+"""
+
+import argparse
+import importlib
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List
+
+# The pipeline stages live in hyphenated scripts, importable only by name
+converter_script = importlib.import_module('convert-json-to-csv')
+dedup_script = importlib.import_module('deduplicate-leads')
+
+
+def stream_records(converter, leads: Iterable[Dict[str, Any]],
+                   debug_leads: Dict[str, List[Dict[str, Any]]] = None) -> Iterator[Dict[str, str]]:
+    """Render converted leads as CSV-equivalent rows, optionally keeping them for debug CSVs"""
+    for lead in leads:
+        if debug_leads is not None:
+            debug_leads.setdefault(lead['category'], []).append(lead)
+        yield converter.to_csv_row(lead)
+
+
+def write_debug_csvs(converter, debug_leads: Dict[str, List[Dict[str, Any]]]) -> None:
+    """Write the per-category and combined CSVs convert-json-to-csv.py would have produced"""
+    print(f"\n🐛 Writing intermediate CSVs for {len(debug_leads)} categories...")
+
+    all_leads = []
+    for category, leads in debug_leads.items():
+        output_file = converter.output_dir / f"leads_{converter.safe_category_name(category)}.csv"
+        converter.write_csv(leads, output_file)
+        all_leads.extend(leads)
+
+    if all_leads:
+        converter.write_csv(all_leads, converter.output_dir / "leads_combined.csv")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert JSON leads and deduplicate them in one pass')
+    parser.add_argument('--input', '-i', default='models/fvOdGZZZ', help='Input directory with JSON files')
+    parser.add_argument('--output-dir', default='output/csv', help='Output directory (default: output/csv)')
+    parser.add_argument('--output', '-o', help='Deduplicated CSV file (default: OUTPUT_DIR/leads_deduplicated.csv)')
+    parser.add_argument('--report', '-r', help='Report file (default: OUTPUT_DIR/leads_duplicates_report.txt)')
+    parser.add_argument('--debug-csv', action='store_true',
+                        help='Also write the intermediate per-category and combined CSVs')
+    dedup_script.add_dedup_arguments(parser)
+
+    args = parser.parse_args()
+    if args.memory_limit:
+        parser.error('--memory-limit needs a CSV file to re-read; run deduplicate-leads.py on a converted file instead')
+    if args.checkpoint_dir:
+        parser.error('--checkpoint-dir needs a CSV file to fingerprint; run deduplicate-leads.py on a converted file instead')
+
+    output_dir = Path(args.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    converter = converter_script.LeadConverter(args.input, str(output_dir))
+    deduplicator = dedup_script.LeadDeduplicator(
+        str(output_dir / 'leads_combined.csv'),
+        args.output or str(output_dir / 'leads_deduplicated.csv'),
+        args.report or str(output_dir / 'leads_duplicates_report.txt')
+    )
+    dedup_script.configure_deduplicator(deduplicator, args, parser)
+    # One metrics document covers both stages
+    converter.metrics = deduplicator.metrics
+
+    if not converter.find_json_files():
+        print(f"❌ No JSON files found in {converter.input_dir}")
+        return
+
+    print("🚀 Starting lead pipeline (convert → deduplicate)...")
+    debug_leads = {} if args.debug_csv else None
+    deduplicator.deduplicate(stream_records(converter, converter.iter_leads(), debug_leads))
+
+    if debug_leads is not None:
+        write_debug_csvs(converter, debug_leads)
+    
+    deduplicator.metrics.write(args.metrics)
+
+
+if __name__ == '__main__':
+    main()
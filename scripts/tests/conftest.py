@@ -0,0 +1,27 @@
+"""
+Shared helpers for the lead script tests
+The scripts import their sibling modules by name, so the scripts directory
+and its benchmarks (for the synthetic lead generator) go on sys.path.
+"""
+
+import sys
+from pathlib import Path
+from typing import List
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(SCRIPTS_DIR / 'benchmarks'))
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+from synthetic_leads import SyntheticLeadGenerator  # noqa: E402
+
+
+def write_synthetic_csv(path: Path, rows: int, seed: int) -> Path:
+    """A seeded synthetic lead CSV with near-duplicates"""
+    SyntheticLeadGenerator(seed=seed).write_lead_csv(path, rows)
+    return path
+
+
+def run_script(monkeypatch, script, argv: List[str]) -> None:
+    """Run an imported command-line script's main() with these arguments"""
+    monkeypatch.setattr(sys, 'argv', [script.__name__] + argv)
+    script.main()
@@ -0,0 +1,49 @@
+import csv
+
+import pytest
+
+from conftest import write_synthetic_csv
+from lead_blocking import BlockingRecord, CandidateBlocker
+from lead_geo import PostalGeocoder
+from lead_matching import PairScorer
+from lead_normalizer import build_features
+
+
+def similarity_candidates(path):
+    with open(path, 'r', newline='', encoding='utf-8') as f:
+        features = [build_features(idx, row) for idx, row in enumerate(csv.DictReader(f))]
+    return [record for record in features if record.needs_similarity]
+
+
+@pytest.mark.parametrize('seed', [3, 5, 42])
+def test_default_blocking_keeps_every_exhaustive_match(tmp_path, seed):
+    candidates = similarity_candidates(write_synthetic_csv(tmp_path / 'leads.csv', 3000, seed))
+    scorer = PairScorer()
+
+    matches = set()
+    for position, record1 in enumerate(candidates):
+        for record2 in candidates[position + 1:]:
+            if scorer.is_similar(record1.name, record1.address, record2.name, record2.address)[0]:
+                matches.add((record1.index, record2.index))
+
+    pairs = set(CandidateBlocker().iter_candidate_pairs(candidates))
+    assert matches
+    assert matches <= pairs
+
+
+def test_geo_blocking_falls_back_to_postal_codes_for_coarse_points(tmp_path):
+    centroids = tmp_path / 'centroids.csv'
+    centroids.write_text('postal_code,latitude,longitude\n28013,40.418,-3.708\n28014,40.414,-3.692\n'
+                         '28050,40.500,-3.660\n', encoding='utf-8')
+    geocoder = PostalGeocoder(str(centroids))
+    addresses = ['Calle Mayor 1, 28013 Madrid', 'Calle Prado 2, 28014 Madrid', 'Calle Norte 3, 28050 Madrid',
+                 'Calle Sur 4, 28021 Madrid', 'Calle Sur 9, 28021 Madrid', 'Calle Este 5, 28022 Madrid']
+    records = [BlockingRecord(idx, 'bar', address, point=geocoder.locate(address))
+               for idx, address in enumerate(addresses)]
+
+    blocker = CandidateBlocker(['geo'], geo_radius=1.0)
+    pairs = set(blocker.iter_candidate_pairs(records))
+    # Postal centroids 1.4 km apart are within reach, 9 km are not; 280xx codes
+    # without a centroid are only placed at the capital, so block by postal code
+    assert pairs == {(0, 1), (3, 4)}
+    assert blocker.stats['geo_unplaced'] == 3
@@ -0,0 +1,81 @@
+"""Every way of reading and converting scrape files must write the default run's CSVs"""
+
+import csv
+import importlib
+import json
+import shutil
+
+import pytest
+
+from conftest import run_script
+from lead_json_stream import JsonArrayReader
+from synthetic_leads import SyntheticLeadGenerator
+
+convert_script = importlib.import_module('convert-json-to-csv')
+
+
+def converted_csvs(monkeypatch, input_dir, output_dir, options=()):
+    """Rows of every CSV a converter run writes, by file name, without the run's timestamps"""
+    run_script(monkeypatch, convert_script, ['-i', str(input_dir), '-o', str(output_dir)] + list(options))
+    outputs = {}
+    for path in sorted(output_dir.glob('*.csv')):
+        with open(path, 'r', newline='', encoding='utf-8') as f:
+            outputs[path.name] = [{column: value for column, value in row.items() if column != 'created_at'}
+                                  for row in csv.DictReader(f)]
+    # Categories are combined in the order the directory lists their files
+    outputs['leads_combined.csv'].sort(key=lambda row: row['category'])
+    return outputs
+
+
+@pytest.fixture(scope='module')
+def scrape_dir(tmp_path_factory):
+    directory = tmp_path_factory.mktemp('scrapes')
+    SyntheticLeadGenerator(seed=7).write_scrape_files(directory, 2000)
+    return directory
+
+
+@pytest.fixture(scope='module')
+def default_csvs(tmp_path_factory, scrape_dir):
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        return converted_csvs(monkeypatch, scrape_dir, tmp_path_factory.mktemp('default'))
+
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 4096])
+def test_incremental_reader_matches_json_load(scrape_dir, chunk_size):
+    for path in sorted(scrape_dir.glob('*.json')):
+        with open(path, 'r', encoding='utf-8') as f:
+            expected = json.load(f)
+        with open(path, 'r', encoding='utf-8') as f:
+            assert list(JsonArrayReader(f, chunk_size)) == expected
+
+
+def test_json_lines_input_matches_default_run(monkeypatch, tmp_path, scrape_dir, default_csvs):
+    lines_dir = tmp_path / 'jsonl'
+    lines_dir.mkdir()
+    for path in scrape_dir.glob('*.json'):
+        with open(path, 'r', encoding='utf-8') as f:
+            records = json.load(f)
+        with open(lines_dir / f"{path.stem}.jsonl", 'w', encoding='utf-8') as f:
+            f.writelines(json.dumps(record, ensure_ascii=False) + '\n' for record in records)
+
+    assert converted_csvs(monkeypatch, lines_dir, tmp_path / 'output') == default_csvs
+
+
+@pytest.mark.parametrize('workers', [2, 3])
+def test_workers_match_default_run(monkeypatch, tmp_path, scrape_dir, default_csvs, workers):
+    assert converted_csvs(monkeypatch, scrape_dir, tmp_path, ['--workers', str(workers)]) == default_csvs
+
+
+def test_workers_reconvert_only_changed_files(monkeypatch, tmp_path, scrape_dir, default_csvs, capsys):
+    input_dir = tmp_path / 'scrapes'
+    shutil.copytree(scrape_dir, input_dir)
+    converted_csvs(monkeypatch, input_dir, tmp_path / 'output', ['--workers', '2'])
+
+    # Same records, different bytes
+    changed = sorted(input_dir.glob('*.json'))[0]
+    records = json.loads(changed.read_text(encoding='utf-8'))
+    changed.write_text(json.dumps(records, ensure_ascii=False, indent=2), encoding='utf-8')
+    capsys.readouterr()
+
+    assert converted_csvs(monkeypatch, input_dir, tmp_path / 'output', ['--workers', '2']) == default_csvs
+    assert capsys.readouterr().out.count('♻️  Unchanged') == len(list(input_dir.glob('*.json'))) - 1
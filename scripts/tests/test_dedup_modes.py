@@ -0,0 +1,80 @@
+"""Every scaling mode must write what the default in-memory run writes"""
+
+import importlib
+import json
+from functools import partial
+
+import pytest
+
+from conftest import run_script, write_synthetic_csv
+from lead_matching import ParallelPairScorer
+
+dedup_script = importlib.import_module('deduplicate-leads')
+
+
+def dedup_outputs(monkeypatch, leads_csv, directory, options):
+    """Clean CSV and clusters JSONL of a deduplicate-leads.py run"""
+    directory.mkdir(exist_ok=True)
+    output = directory / 'clean.csv'
+    clusters = directory / 'clusters.jsonl'
+    run_script(monkeypatch, dedup_script, [str(leads_csv), '-o', str(output), '-r', str(directory / 'report.txt'),
+                                           '--clusters', str(clusters)] + options)
+    return output.read_bytes(), clusters.read_bytes()
+
+
+@pytest.fixture(scope='module')
+def leads_csv(tmp_path_factory):
+    return write_synthetic_csv(tmp_path_factory.mktemp('leads') / 'leads.csv', 3000, seed=5)
+
+
+@pytest.fixture(scope='module')
+def default_outputs(tmp_path_factory, leads_csv):
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        return dedup_outputs(monkeypatch, leads_csv, tmp_path_factory.mktemp('default'), [])
+
+
+@pytest.mark.parametrize('workers', [2, 3])
+def test_workers_match_default_run(monkeypatch, tmp_path, leads_csv, default_outputs, workers):
+    # Small chunks, so many more chunks than the workers keep in flight
+    monkeypatch.setattr(dedup_script, 'ParallelPairScorer', partial(ParallelPairScorer, chunk_size=500))
+    assert dedup_outputs(monkeypatch, leads_csv, tmp_path, ['--workers', str(workers)]) == default_outputs
+
+
+def test_workers_compare_the_default_runs_pairs(monkeypatch, tmp_path, leads_csv):
+    monkeypatch.setattr(dedup_script, 'ParallelPairScorer', partial(ParallelPairScorer, chunk_size=500))
+    compared = []
+    for workers in (1, 3):
+        metrics = tmp_path / f"metrics-{workers}.json"
+        dedup_outputs(monkeypatch, leads_csv, tmp_path / str(workers), ['--workers', str(workers),
+                                                                       '--metrics', str(metrics)])
+        compared.append(json.loads(metrics.read_text())['counters']['pairs_compared'])
+
+    assert compared[0] == compared[1]
+
+
+@pytest.mark.parametrize('memory_limit', ['64K', '512M'])
+def test_streaming_matches_default_run(monkeypatch, tmp_path, leads_csv, default_outputs, memory_limit):
+    # 64K spreads exact keys and clustered rows over 16 partitions, flushed as they fill
+    options = ['--memory-limit', memory_limit, '--spill-dir', str(tmp_path)]
+    assert dedup_outputs(monkeypatch, leads_csv, tmp_path, options) == default_outputs
+
+
+def test_resumed_run_matches_default_run(monkeypatch, tmp_path, leads_csv, default_outputs, capsys):
+    options = ['--checkpoint-dir', str(tmp_path / 'checkpoint'), '--checkpoint-interval', '0']
+    is_duplicate = dedup_script.LeadDeduplicator.is_duplicate
+    calls = []
+
+    def interrupted(self, features1, features2):
+        calls.append(None)
+        if len(calls) > 15000:
+            raise KeyboardInterrupt
+        return is_duplicate(self, features1, features2)
+
+    # Killed past the checkpoint saved at pair 10000
+    with monkeypatch.context() as killed:
+        killed.setattr(dedup_script.LeadDeduplicator, 'is_duplicate', interrupted)
+        with pytest.raises(KeyboardInterrupt):
+            dedup_outputs(killed, leads_csv, tmp_path / 'killed', options)
+
+    assert dedup_outputs(monkeypatch, leads_csv, tmp_path / 'resumed', options + ['--resume']) == default_outputs
+    assert 'Resumed pair scoring at pair 10000' in capsys.readouterr().out
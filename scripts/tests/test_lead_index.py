@@ -0,0 +1,71 @@
+import csv
+import importlib
+
+import pytest
+
+from lead_index import CORPUS_COLUMNS, LeadIndex
+from lead_lookup import MemoryLeadIndex
+from lead_matching import PairScorer
+from lead_normalizer import build_features
+
+BRANDS = ['alameda', 'bueno', 'castro', 'delgado', 'espinosa', 'fuentes', 'gallego', 'herrera',
+          'iglesias', 'jimenez', 'lopez', 'marin', 'nieto', 'ortega', 'prieto', 'quintana']
+
+
+def pharmacy(index, brand, number):
+    return build_features(index, {'company_name': f"Farmacia {brand.title()}",
+                                  'address': f"Calle Mayor {number}, 28013 Madrid"})
+
+
+@pytest.fixture
+def chain_index(tmp_path):
+    """An index whose 'farm' name block is over max_block_size"""
+    index = LeadIndex(str(tmp_path), ['name_prefix', 'sorted_neighborhood'], max_block_size=5)
+    for number, brand in enumerate(BRANDS, 1):
+        index.add(pharmacy(-1, brand, number))
+    index.commit()
+    yield index
+    index.close()
+
+
+def test_index_finds_near_duplicates_in_oversized_name_blocks(chain_index):
+    typo = pharmacy(-1, 'lopz', BRANDS.index('lopez') + 1)
+    expected_row = BRANDS.index('lopez') + 1
+
+    match = chain_index.find_duplicate(typo, PairScorer())
+    assert match is not None and match[0] == expected_row
+    assert chain_index.stats['oversized_keys'] > 0
+
+
+def test_memory_index_matches_sqlite_index(chain_index):
+    memory_index = MemoryLeadIndex(chain_index)
+    scorer = PairScorer()
+    for brand in ['lopz', 'herera', 'nieto', 'zamora']:
+        lead = pharmacy(-1, brand, 7)
+        assert memory_index.candidate_rows(lead) == chain_index.candidate_rows(lead)
+        assert memory_index.find_duplicate(lead, scorer) == chain_index.find_duplicate(lead, scorer)
+
+
+def test_service_starts_a_corpus_with_the_lead_columns(tmp_path):
+    service_module = importlib.import_module('dedup-lookup-service')
+    index = LeadIndex(str(tmp_path))
+    service = service_module.LookupService(MemoryLeadIndex(index), PairScorer())
+    service.insert([{'company_name': 'Foo SL', 'address': 'Calle Mayor 1, 28013 Madrid'},
+                    {'company_name': 'Bar SA', 'email': 'info@bar.es', 'source': 'admin'}])
+    index.close()
+
+    with open(tmp_path / 'leads.csv', newline='', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+    assert list(rows[0]) == CORPUS_COLUMNS + ['source']
+    assert rows[1]['email'] == 'info@bar.es' and rows[1]['source'] == 'admin'
+
+
+def test_index_keeps_the_scorer_settings(tmp_path):
+    scorer = PairScorer(0.8, 0.7, 0.9, 'jaro_winkler')
+    index = LeadIndex(str(tmp_path))
+    index.set_scorer_settings(scorer.settings())
+    index.close()
+
+    reopened = LeadIndex(str(tmp_path))
+    assert PairScorer(*reopened.scorer_settings()).settings() == scorer.settings()
+    reopened.close()
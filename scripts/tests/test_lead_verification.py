@@ -0,0 +1,35 @@
+import asyncio
+
+from lead_verification import ContactVerifier
+
+
+async def slow_site(reader, writer):
+    await reader.readuntil(b'\r\n\r\n')
+    await asyncio.sleep(0.3)
+    writer.write(b'HTTP/1.1 200 OK\r\nContent-Length: 0\r\nConnection: close\r\n\r\n')
+    await writer.drain()
+    writer.close()
+
+
+async def verify_against_stub():
+    server = await asyncio.start_server(slow_site, '127.0.0.1', 0)
+    port = server.sockets[0].getsockname()[1]
+    # One slot per host: the last request waits far longer than the timeout for its turn
+    verifier = ContactVerifier(per_host=1, timeout=1.0)
+    queued = [f"http://127.0.0.1:{port}/{page}" for page in range(5)]
+    try:
+        results = await verifier.verify(queued + ['http://127.0.0.1:1/'], [])
+    finally:
+        verifier.close()
+        server.close()
+    return verifier, queued, results
+
+
+def test_host_congestion_and_network_errors_are_not_dead_sites():
+    verifier, queued, results = asyncio.run(verify_against_stub())
+
+    assert all(results[f"web:{url}"]['reachable'] for url in queued)
+
+    refused = results['web:http://127.0.0.1:1/']
+    assert not refused['reachable'] and refused['transient']
+    assert 'web:http://127.0.0.1:1/' not in verifier.cache.entries
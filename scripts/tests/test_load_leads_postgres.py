@@ -0,0 +1,61 @@
+"""Runs only against a throwaway database: TEST_DATABASE_URL=postgresql://... pytest"""
+
+import csv
+import importlib
+import os
+from pathlib import Path
+
+import pytest
+
+psycopg2 = pytest.importorskip('psycopg2')
+DSN = os.environ.get('TEST_DATABASE_URL')
+pytestmark = pytest.mark.skipif(not DSN, reason='TEST_DATABASE_URL is not set')
+
+loader_script = importlib.import_module('load-leads-postgres')
+
+
+@pytest.fixture
+def connection():
+    connection = psycopg2.connect(DSN)
+    with connection.cursor() as cursor:
+        cursor.execute('DROP TABLE IF EXISTS leads, public.leads_staging')
+        cursor.execute(loader_script.CREATE_TABLE_SQL)
+        cursor.execute('CREATE TABLE public.leads_staging (id INTEGER)')
+        cursor.execute("INSERT INTO leads (company_name, phone, company_website) VALUES "
+                       "('Old Phone', '+34 612 345 678', NULL), ('Old Web', NULL, 'https://www.bar-pepe.es/menu')")
+    connection.commit()
+    yield connection
+    with connection.cursor() as cursor:
+        cursor.execute('DROP TABLE IF EXISTS leads, public.leads_staging')
+    connection.commit()
+    connection.close()
+
+
+def write_leads(path: Path, rows) -> Path:
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=['company_name', 'phone', 'company_website', 'address'])
+        writer.writeheader()
+        writer.writerows(rows)
+    return path
+
+
+def test_load_upserts_by_normalized_keys(connection, tmp_path):
+    csv_file = write_leads(tmp_path / 'leads.csv', [
+        {'company_name': 'New Phone', 'phone': '612345678'},
+        {'company_name': 'New Web', 'company_website': 'bar-pepe.es'},
+        {'company_name': 'Fresh', 'phone': '699000111'},
+        {'company_name': 'Fresh later', 'phone': '+34699000111'},
+        {'company_name': 'No keys', 'address': 'Calle Mayor 1'}
+    ])
+    totals = {'rows': 0}
+    loader_script.load_file(connection, csv_file, 2, 0.0, totals)
+    # A second file in the same session recreates the staging table
+    loader_script.load_file(connection, csv_file, 2, 0.0, totals)
+
+    assert (totals['inserted'], totals['updated'], totals['merged_in_batch']) == (3, 5, 2)
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT company_name FROM leads ORDER BY company_name')
+        names = [name for (name,) in cursor.fetchall()]
+        cursor.execute('SELECT count(*) FROM public.leads_staging')
+        assert cursor.fetchone() == (0,)
+    assert names == ['Fresh later', 'New Phone', 'New Web', 'No keys', 'No keys']
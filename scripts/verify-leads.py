@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Lead Contact Verification for RitterFinder
+Re-checks the contact flags of a converted or deduplicated lead CSV: a
+website is verified when it answers over HTTP (after redirects), an email
+when its domain has MX records. data_quality_score then only counts a
+website or email that passed its check. Checks run concurrently through
+lead_verification and are cached on disk, so a re-run within the TTL only
+probes new contacts. Run it on the deduplicated CSV to probe fewer leads.
+"""
+
+import argparse
+import asyncio
+import csv
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, List
+
+from lead_verification import DEFAULT_TTL, ContactVerifier, ResultCache, email_domain
+
+
+def quality_score(row: Dict[str, str], website_ok: bool, email_ok: bool) -> int:
+    """The converter's 1-5 score, counting only contacts that passed verification"""
+    score = 1
+    if row.get('phone'):
+        score += 1
+    if website_ok:
+        score += 1
+    if email_ok:
+        score += 1
+    if row.get('description'):
+        score += 1
+    return min(score, 5)
+
+
+class LeadVerification:
+    """Streams a lead CSV through the contact checks in batches"""
+
+    def __init__(self, verifier: ContactVerifier, check_emails: bool = True, rewrite_websites: bool = False):
+        self.verifier = verifier
+        self.check_emails = check_emails
+        self.rewrite_websites = rewrite_websites
+        self.stats = {
+            'leads': 0, 'websites_reachable': 0, 'websites_dead': 0, 'websites_unknown': 0, 'websites_moved': 0,
+            'emails_with_mx': 0, 'emails_without_mx': 0, 'emails_unknown': 0
+        }
+
+    def apply(self, row: Dict[str, str], results: Dict[str, Dict[str, Any]]) -> None:
+        """Set a row's verified flags and score from the check results"""
+        website = (row.get('company_website') or '').strip()
+        website_ok = False
+        if website:
+            result = results[f"web:{website}"]
+            if result.get('transient'):
+                # Unknown: keep the flag as it was and keep counting the website
+                website_ok = True
+                self.stats['websites_unknown'] += 1
+            else:
+                website_ok = result['reachable']
+                row['verified_website'] = str(website_ok)
+                if website_ok:
+                    self.stats['websites_reachable'] += 1
+                    if self.rewrite_websites and result['redirects'] and result['final_url'] != website:
+                        row['company_website'] = result['final_url']
+                        self.stats['websites_moved'] += 1
+                else:
+                    self.stats['websites_dead'] += 1
+        else:
+            row['verified_website'] = str(False)
+
+        domain = email_domain(row.get('email') or '')
+        email_ok = bool(domain)
+        if domain and self.check_emails:
+            result = results[f"mx:{domain}"]
+            if result.get('transient'):
+                # Unknown: keep the flag as it was and keep counting the email
+                self.stats['emails_unknown'] += 1
+            else:
+                email_ok = result['has_mx']
+                row['verified_email'] = str(email_ok)
+                self.stats['emails_with_mx' if email_ok else 'emails_without_mx'] += 1
+
+        row['data_quality_score'] = str(quality_score(row, website_ok, email_ok))
+
+    async def verify_rows(self, rows: List[Dict[str, str]]) -> None:
+        websites = [website for website in ((row.get('company_website') or '').strip() for row in rows) if website]
+        domains = []
+        if self.check_emails:
+            domains = [domain for domain in (email_domain(row.get('email') or '') for row in rows) if domain]
+
+        results = await self.verifier.verify(websites, domains)
+        for row in rows:
+            self.apply(row, results)
+        self.stats['leads'] += len(rows)
+
+    async def verify_file(self, input_file: Path, output_file: Path, batch_size: int) -> None:
+        try:
+            with open(input_file, 'r', newline='', encoding='utf-8') as f_in, \
+                    open(output_file, 'w', newline='', encoding='utf-8') as f_out:
+                reader = csv.DictReader(f_in)
+                fieldnames = list(reader.fieldnames or [])
+                for column in ('verified_website', 'verified_email', 'data_quality_score'):
+                    if column not in fieldnames:
+                        fieldnames.append(column)
+                writer = csv.DictWriter(f_out, fieldnames=fieldnames)
+                writer.writeheader()
+
+                while True:
+                    rows = list(islice(reader, batch_size))
+                    if not rows:
+                        break
+                    await self.verify_rows(rows)
+                    writer.writerows(rows)
+                    # Keep what was learnt if the run is interrupted
+                    self.verifier.cache.save()
+
+                    stats = self.verifier.stats
+                    print(f"   🔎 {self.stats['leads']} leads, "
+                          f"{stats['website_checks']} websites and {stats['email_checks']} email domains checked, "
+                          f"{stats['cached']} cached ({self.verifier.checks_per_second():,.1f} checks/sec)")
+        finally:
+            self.verifier.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Verify lead websites (HTTP) and email domains (MX)')
+    parser.add_argument('input_file', help='Input CSV file with leads')
+    parser.add_argument('--output', '-o', help='Output CSV file (default: <input>.verified.csv)')
+    parser.add_argument('--cache', help='Result cache file (default: .verification_cache.json next to the output)')
+    parser.add_argument('--ttl-days', type=float, default=DEFAULT_TTL / 86400,
+                        help='Days a cached result stays valid (default: 7)')
+    parser.add_argument('--concurrency', type=int, default=200, help='Checks in flight at once (default: 200)')
+    parser.add_argument('--per-host', type=int, default=2, help='Requests in flight per host (default: 2)')
+    parser.add_argument('--host-interval', type=float, default=0.0,
+                        help='Minimum seconds between requests to one host (default: 0)')
+    parser.add_argument('--timeout', type=float, default=10.0, help='Seconds per website check (default: 10)')
+    parser.add_argument('--max-redirects', type=int, default=5, help='Redirects followed per website (default: 5)')
+    parser.add_argument('--dns-server', metavar='HOST[:PORT]',
+                        help='Name server for MX lookups (default: first nameserver of /etc/resolv.conf)')
+    parser.add_argument('--skip-emails', action='store_true', help='Do not check email domains')
+    parser.add_argument('--rewrite-websites', action='store_true',
+                        help='Replace a website that redirects with its final URL')
+    parser.add_argument('--batch-size', type=int, default=5000, help='Leads read and checked per batch (default: 5000)')
+
+    args = parser.parse_args()
+    if args.concurrency < 1 or args.per_host < 1 or args.batch_size < 1:
+        parser.error('--concurrency, --per-host and --batch-size must be at least 1')
+
+    dns_server = None
+    if args.dns_server:
+        host, _, port = args.dns_server.partition(':')
+        if port and not port.isdigit():
+            parser.error('--dns-server must be HOST or HOST:PORT')
+        dns_server = (host, int(port) if port else 53)
+
+    input_file = Path(args.input_file)
+    if not input_file.exists():
+        print(f"❌ Input file not found: {input_file}")
+        return
+    output_file = Path(args.output) if args.output else input_file.with_suffix('.verified.csv')
+    cache_file = Path(args.cache) if args.cache else output_file.parent / '.verification_cache.json'
+
+    verifier = ContactVerifier(
+        cache=ResultCache(cache_file, ttl=args.ttl_days * 86400),
+        concurrency=args.concurrency,
+        per_host=args.per_host,
+        host_interval=args.host_interval,
+        timeout=args.timeout,
+        max_redirects=args.max_redirects,
+        dns_server=dns_server
+    )
+    verification = LeadVerification(verifier, check_emails=not args.skip_emails,
+                                    rewrite_websites=args.rewrite_websites)
+
+    print(f"🚀 Verifying lead contacts in {input_file}...")
+    asyncio.run(verification.verify_file(input_file, output_file, args.batch_size))
+
+    stats = verification.stats
+    print(f"\n🎉 Verification completed!")
+    print(f"📈 Leads: {stats['leads']}")
+    print(f"🌐 Websites reachable: {stats['websites_reachable']}, dead: {stats['websites_dead']}, "
+          f"unknown: {stats['websites_unknown']}"
+          + (f", rewritten after redirects: {stats['websites_moved']}" if args.rewrite_websites else ''))
+    if not args.skip_emails:
+        print(f"📧 Email domains with MX: {stats['emails_with_mx']}, without: {stats['emails_without_mx']}, "
+              f"unknown: {stats['emails_unknown']}")
+    print(f"⚡ {verifier.stats['website_checks'] + verifier.stats['email_checks']} checks in "
+          f"{verifier.stats['seconds']:.1f}s ({verifier.checks_per_second():,.1f} checks/sec), "
+          f"{verifier.stats['cached']} answered from the cache")
+    print(f"📁 Output: {output_file}")
+
+if __name__ == '__main__':
+    main()